@@ -0,0 +1,338 @@
+"""AI 광고 취향 분석기 벤치마크 (재현 가능한 합성 말뭉치 기반)
+
+SentiWord_info.json 어휘와 ad_copy_database.json 문체로 만든 합성 광고 문구·평가 기록으로
+감성사전 로드, 병렬 분석 워커 시작 시간, analyze_text/analyze_batch 처리량, 유사 광고 찾기 지연 시간,
+추천 지연 시간과 최대 메모리를 측정합니다. 측정 대상은 cli-version/main2.py이며, 결과는 JSON으로 저장하고 저장된 기준
+결과(baseline)와 비교해 허용 범위를 넘게 느려지면 종료 코드 1을 반환합니다.
+
+    python benchmarks/run_benchmarks.py                        # 1천 개 (빠른 확인)
+    python benchmarks/run_benchmarks.py --scale medium         # 1천, 10만 개
+    python benchmarks/run_benchmarks.py --scale large          # 1천, 10만, 100만 개
+    python benchmarks/run_benchmarks.py --save-baseline        # 현재 결과를 기준으로 저장
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows: 최대 메모리는 기록하지 않음
+    resource = None
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+CLI_DIR = os.path.join(os.path.dirname(BENCH_DIR), "cli-version")
+sys.path.insert(0, CLI_DIR)
+
+import main2  # noqa: E402
+
+# 규모별 문구·기록 수
+SCALES = {
+    'small': [1_000],
+    'medium': [1_000, 100_000],
+    'large': [1_000, 100_000, 1_000_000],
+}
+
+DEFAULT_SEED = 20240101
+DEFAULT_THRESHOLD = 0.15
+DEFAULT_OUTPUT = os.path.join(BENCH_DIR, "results.json")
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+
+# 지표 이름 끝으로 방향 판단: 처리량은 클수록, 나머지(시간·메모리)는 작을수록 좋음
+HIGHER_IS_BETTER_SUFFIXES = ('_per_sec',)
+
+# 유사 광고·추천 지연 시간을 잴 질의 수
+SIMILAR_QUERIES = 200
+RECOMMEND_REPEATS = 20
+RECOMMEND_REPEATS_LARGE = 3
+
+# analyze_batch에 한 번에 넘기는 문구 수 (iter_analyze_many 기본 청크 크기와 같음)
+BATCH_SIZE = 64
+
+
+class SyntheticAdCorpus:
+    """감성사전 어휘와 광고 카피 DB 문체로 만드는 결정적 합성 광고 문구·평가 기록
+
+    같은 시드와 같은 데이터 파일이면 항상 같은 문구를 같은 순서로 만듭니다.
+    """
+
+    ENDINGS = ('', '', '', '!', '?', '...', ' ㅋㅋ', '!!')
+
+    def __init__(self, seed: int = DEFAULT_SEED, data_dir: str = CLI_DIR):
+        self.seed = seed
+        with open(os.path.join(data_dir, "SentiWord_info.json"), 'r', encoding='utf-8') as f:
+            lexicon = json.load(f)
+        with open(os.path.join(data_dir, "ad_copy_database.json"), 'r', encoding='utf-8') as f:
+            catalog = json.load(f)
+        with open(os.path.join(data_dir, "ad_keywords.json"), 'r', encoding='utf-8') as f:
+            keyword_tables = json.load(f)
+
+        # 감성 단어 (한 토큰짜리 한글 표제어만, 극성별)
+        self.sentiment_words: Dict[int, List[str]] = {}
+        for item in lexicon:
+            word = item['word']
+            if main2.WORD_PATTERN.fullmatch(word):
+                self.sentiment_words.setdefault(int(item['polarity']), []).append(word)
+        self.polarities = sorted(self.sentiment_words)
+
+        # 광고 카피 문장 조각과 스타일·산업군 키워드
+        self.copy_words = sorted({word for copy in catalog for word in main2.WORD_PATTERN.findall(copy['text'])})
+        self.keywords = sorted({keyword for table in keyword_tables.values()
+                                for keywords in table.values() for keyword in keywords if keyword})
+
+    def texts(self, count: int, stream: int = 0) -> List[str]:
+        """광고 문구 count개 (stream이 다르면 다른 문구열)"""
+        rng = random.Random(f"{self.seed}:{stream}")
+        return [self._text(rng) for _ in range(count)]
+
+    def _text(self, rng: random.Random) -> str:
+        parts = rng.sample(self.copy_words, rng.randint(2, 5))
+        for _ in range(rng.randint(0, 3)):
+            parts.insert(rng.randrange(len(parts) + 1), rng.choice(self.sentiment_words[rng.choice(self.polarities)]))
+        if rng.random() < 0.6:
+            parts.insert(rng.randrange(len(parts) + 1), rng.choice(self.keywords))
+        return ' '.join(parts) + rng.choice(self.ENDINGS)
+
+    def history(self, count: int, stream: int = 1) -> List[Dict[str, Any]]:
+        """평가 기록 count개 (ad_data.json 형식, 감성 분석 결과는 생략)"""
+        rng = random.Random(f"{self.seed}:history:{stream}")
+        return [{'ad_text': text, 'overall_rating': rng.randint(1, 10), 'sentiment_analysis': None,
+                 'timestamp': f"2024-01-01T00:00:{i % 60:02d}"}
+                for i, text in enumerate(self.texts(count, stream))]
+
+
+def percentile_ms(samples: List[float], q: float) -> float:
+    """초 단위 표본의 분위수 (ms, 최근접 순위)"""
+    ordered = sorted(samples)
+    rank = min(len(ordered) - 1, max(0, int(round(q * len(ordered))) - 1))
+    return ordered[rank] * 1000
+
+
+def peak_rss_mb() -> Optional[float]:
+    """현재 프로세스의 최대 상주 메모리 (MB, 지원하지 않는 OS면 None)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # 리눅스는 KB, macOS는 바이트 단위
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def bench_lexicon_load(corpus: SyntheticAdCorpus, size: int, workdir: str) -> Dict[str, float]:
+    """감성사전 로드: 캐시가 없을 때(JSON 파싱 + 캐시 생성)와 컴파일된 캐시를 읽을 때"""
+    senti_path = os.path.join(workdir, "SentiWord_info.json")
+    shutil.copy(os.path.join(CLI_DIR, "SentiWord_info.json"), senti_path)
+
+    start = time.perf_counter()
+    main2.AdvancedSentimentAnalyzer(senti_path)
+    cold = time.perf_counter() - start
+
+    start = time.perf_counter()
+    main2.AdvancedSentimentAnalyzer(senti_path)
+    cached = time.perf_counter() - start
+    return {'cold_seconds': cold, 'cached_seconds': cached}
+
+
+def bench_worker_startup(corpus: SyntheticAdCorpus, size: int, workdir: str) -> Dict[str, float]:
+    """병렬 분석 워커 초기화 + 첫 배치: 감성사전을 직접 로드할 때와 공유 감성사전을 매핑할 때"""
+    senti_path = os.path.join(workdir, "SentiWord_info.json")
+    shutil.copy(os.path.join(CLI_DIR, "SentiWord_info.json"), senti_path)
+    analyzer = main2.AdvancedSentimentAnalyzer(senti_path)
+    initargs = (analyzer.senti_dict_file, analyzer.keywords_file, analyzer.style_keywords, analyzer.industry_keywords)
+    texts = corpus.texts(BATCH_SIZE)
+
+    start = time.perf_counter()
+    shared_path = analyzer.publish_shared_lexicon()
+    publish = time.perf_counter() - start
+
+    metrics = {'publish_seconds': publish}
+    for name, shared in (('load', None), ('attach', shared_path)):
+        start = time.perf_counter()
+        main2._init_analysis_worker(*initargs, shared)
+        main2._analyze_chunk(texts)
+        metrics[f'{name}_seconds'] = time.perf_counter() - start
+    return metrics
+
+
+def bench_analyze_text(corpus: SyntheticAdCorpus, size: int, workdir: str) -> Dict[str, float]:
+    """analyze_text 단일 프로세스 처리량"""
+    analyzer = main2.AdvancedSentimentAnalyzer()
+    texts = corpus.texts(size)
+    analyzer.analyze_text(texts[0])  # 구 매처 구성은 측정에서 제외
+
+    start = time.perf_counter()
+    for text in texts:
+        analyzer.analyze_text(text)
+    elapsed = time.perf_counter() - start
+    return {'seconds': elapsed, 'texts_per_sec': size / elapsed}
+
+
+def bench_analyze_batch(corpus: SyntheticAdCorpus, size: int, workdir: str) -> Dict[str, float]:
+    """analyze_batch (감성 표현 id 배열 + 벡터 집계) 단일 프로세스 처리량"""
+    analyzer = main2.AdvancedSentimentAnalyzer()
+    texts = corpus.texts(size)
+    analyzer.analyze_batch(texts[:1])  # 구 매처·id 표 구성은 측정에서 제외
+
+    start = time.perf_counter()
+    for chunk in main2._chunked(texts, BATCH_SIZE):
+        analyzer.analyze_batch(chunk)
+    elapsed = time.perf_counter() - start
+    return {'seconds': elapsed, 'texts_per_sec': size / elapsed}
+
+
+def bench_find_similar_ads(corpus: SyntheticAdCorpus, size: int, workdir: str) -> Dict[str, float]:
+    """유사 광고 찾기: 기록 size개로 색인 구성 후 질의 지연 시간"""
+    history_texts = [ad['ad_text'] for ad in corpus.history(size)]
+    index = main2.SimilarityIndex(os.path.join(workdir, "ad_data" + main2.SIMILARITY_INDEX_SUFFIX))
+
+    start = time.perf_counter()
+    index.sync(history_texts)
+    build = time.perf_counter() - start
+
+    samples = []
+    for query in corpus.texts(SIMILAR_QUERIES, stream=2):
+        start = time.perf_counter()
+        index.query(query, top_n=3, threshold=0.1)
+        samples.append(time.perf_counter() - start)
+    return {'index_build_seconds': build, 'query_p50_ms': percentile_ms(samples, 0.5),
+            'query_p99_ms': percentile_ms(samples, 0.99), 'query_mean_ms': statistics.fmean(samples) * 1000}
+
+
+def bench_recommend(corpus: SyntheticAdCorpus, size: int, workdir: str) -> Dict[str, float]:
+    """맞춤 추천: 평가 기록 size개 중 7점 이상 문구로 프로필을 만들어 카탈로그 상위 10개 찾기"""
+    catalog_path = os.path.join(workdir, "ad_copy_database.json")
+    shutil.copy(os.path.join(CLI_DIR, "ad_copy_database.json"), catalog_path)
+    with open(catalog_path, 'r', encoding='utf-8') as f:
+        catalog_texts = [copy['text'] for copy in json.load(f)]
+
+    start = time.perf_counter()
+    catalog_index = main2.CatalogTfidfIndex(catalog_path, catalog_texts)
+    fit = time.perf_counter() - start
+
+    liked = [ad['ad_text'] for ad in corpus.history(size) if ad['overall_rating'] >= 7]
+    repeats = RECOMMEND_REPEATS if size <= 10_000 else RECOMMEND_REPEATS_LARGE
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        catalog_index.top_k(catalog_index.profile(liked), 10, threshold=0.1)
+        samples.append(time.perf_counter() - start)
+    return {'index_fit_seconds': fit, 'latency_p50_ms': percentile_ms(samples, 0.5),
+            'latency_max_ms': max(samples) * 1000}
+
+
+BENCHMARKS: Dict[str, Tuple[Callable[[SyntheticAdCorpus, int, str], Dict[str, float]], bool]] = {
+    # 이름: (측정 함수, 규모마다 실행하는지)
+    'lexicon_load': (bench_lexicon_load, False),
+    'worker_startup': (bench_worker_startup, False),
+    'analyze_text': (bench_analyze_text, True),
+    'analyze_batch': (bench_analyze_batch, True),
+    'find_similar_ads': (bench_find_similar_ads, True),
+    'recommend': (bench_recommend, True),
+}
+
+
+def _run_case(name: str, size: int, seed: int) -> Dict[str, float]:
+    """별도 프로세스에서 측정 하나 실행 (최대 메모리를 측정마다 따로 재기 위해)"""
+    main2.console.quiet = True
+    func, _ = BENCHMARKS[name]
+    corpus = SyntheticAdCorpus(seed)
+    with tempfile.TemporaryDirectory(prefix="lfair-bench-") as workdir:
+        metrics = func(corpus, size, workdir)
+    rss = peak_rss_mb()
+    if rss is not None:
+        metrics['peak_rss_mb'] = rss
+    return metrics
+
+
+def run_benchmarks(names: List[str], sizes: List[int], seed: int) -> Dict[str, Dict[str, float]]:
+    """측정을 하나씩 새 프로세스에서 실행해 {측정 이름[@규모]: 지표} 반환"""
+    results = {}
+    for name in names:
+        _, per_size = BENCHMARKS[name]
+        for size in (sizes if per_size else [0]):
+            key = f"{name}@{size}" if per_size else name
+            print(f"⏱️  {key} ...", file=sys.stderr, flush=True)
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                results[key] = pool.submit(_run_case, name, size, seed).result()
+    return results
+
+
+def compare_with_baseline(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+                          threshold: float) -> List[str]:
+    """기준 결과보다 threshold 비율 이상 나빠진 지표 목록 (양쪽에 모두 있는 지표만 비교)"""
+    regressions = []
+    for key, metrics in results.items():
+        for metric, value in metrics.items():
+            base = baseline.get(key, {}).get(metric)
+            if not base:
+                continue
+            if metric.endswith(HIGHER_IS_BETTER_SUFFIXES):
+                change = (base - value) / base
+            else:
+                change = (value - base) / base
+            if change > threshold:
+                regressions.append(f"{key} {metric}: {base:.4g} → {value:.4g} ({change:+.1%} 악화)")
+    return regressions
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="AI 광고 취향 분석기 벤치마크")
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small',
+                        help="small: 1천 개, medium: + 10만 개, large: + 100만 개 (기본값: small)")
+    parser.add_argument('--sizes', type=int, nargs='+', help="문구·기록 수를 직접 지정 (--scale 대신)")
+    parser.add_argument('--only', nargs='+', choices=list(BENCHMARKS), help="일부 측정만 실행")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help=f"합성 말뭉치 시드 (기본값: {DEFAULT_SEED})")
+    parser.add_argument('--output', '-o', default=DEFAULT_OUTPUT, help="결과 JSON 경로 (기본값: benchmarks/results.json)")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="비교할 기준 결과 JSON (기본값: benchmarks/baseline.json)")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f"회귀로 볼 악화 비율 (기본값: {DEFAULT_THRESHOLD})")
+    parser.add_argument('--save-baseline', action='store_true', help="이번 결과를 기준 결과로 저장 (비교하지 않음)")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_arg_parser().parse_args(argv)
+    sizes = args.sizes or SCALES[args.scale]
+
+    results = run_benchmarks(args.only or list(BENCHMARKS), sizes, args.seed)
+    report = {
+        'meta': {
+            'seed': args.seed,
+            'sizes': sizes,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+
+    output = args.baseline if args.save_baseline else args.output
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+    print(f"✅ 결과 저장: {output}", file=sys.stderr)
+
+    if args.save_baseline or not os.path.exists(args.baseline):
+        return 0
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)['results']
+    regressions = compare_with_baseline(results, baseline, args.threshold)
+    if regressions:
+        print(f"❌ 기준 결과 대비 {args.threshold:.0%} 넘게 느려진 지표:", file=sys.stderr)
+        for line in regressions:
+            print(f"  - {line}", file=sys.stderr)
+        return 1
+    print(f"✅ 기준 결과 대비 회귀 없음 (허용 {args.threshold:.0%})", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,51 @@
+from __future__ import annotations
+
+import argparse
+import bisect
+import contextlib
+import csv
+import functools
 import json
+import mmap
 import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unicodedata
+import urllib.parse
 from datetime import datetime
 import re
-from typing import List, Dict, Tuple
+import sqlite3
+import struct
+import subprocess
+import hashlib
+import importlib
+import math
+from array import array
+import itertools
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Iterable, Iterator, List, Dict, Sequence, Tuple, Optional
+
+
+class LazyModule:
+    """처음 속성에 접근할 때 실제로 import하는 모듈 자리표시자
+
+    가져온 뒤에는 namespace의 같은 이름을 실제 모듈로 바꿔 두므로 이후 접근에는 추가 비용이 없습니다.
+    """
+
+    def __init__(self, namespace: Dict[str, Any], alias: str, name: str):
+        self._namespace = namespace
+        self._alias = alias
+        self._name = name
+
+    def __getattr__(self, attr):
+        module = importlib.import_module(self._name)
+        self._namespace[self._alias] = module
+        return getattr(module, attr)
+
 
 # UI 라이브러리
 from rich.console import Console
@@ -11,114 +54,1083 @@ from rich.panel import Panel
 from rich.prompt import Prompt, IntPrompt
 from rich import box
 
-# 텍스트 유사도 분석 및 머신러닝
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-import numpy as np
+# 텍스트 유사도 분석 및 머신러닝 (시작 시간을 줄이기 위해 처음 사용할 때 가져옴)
+np = LazyModule(globals(), 'np', 'numpy')
+sparse = LazyModule(globals(), 'sparse', 'scipy.sparse')
+sklearn_text = LazyModule(globals(), 'sklearn_text', 'sklearn.feature_extraction.text')
+
+# 로컬 HTTP 분석 서비스에서만 쓰는 비동기 I/O (대화형 메뉴 시작 시간에 포함되지 않도록 처음 사용할 때 가져옴)
+asyncio = LazyModule(globals(), 'asyncio', 'asyncio')
 
 # Rich Console 초기화
 console = Console()
 
+# 컴파일된 감성사전 캐시 포맷
+# 헤더: 매직, 포맷 버전, 원본 크기, 원본 mtime(ns), 원본 SHA-1,
+#       단어 수, 단어 블롭 길이, 어근 블롭 길이, 어근 색인 크기, 어근 색인 블롭 길이
+# 본문: 극성 배열(int8 × 단어 수) + '\n'으로 이어 붙인 UTF-8 단어 블롭 + 같은 순서의 어근 블롭
+#       + 어근 색인 극성 배열 + 어근 색인 키 블롭
+LEXICON_CACHE_SUFFIX = ".lexcache"
+LEXICON_CACHE_MAGIC = b"KNUL"
+LEXICON_CACHE_VERSION = 3
+LEXICON_CACHE_HEADER = struct.Struct("<4sIQQ20sIIIII")
+
+# 단어 토큰 패턴 (한글, 영어)
+WORD_PATTERN = re.compile(r'[가-힣]+|[a-zA-Z]+')
+
+# 어근 색인에 넣을 최소 어근 길이 (한 글자 어근은 접두사로 쓰면 오탐이 많음)
+MIN_STEM_LENGTH = 2
+
+# 표제어가 아닌 (용언) 어근의 최소 길이: "바르"+"는", "놀라"+"운"처럼 두 글자 용언 어근은
+# 다른 낱말의 활용형과 겹치는 경우가 많아 정확히 일치하는 표제어로만 찾음
+MIN_PREDICATE_STEM_LENGTH = 3
+
+# 어근 뒤에 붙을 수 있는 어미·조사 (나머지가 이 중 하나일 때만 어근 색인으로 인정)
+STEM_ENDINGS = frozenset([
+    '',
+    # 조사
+    '이', '가', '은', '는', '을', '를', '의', '에', '에서', '에게', '께', '으로', '로', '와', '과',
+    '도', '만', '까지', '부터', '보다', '처럼', '이나', '나', '이며', '이고', '이다', '이라', '이에요',
+    '입니다', '들', '들이', '들은', '들을', '들의', '들도',
+    # 어미
+    '다', '고', '게', '게도', '지', '며', '면', '서', '니', '네', '요', '죠', '기', '기에', '음', '던',
+    '어', '아', '여', '어서', '아서', '어야', '아야', '었', '았', '었다', '았다', '었던', '았던',
+    '어요', '아요', '습니다', '거나', '라', '으니', '으면', '으며', '은데', '는데',
+    # -하다/-되다/-스럽다/-롭다/-적 파생
+    '하다', '한', '할', '함', '함을', '함이', '하는', '하고', '하게', '하며', '하면', '하여', '하지',
+    '하기', '해', '해서', '해요', '했', '했다', '했던', '합니다', '되다', '된', '되는', '되어', '돼',
+    '스럽다', '스러운', '스럽게', '스러움', '롭다', '로운', '롭게', '로움', '적', '적인', '적으로'
+])
+
+
+def _file_sha1(filepath: str) -> bytes:
+    """파일 내용의 SHA-1 다이제스트"""
+    with open(filepath, 'rb') as f:
+        return hashlib.sha1(f.read()).digest()
+
+
+def read_lexicon_cache(cache_path: str, source_path: str) -> Optional[Tuple[Dict[str, int], Dict[str, str], Dict[str, int]]]:
+    """컴파일된 감성사전 캐시 읽기: (단어→극성, 단어→어근, 어근 색인), 없거나 오래되었으면 None"""
+    if not os.path.exists(cache_path):
+        return None
+
+    try:
+        with open(cache_path, 'rb') as f:
+            raw = f.read()
+
+        (magic, version, size, mtime_ns, digest,
+         count, words_len, roots_len, stem_count, stems_len) = LEXICON_CACHE_HEADER.unpack_from(raw)
+        if magic != LEXICON_CACHE_MAGIC or version != LEXICON_CACHE_VERSION:
+            return None
+
+        # 크기/mtime이 다르면 내용 해시로 한 번 더 확인 (git checkout 등으로 mtime만 바뀐 경우)
+        stat = os.stat(source_path)
+        if (size, mtime_ns) != (stat.st_size, stat.st_mtime_ns):
+            if size != stat.st_size or digest != _file_sha1(source_path):
+                return None
+
+        offset = LEXICON_CACHE_HEADER.size
+        polarities = array('b')
+        polarities.frombytes(raw[offset:offset + count])
+        offset += count
+        words = raw[offset:offset + words_len].decode('utf-8').split('\n') if count else []
+        offset += words_len
+        roots = raw[offset:offset + roots_len].decode('utf-8').split('\n') if count else []
+        offset += roots_len
+        stem_polarities = array('b')
+        stem_polarities.frombytes(raw[offset:offset + stem_count])
+        offset += stem_count
+        stems = raw[offset:offset + stems_len].decode('utf-8').split('\n') if stem_count else []
+
+        if len(words) != count or len(roots) != count or len(stems) != stem_count:
+            return None
+        return dict(zip(words, polarities)), dict(zip(words, roots)), dict(zip(stems, stem_polarities))
+    except (OSError, struct.error, UnicodeDecodeError):
+        return None
+
+
+def write_lexicon_cache(cache_path: str, source_path: str, sentiment_dict: Dict[str, int],
+                        word_roots: Dict[str, str], stem_index: Dict[str, int]):
+    """감성사전을 컴파일된 캐시로 저장 (임시 파일에 쓴 뒤 교체)"""
+    try:
+        stat = os.stat(source_path)
+        words_blob = '\n'.join(sentiment_dict).encode('utf-8')
+        roots_blob = '\n'.join(word_roots[word] for word in sentiment_dict).encode('utf-8')
+        stems_blob = '\n'.join(stem_index).encode('utf-8')
+        header = LEXICON_CACHE_HEADER.pack(
+            LEXICON_CACHE_MAGIC, LEXICON_CACHE_VERSION,
+            stat.st_size, stat.st_mtime_ns, _file_sha1(source_path),
+            len(sentiment_dict), len(words_blob), len(roots_blob),
+            len(stem_index), len(stems_blob)
+        )
+
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(header)
+            f.write(array('b', sentiment_dict.values()).tobytes())
+            f.write(words_blob)
+            f.write(roots_blob)
+            f.write(array('b', stem_index.values()).tobytes())
+            f.write(stems_blob)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        # 읽기 전용 디렉토리 등: 캐시 없이 계속 진행
+        pass
+
+
+def build_stem_index(sentiment_dict: Dict[str, int], word_roots: Dict[str, str]) -> Dict[str, int]:
+    """어근 → 극성 색인 구성 (한 단어짜리 한글 어근 중 극성 부호가 일관된 것만, 짧은 용언 어근 제외)"""
+    root_polarities = {}
+    for word, root in word_roots.items():
+        if len(root) < MIN_STEM_LENGTH or WORD_PATTERN.fullmatch(root) is None or ' ' in word:
+            continue
+        if len(root) < MIN_PREDICATE_STEM_LENGTH and root not in sentiment_dict:
+            continue
+        root_polarities.setdefault(root, []).append(sentiment_dict[word])
+
+    stem_index = {}
+    for root, polarities in root_polarities.items():
+        signs = {(p > 0) - (p < 0) for p in polarities}
+        if len(signs) == 1:
+            # 가장 흔한 극성 (동률이면 먼저 나온 값)
+            stem_index[root] = max(polarities, key=polarities.count)
+    return stem_index
+
+
+def lexicon_phrases(sentiment_dict: Dict[str, int]) -> Dict[Tuple[str, ...], Tuple[str, int]]:
+    """감성사전 표제어를 단어 토큰열 → (표제어, 극성)으로 (구 매처와 공유 감성사전이 함께 사용)"""
+    phrases = {}
+    for word, polarity in sentiment_dict.items():
+        tokens = tuple(WORD_PATTERN.findall(word))
+        if not tokens:
+            continue
+        # 같은 토큰열이면 문장부호 없이 정확히 일치하는 표제어를 우선
+        if ' '.join(tokens) == word or tokens not in phrases:
+            phrases[tokens] = (word, polarity)
+    return phrases
+
+
+class PhraseMatcher:
+    """Aho-Corasick 매처 (토큰열이면 단어·구, 문자열이면 부분 문자열을 한 번의 스캔으로 탐색)"""
+
+    def __init__(self, phrases: Dict[Sequence[str], Any]):
+        # 노드별 전이, 실패 링크, 출력(페이로드, 길이), 다음 출력 노드 링크
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[Optional[Tuple[Any, int]]] = [None]
+        self.output_link: List[int] = [0]
+
+        for tokens, payload in phrases.items():
+            node = 0
+            for token in tokens:
+                child = self.goto[node].get(token)
+                if child is None:
+                    child = len(self.goto)
+                    self.goto[node][token] = child
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append(None)
+                    self.output_link.append(0)
+                node = child
+            self.output[node] = (payload, len(tokens))
+
+        # 너비 우선으로 실패 링크 구성
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for token, child in self.goto[node].items():
+                queue.append(child)
+
+                state = self.fail[node]
+                while state and token not in self.goto[state]:
+                    state = self.fail[state]
+                fallback = self.goto[state].get(token, 0)
+
+                self.fail[child] = fallback
+                self.output_link[child] = fallback if self.output[fallback] else self.output_link[fallback]
+
+    def find_all(self, tokens: Sequence[str]) -> List[Tuple[int, int, Any]]:
+        """모든 매칭 (시작 위치, 끝 위치, 페이로드) 반환"""
+        hits = []
+        node = 0
+
+        for end, token in enumerate(tokens, 1):
+            while node and token not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(token, 0)
+
+            match = node if self.output[node] else self.output_link[node]
+            while match:
+                payload, length = self.output[match]
+                hits.append((end - length, end, payload))
+                match = self.output_link[match]
+
+        return hits
+
+    @staticmethod
+    def select_longest(hits: List[Tuple[int, int, Any]]) -> List[Tuple[int, int, Any]]:
+        """겹치는 매칭 중 왼쪽부터 가장 긴 것만 남기기"""
+        selected = []
+        covered_end = 0
+
+        for hit in sorted(hits, key=lambda h: (h[0], h[0] - h[1])):
+            if hit[0] >= covered_end:
+                selected.append(hit)
+                covered_end = hit[1]
+
+        return selected
+
+
+class KeywordClassifier:
+    """스타일·산업군 키워드 표를 하나의 문자 단위 매처로 컴파일한 분류기"""
+
+    def __init__(self, tables: Dict[str, Dict[str, List[str]]]):
+        self.tables = tables
+
+        # 키워드 → 해당 키워드를 포함하는 (표, 분류) 목록
+        targets = {}
+        for table, categories in tables.items():
+            for category, keywords in categories.items():
+                for keyword in keywords:
+                    if keyword:
+                        targets.setdefault(keyword, []).append((table, category))
+
+        self.matcher = PhraseMatcher({keyword: (keyword, tuple(pairs)) for keyword, pairs in targets.items()})
+
+    def classify(self, text: str) -> Dict[str, List[Tuple[str, int]]]:
+        """한 번의 스캔으로 모든 표의 분류 점수 계산 (분류마다 포함된 키워드 수)"""
+        scores = {table: dict.fromkeys(categories, 0) for table, categories in self.tables.items()}
+        seen = set()
+
+        for _, _, (keyword, pairs) in self.matcher.find_all(text):
+            if keyword in seen:
+                continue
+            seen.add(keyword)
+            for table, category in pairs:
+                scores[table][category] += 1
+
+        # 점수 순으로 정렬 (동점이면 표에 적힌 순서)
+        results = {}
+        for table, category_scores in scores.items():
+            matched = [(category, score) for category, score in category_scores.items() if score > 0]
+            results[table] = sorted(matched, key=lambda x: x[1], reverse=True) or [('기타', 0)]
+        return results
+
+
+# 분석 결과 캐시: 대화형 앱의 메모리 캐시 크기, analyze_text 규칙이 바뀌면 올려서 예전 결과 무효화
+ANALYSIS_CACHE_SIZE = 1024
+ANALYSIS_VERSION = 2
+
+# 디스크 캐시는 이만큼 쓸 때마다 커밋
+ANALYSIS_CACHE_COMMIT_EVERY = 256
+
+# 언어 패턴 필드 (SentimentResult에는 이 순서의 값 튜플로 보관)
+LANGUAGE_PATTERN_FIELDS = ('length', 'word_count', 'has_question', 'has_exclamation', 'has_emoji', 'sentence_count')
+
+# 분석 결과에 남기는 앞쪽 단어 수
+ANALYSIS_WORD_COUNT = 10
+
+# 모든 분석 결과가 함께 쓰는 (이름, 값) 튜플 (같은 표현·분류는 객체 하나만 유지)
+_interned_pairs: Dict[Tuple[str, Any], Tuple[str, Any]] = {}
+
+
+def intern_pair(pair: Sequence) -> Tuple[str, Any]:
+    """(이름, 값)을 공유 튜플로"""
+    pair = tuple(pair)
+    return _interned_pairs.setdefault(pair, pair)
+
+
+def intern_pairs(pairs: Iterable[Sequence]) -> Tuple[Tuple[str, Any], ...]:
+    """(이름, 값) 목록을 공유 튜플의 튜플로"""
+    return tuple(map(intern_pair, pairs))
+
+
+def text_language_pattern(text: str) -> Dict[str, Any]:
+    """언어 패턴 (길이, 한글 단어 수, 질문·감탄·이모티콘 여부, 문장 수)"""
+    return {
+        'length': len(text),
+        'word_count': len(re.findall(r'[가-힣]+', text)),
+        'has_question': '?' in text,
+        'has_exclamation': '!' in text,
+        'has_emoji': bool(re.search(r'[ㅋㅎ😀-🙏]+', text)),
+        'sentence_count': len(re.split(r'[.!?]', text.strip()))
+    }
+
+
+class SentimentResult:
+    """analyze_text 결과 (평가마다 하나씩 보관하므로 dict 대신 슬롯 객체로 압축)
+
+    (표현, 극성)·(분류, 점수) 목록은 공유 튜플로, 언어 패턴은 값 튜플로, 단어 목록은
+    공백으로 이은 문자열 하나로 보관합니다. 감성 단어 수와 충돌 강도처럼 다른 필드에서
+    계산되는 값은 저장하지 않고, 예전 dict 형식은 저장·출력할 때 to_dict()로 만듭니다.
+    언어 패턴과 단어 목록을 주지 않으면 text(평가한 광고 문구)에서 필요할 때 계산합니다.
+    캐시와 평가 기록이 같은 객체를 함께 쓰므로 읽기 전용으로 다룹니다.
+    """
+
+    __slots__ = ('score', 'sentiment_label', 'positive_words', 'negative_words', 'neutral_count',
+                 'ad_styles', 'industries', 'keywords', 'conflict_type', '_pattern', '_words', '_text')
+
+    def __init__(self, score: float, sentiment_label: str, positive_words: Iterable[Sequence],
+                 negative_words: Iterable[Sequence], neutral_count: int, ad_styles: Iterable[Sequence],
+                 industries: Iterable[Sequence], keywords: Iterable[Sequence], conflict_type: Optional[str],
+                 language_pattern: Optional[Dict[str, Any]] = None, words: Optional[List[str]] = None,
+                 text: Optional[str] = None):
+        self.score = score
+        self.sentiment_label = sentiment_label
+        self.positive_words = intern_pairs(positive_words)
+        self.negative_words = intern_pairs(negative_words)
+        self.neutral_count = neutral_count
+        self.ad_styles = intern_pairs(ad_styles)
+        self.industries = intern_pairs(industries)
+        self.keywords = intern_pairs(keywords)
+        self.conflict_type = conflict_type
+        self._pattern = None
+        if language_pattern is not None:
+            self._pattern = tuple(language_pattern.get(field) for field in LANGUAGE_PATTERN_FIELDS)
+        self._words = None if words is None else ' '.join(words)
+        self._text = text
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], text: Optional[str] = None) -> SentimentResult:
+        """예전 dict 형식(JSON에서 읽은 것 포함)에서 만들기
+
+        언어 패턴이나 단어 목록이 없는 예전 기록은 text(평가한 광고 문구)가 있으면 거기서 다시 계산합니다.
+        """
+        conflict_type = (data.get('sentiment_conflict') or {}).get('conflict_type')
+        language_pattern, words = data.get('language_pattern'), data.get('words')
+        if text is None:
+            language_pattern, words = language_pattern or {}, words or ()
+        return cls(
+            data['score'], sys.intern(data['sentiment_label']),
+            data.get('positive_words', ()), data.get('negative_words', ()), data.get('neutral_count', 0),
+            data.get('ad_styles', ()), data.get('industries', ()), data.get('keywords', ()),
+            sys.intern(conflict_type) if conflict_type else None,
+            language_pattern, words, text=text
+        )
+
+    @property
+    def words(self) -> List[str]:
+        """처음 10개 단어"""
+        if self._words is None:
+            return WORD_PATTERN.findall(self._text)[:ANALYSIS_WORD_COUNT]
+        return self._words.split(' ') if self._words else []
+
+    @property
+    def total_sentiment_words(self) -> int:
+        return len(self.positive_words) + len(self.negative_words) + self.neutral_count
+
+    @property
+    def language_pattern(self) -> Dict[str, Any]:
+        if self._pattern is None:
+            return text_language_pattern(self._text)
+        return dict(zip(LANGUAGE_PATTERN_FIELDS, self._pattern))
+
+    @property
+    def has_conflict(self) -> bool:
+        return bool(self.positive_words) and bool(self.negative_words)
+
+    @property
+    def sentiment_conflict(self) -> Dict[str, Any]:
+        """detect_sentiment_conflict와 같은 형식"""
+        return {
+            'has_conflict': self.has_conflict,
+            'conflict_type': self.conflict_type,
+            'positive_strength': sum(abs(score) for _, score in self.positive_words),
+            'negative_strength': sum(abs(score) for _, score in self.negative_words)
+        }
+
+    def overrides(self, text: str) -> Tuple[Optional[List[str]], Optional[Dict[str, Any]]]:
+        """(단어 목록, 언어 패턴) 중 text에서 다시 계산한 값과 다른 것 (같으면 None, 저장 생략용)"""
+        same_text = self._text == text
+        words = None if self._words is None and same_text else self.words
+        pattern = None if self._pattern is None and same_text else self.language_pattern
+        if words is not None and words == WORD_PATTERN.findall(text)[:ANALYSIS_WORD_COUNT]:
+            words = None
+        if pattern is not None and pattern == text_language_pattern(text):
+            pattern = None
+        return words, pattern
+
+    def to_dict(self) -> Dict[str, Any]:
+        """예전 analyze_text dict 형식 (JSON 저장·출력용)"""
+        return {
+            'score': self.score,
+            'sentiment_label': self.sentiment_label,
+            'positive_words': list(self.positive_words),
+            'negative_words': list(self.negative_words),
+            'neutral_count': self.neutral_count,
+            'total_sentiment_words': self.total_sentiment_words,
+            'ad_styles': list(self.ad_styles),
+            'industries': list(self.industries),
+            'keywords': list(self.keywords),
+            'language_pattern': self.language_pattern,
+            'sentiment_conflict': self.sentiment_conflict,
+            'words': self.words
+        }
+
+    def _values(self) -> Tuple:
+        return (self.score, self.sentiment_label, self.positive_words, self.negative_words, self.neutral_count,
+                self.ad_styles, self.industries, self.keywords, self.conflict_type, self.language_pattern, self.words)
+
+    def __eq__(self, other):
+        if not isinstance(other, SentimentResult):
+            return NotImplemented
+        return self._values() == other._values()
+
+    def __repr__(self):
+        return f"SentimentResult(score={self.score!r}, sentiment_label={self.sentiment_label!r})"
+
+
+def json_default(obj):
+    """json.dump(default=...)용: SentimentResult는 예전 dict 형식으로 저장"""
+    if isinstance(obj, SentimentResult):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def compact_rating(ad: Dict) -> Dict:
+    """불러온 평가의 감성 분석 dict를 SentimentResult로 바꾸기 (제자리에서 바꾸고 그대로 반환)"""
+    analysis = ad.get('sentiment_analysis')
+    if isinstance(analysis, dict):
+        text = ad.get('ad_text')
+        ad['sentiment_analysis'] = SentimentResult.from_dict(analysis, text if isinstance(text, str) else None)
+    return ad
+
+
+class AnalysisCache:
+    """analyze_text 결과 LRU 캐시 (키: 감성사전 버전 + NFC 정규화한 문구)
+
+    메모리에는 최근 maxsize개만 두고, path를 주면 SQLite 파일에도 저장해 다음 실행에서
+    같은 문구를 다시 분석하지 않습니다. 감성사전이나 키워드 표가 바뀌면 버전이 달라지므로
+    예전 결과는 쓰이지 않습니다. 여러 스레드에서 함께 써도 됩니다.
+    """
+
+    def __init__(self, maxsize: int = ANALYSIS_CACHE_SIZE, path: Optional[str] = None):
+        self.maxsize = maxsize
+        self.path = path
+        self.entries: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._db = None
+        self._unsaved = 0
+
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS analysis_cache (
+                    version TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    result TEXT NOT NULL,
+                    PRIMARY KEY (version, text)
+                ) WITHOUT ROWID
+            """)
+
+    def _remember(self, key: Tuple[str, str], result: SentimentResult):
+        self.entries[key] = result
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, version: str, text: str) -> Optional[SentimentResult]:
+        """캐시된 결과 (메모리 → 디스크 순으로 찾고, 없으면 None)"""
+        key = (version, text)
+        with self._lock:
+            result = self.entries.get(key)
+            if result is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return result
+
+            if self._db is not None:
+                row = self._db.execute("SELECT result FROM analysis_cache WHERE version = ? AND text = ?", key).fetchone()
+                if row is not None:
+                    result = SentimentResult.from_dict(json.loads(row[0]), text)
+                    if self.maxsize > 0:
+                        self._remember(key, result)
+                    self.disk_hits += 1
+                    return result
+
+            self.misses += 1
+            return None
+
+    def put(self, version: str, text: str, result: SentimentResult):
+        """분석 결과 저장 (디스크 캐시는 모아서 커밋)"""
+        key = (version, text)
+        with self._lock:
+            if self.maxsize > 0:
+                self._remember(key, result)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO analysis_cache (version, text, result) VALUES (?, ?, ?)",
+                                 (version, text, json.dumps(result.to_dict(), ensure_ascii=False)))
+                self._unsaved += 1
+                if self._unsaved >= ANALYSIS_CACHE_COMMIT_EVERY:
+                    self._db.commit()
+                    self._unsaved = 0
+
+    def close(self):
+        """디스크 캐시에 남은 결과 커밋 후 닫기"""
+        with self._lock:
+            if self._db is not None:
+                self._db.commit()
+                self._db.close()
+                self._db = None
+
+    def stats(self) -> Dict[str, Any]:
+        """적중·실패·제거 횟수와 적중률"""
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            'size': len(self.entries),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': (self.hits + self.disk_hits) / lookups if lookups else 0.0
+        }
+
+
+# 감성 라벨·충돌 유형 번호표 (배치 경로에서 np.select 결과 번호로 고름)
+SENTIMENT_LABEL_CODES = ("중립", "매우 긍정", "긍정", "매우 부정", "부정",
+                         "혼합(양립)", "혼합(긍정우세)", "혼합(부정우세)", "혼합(균형)")
+CONFLICT_TYPE_CODES = (None, "강한혼합", "긍정우세혼합", "부정우세혼합", "균형혼합")
+
+
+class TokenIdLexicon:
+    """감성 표현마다 정수 id를 매기고 극성을 배열로 보관하는 표
+
+    id는 감성사전 표제어 순서대로 매기고, 어근 색인으로 찾은 활용형("행복했던")은
+    처음 나올 때 뒤에 덧붙입니다. 활용형은 표제어가 아니고 어근 색인 극성이 항상 같으므로
+    표현 문자열만으로 id를 정할 수 있습니다.
+    """
+
+    def __init__(self, sentiment_dict: Dict[str, int]):
+        self.ids: Dict[str, int] = {}
+        self.pairs: List[Tuple[str, int]] = []
+        self.polarities = array('b')
+        # extract_keywords와 같은 기준의 키워드 후보 (두 글자 이상, 극성 절댓값 1 이상)
+        self.keyword_flags = array('b')
+        for pair in sentiment_dict.items():
+            self.add(pair)
+
+    def add(self, pair: Tuple[str, int]) -> int:
+        term_id = len(self.pairs)
+        self.ids[pair[0]] = term_id
+        self.pairs.append(pair)
+        self.polarities.append(pair[1])
+        self.keyword_flags.append(len(pair[0]) >= 2 and abs(pair[1]) >= 1)
+        return term_id
+
+    def encode(self, hits: List[Tuple[int, int, Tuple[str, int]]]) -> List[int]:
+        """match_lexicon 결과를 id 목록으로"""
+        ids = self.ids
+        return [ids[pair[0]] if pair[0] in ids else self.add(pair) for _, _, pair in hits]
+
+    def pair(self, term_id: int) -> Tuple[str, int]:
+        """id → (표현, 극성)"""
+        return self.pairs[term_id]
+
+    def is_keyword(self, term_id: int) -> bool:
+        """extract_keywords의 키워드 후보인지"""
+        return bool(self.keyword_flags[term_id])
+
+    def polarity_array(self):
+        """id → 극성 (int8 배열, 호출 시점까지 추가된 id 포함)"""
+        return np.frombuffer(self.polarities, dtype=np.int8).copy()
+
+
+# 여러 워커 프로세스가 함께 매핑하는 컴파일된 감성사전 파일
+# 헤더: 매직, 포맷 버전, 원본 크기, 원본 mtime(ns), 원본 SHA-1, 배열 목록(JSON) 길이
+# 본문: 배열 목록 {이름: [dtype, 원소 수, 오프셋]} + 정렬된 위치에 배열 원본 바이트
+SHARED_LEXICON_SUFFIX = ".lexmap"
+SHARED_LEXICON_MAGIC = b"KNUM"
+SHARED_LEXICON_VERSION = 2
+SHARED_LEXICON_HEADER = struct.Struct("<4sIQQ20sI")
+SHARED_LEXICON_ALIGN = 64
+
+
+def _align(offset: int, alignment: int = SHARED_LEXICON_ALIGN) -> int:
+    return -(-offset // alignment) * alignment
+
+
+class SharedLexicon:
+    """여러 워커 프로세스가 읽기 전용으로 매핑해 함께 쓰는 컴파일된 감성사전
+
+    표제어·극성, 구에 쓰이는 단어 어휘, 깊이별로 펼친 구 트라이, 어근 색인을 정렬된 numpy 배열로
+    한 파일에 담습니다. 워커는 파일을 mmap해서 배열 뷰만 만들므로 JSON 파싱이나 딕셔너리 구성 없이
+    바로 분석을 시작하고, 모든 워커가 운영체제 페이지 캐시의 같은 메모리를 읽습니다.
+
+    트라이 깊이 1의 노드 번호는 어휘 번호이고, 깊이 k(≥2)의 노드는
+    (깊이 k-1 노드 × 어휘 수 + 다음 단어 번호) 정렬 키 배열의 위치입니다.
+    노드마다 그 토큰열이 표제어이면 표제어 번호, 아니면 -1을 둡니다.
+    """
+
+    def __init__(self, arrays: Dict[str, Any], path: Optional[str] = None, mapping=None):
+        self.path = path
+        self._mapping = mapping  # 배열 뷰가 가리키는 mmap (뷰보다 먼저 닫히지 않도록 보관)
+        self.terms = arrays['terms']
+        self.polarities = arrays['polarities']
+        self.vocab = arrays['vocab']
+        self.stems = arrays['stems']
+        self.stem_polarities = arrays['stem_polarities']
+        self.max_stem_length = self.stems.dtype.itemsize // 4 if len(self.stems) else 0
+
+        # 깊이별 (정렬 키, 노드별 표제어 번호), 깊이 1은 키 없이 어휘 번호가 곧 노드
+        self.levels = [(None, arrays['terms_1'])]
+        depth = 2
+        while f'keys_{depth}' in arrays:
+            self.levels.append((arrays[f'keys_{depth}'], arrays[f'terms_{depth}']))
+            depth += 1
+
+    @staticmethod
+    def compile(sentiment_dict: Dict[str, int], stem_index: Dict[str, int]) -> Dict[str, Any]:
+        """감성사전 → 공유 감성사전 배열 {이름: 배열}"""
+        term_ids = {word: i for i, word in enumerate(sentiment_dict)}
+        phrases = lexicon_phrases(sentiment_dict)
+        vocab = sorted({token for tokens in phrases for token in tokens})
+        vocab_ids = {token: i for i, token in enumerate(vocab)}
+        stems = sorted(stem_index)
+
+        arrays = {
+            'terms': np.array(list(sentiment_dict), dtype=str),
+            'polarities': np.array(list(sentiment_dict.values()), dtype=np.int8),
+            'vocab': np.array(vocab, dtype=str),
+            'stems': np.array(stems, dtype=str),
+            'stem_polarities': np.array([stem_index[stem] for stem in stems], dtype=np.int8),
+        }
+
+        # 토큰열 접두사 → 해당 깊이의 노드 번호
+        nodes = {(token,): i for token, i in vocab_ids.items()}
+        terms_1 = np.full(len(vocab), -1, dtype=np.int32)
+        for tokens, (word, _) in phrases.items():
+            if len(tokens) == 1:
+                terms_1[vocab_ids[tokens[0]]] = term_ids[word]
+        arrays['terms_1'] = terms_1
+
+        for depth in range(2, max(map(len, phrases), default=1) + 1):
+            prefixes = {tokens[:depth] for tokens in phrases if len(tokens) >= depth}
+            keyed = sorted((nodes[prefix[:-1]] * len(vocab) + vocab_ids[prefix[-1]], prefix) for prefix in prefixes)
+            level_terms = np.full(len(keyed), -1, dtype=np.int32)
+            for node, (_, prefix) in enumerate(keyed):
+                nodes[prefix] = node
+                if prefix in phrases:
+                    level_terms[node] = term_ids[phrases[prefix][0]]
+            arrays[f'keys_{depth}'] = np.array([key for key, _ in keyed], dtype=np.int64)
+            arrays[f'terms_{depth}'] = level_terms
+        return arrays
+
+    @staticmethod
+    def write(path: str, source_path: str, arrays: Dict[str, Any]):
+        """배열을 공유 감성사전 파일로 저장 (임시 파일에 쓴 뒤 교체, 실패하면 OSError)"""
+        directory, blobs, offset = {}, [], 0
+        for name, values in arrays.items():
+            values = np.ascontiguousarray(values)
+            offset = _align(offset)
+            directory[name] = [values.dtype.str, len(values), offset]
+            blobs.append((offset, values.tobytes()))
+            offset += values.nbytes
+        data_size = offset
+        directory_blob = json.dumps(directory).encode('utf-8')
+
+        stat = os.stat(source_path)
+        header = SHARED_LEXICON_HEADER.pack(
+            SHARED_LEXICON_MAGIC, SHARED_LEXICON_VERSION,
+            stat.st_size, stat.st_mtime_ns, _file_sha1(source_path), len(directory_blob)
+        )
+        data_start = _align(len(header) + len(directory_blob))
+
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(header)
+                f.write(directory_blob)
+                for offset, blob in blobs:
+                    f.seek(data_start + offset)
+                    f.write(blob)
+                f.truncate(data_start + data_size)
+            os.replace(tmp_path, path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(tmp_path)
+            raise
+
+    @staticmethod
+    def _read_header(mapping, source_path: str) -> Optional[int]:
+        """헤더가 맞고 원본 감성사전과 같으면 배열 목록 길이, 아니면 None"""
+        magic, version, size, mtime_ns, digest, directory_len = SHARED_LEXICON_HEADER.unpack_from(mapping)
+        if magic != SHARED_LEXICON_MAGIC or version != SHARED_LEXICON_VERSION:
+            return None
+
+        # 크기/mtime이 다르면 내용 해시로 한 번 더 확인 (컴파일된 감성사전 캐시와 같은 기준)
+        stat = os.stat(source_path)
+        if (size, mtime_ns) != (stat.st_size, stat.st_mtime_ns):
+            if size != stat.st_size or digest != _file_sha1(source_path):
+                return None
+        return directory_len
+
+    @classmethod
+    def open(cls, path: str, source_path: str) -> Optional[SharedLexicon]:
+        """공유 감성사전 파일을 읽기 전용으로 매핑 (없거나 원본보다 오래되었으면 None)"""
+        try:
+            with open(path, 'rb') as f:
+                mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+
+        try:
+            directory_len = cls._read_header(mapping, source_path)
+            if directory_len is None:
+                mapping.close()
+                return None
+            start = SHARED_LEXICON_HEADER.size
+            directory = json.loads(mapping[start:start + directory_len].decode('utf-8'))
+            data_start = _align(start + directory_len)
+            arrays = {name: np.frombuffer(mapping, dtype=dtype, count=count, offset=data_start + offset)
+                      for name, (dtype, count, offset) in directory.items()}
+            return cls(arrays, path, mapping)
+        except (OSError, ValueError, KeyError, TypeError, struct.error):
+            mapping.close()
+            return None
+
+    @classmethod
+    def publish(cls, path: str, source_path: str, sentiment_dict: Dict[str, int],
+                stem_index: Dict[str, int]) -> Optional[str]:
+        """원본과 맞는 공유 감성사전 파일이 있게 하고 경로 반환 (만들 수 없으면 None)"""
+        shared = cls.open(path, source_path)
+        if shared is not None:
+            shared.close()
+            return path
+        try:
+            cls.write(path, source_path, cls.compile(sentiment_dict, stem_index))
+        except OSError:
+            # 읽기 전용 디렉토리 등: 워커가 각자 감성사전을 로드
+            return None
+        return path
+
+    def close(self):
+        """매핑 해제 (이후 배열은 사용할 수 없음)"""
+        self.terms = self.polarities = self.vocab = self.stems = self.stem_polarities = None
+        self.levels = []
+        if self._mapping is not None:
+            with contextlib.suppress(BufferError):
+                self._mapping.close()
+            self._mapping = None
+
+    def encode_batch(self, word_lists: List[List[str]], token_ids: SharedTokenIds) -> List[List[int]]:
+        """문구별 단어 목록 → 감성 표현 id 목록 (match_lexicon + TokenIdLexicon.encode와 같은 매칭)
+
+        배치 전체 단어를 어휘 번호로 바꾼 뒤 깊이마다 (노드, 다음 단어) 키를 searchsorted로 찾아
+        모든 구 매칭을 구하고, 가장 긴 매칭을 고른 뒤 남은 단어는 어근 접두사로 조회합니다.
+        """
+        counts = np.fromiter(map(len, word_lists), dtype=np.int64, count=len(word_lists))
+        bounds = np.cumsum(counts)
+        total = int(bounds[-1]) if len(bounds) else 0
+        if not total:
+            return [[] for _ in word_lists]
+        words = np.array(list(itertools.chain.from_iterable(word_lists)), dtype=str)
+        text_ends = np.repeat(bounds, counts)  # 단어가 속한 문구의 끝 (구가 문구 경계를 넘지 않도록)
+
+        # 어휘 번호 (구에 쓰이지 않는 단어는 -1)
+        vocab = self.vocab
+        if len(vocab):
+            found = np.minimum(np.searchsorted(vocab, words), len(vocab) - 1)
+            tokens = np.where(vocab[found] == words, found, -1)
+        else:
+            tokens = np.full(total, -1, dtype=np.int64)
+
+        # 깊이별 트라이 확장: 깊이마다 (시작 위치, 노드)를 한 단어씩 늘리며 표제어 노드를 모음
+        starts = np.flatnonzero(tokens >= 0)
+        nodes = tokens[starts]
+        hit_starts, hit_lengths, hit_terms = [], [], []
+        for depth, (keys, level_terms) in enumerate(self.levels, 1):
+            if depth > 1:
+                following = starts + depth - 1
+                inside = following < text_ends[starts]
+                starts, nodes, following = starts[inside], nodes[inside], tokens[following[inside]]
+                key = nodes * len(vocab) + following
+                found = np.minimum(np.searchsorted(keys, key), len(keys) - 1)
+                matched = (following >= 0) & (keys[found] == key)
+                starts, nodes = starts[matched], found[matched]
+            if not len(starts):
+                break
+            terms = level_terms[nodes]
+            is_term = terms >= 0
+            hit_starts.append(starts[is_term])
+            hit_lengths.append(np.full(int(is_term.sum()), depth, dtype=np.int64))
+            hit_terms.append(terms[is_term])
+
+        # 겹치는 매칭 중 왼쪽부터 가장 긴 것만 (PhraseMatcher.select_longest와 같은 규칙)
+        positions, ids = [], []
+        covered = np.zeros(total, dtype=bool)
+        if hit_starts:
+            hit_starts = np.concatenate(hit_starts)
+            hit_lengths = np.concatenate(hit_lengths)
+            hit_terms = np.concatenate(hit_terms)
+            order = np.lexsort((-hit_lengths, hit_starts))
+            covered_end = 0
+            for start, length, term_id in zip(hit_starts[order].tolist(), hit_lengths[order].tolist(),
+                                              hit_terms[order].tolist()):
+                if start >= covered_end:
+                    positions.append(start)
+                    ids.append(term_id)
+                    covered_end = start + length
+                    covered[start:covered_end] = True
+
+        # 사전에 없는 활용형은 가장 긴 어근 접두사로 보완 (lookup_stem과 같은 규칙)
+        rest = np.flatnonzero(~covered)
+        if len(rest) and len(self.stems):
+            candidates = words[rest]
+            stem_found = np.full(len(rest), -1, dtype=np.int64)
+            for length in range(self.max_stem_length, MIN_STEM_LENGTH - 1, -1):
+                pending = np.flatnonzero(stem_found < 0)
+                if not len(pending):
+                    break
+                prefixes = candidates[pending].astype(f'<U{length}')
+                found = np.minimum(np.searchsorted(self.stems, prefixes), len(self.stems) - 1)
+                matched = np.flatnonzero(self.stems[found] == prefixes)
+                if len(matched):
+                    # 어근 뒤 나머지가 어미·조사인 것만 인정
+                    ending_ok = np.fromiter((word[length:] in STEM_ENDINGS
+                                             for word in candidates[pending[matched]].tolist()),
+                                            dtype=bool, count=len(matched))
+                    matched = matched[ending_ok]
+                    stem_found[pending[matched]] = found[matched]
+            resolved = stem_found >= 0
+            positions.extend(rest[resolved].tolist())
+            ids.extend(token_ids.stem_id(word, polarity) for word, polarity in
+                       zip(candidates[resolved].tolist(), self.stem_polarities[stem_found[resolved]].tolist()))
+
+        # 위치 순으로 정렬해 문구 경계에서 자름
+        positions = np.array(positions, dtype=np.int64)
+        order = np.argsort(positions, kind='stable')
+        ids = np.array(ids, dtype=np.int64)[order].tolist()
+        cuts = np.searchsorted(positions[order], bounds).tolist()
+        return [ids[begin:end] for begin, end in zip([0] + cuts, cuts)]
+
+
+class SharedTokenIds(TokenIdLexicon):
+    """공유 감성사전 위의 감성 표현 id 표
+
+    표제어 id는 공유 배열의 표제어 번호를 그대로 쓰고, 어근 색인으로 찾은 활용형만
+    이 프로세스에서 표제어 수 뒤에 덧붙입니다. (표현, 극성) 튜플은 쓰인 표제어만 만듭니다.
+    """
+
+    def __init__(self, shared: SharedLexicon):
+        super().__init__({})
+        self.shared = shared
+        self.base = len(shared.terms)
+        self._term_pairs: Dict[int, Tuple[str, int]] = {}
+
+    def add(self, pair: Tuple[str, int]) -> int:
+        term_id = self.base + len(self.pairs)
+        self.ids[pair[0]] = term_id
+        self.pairs.append(pair)
+        self.polarities.append(pair[1])
+        self.keyword_flags.append(len(pair[0]) >= 2 and abs(pair[1]) >= 1)
+        return term_id
+
+    def stem_id(self, word: str, polarity: int) -> int:
+        """어근 색인으로 찾은 활용형의 id"""
+        term_id = self.ids.get(word)
+        return term_id if term_id is not None else self.add(intern_pair((word, polarity)))
+
+    def pair(self, term_id: int) -> Tuple[str, int]:
+        if term_id >= self.base:
+            return self.pairs[term_id - self.base]
+        pair = self._term_pairs.get(term_id)
+        if pair is None:
+            pair = intern_pair((str(self.shared.terms[term_id]), int(self.shared.polarities[term_id])))
+            self._term_pairs[term_id] = pair
+        return pair
+
+    def is_keyword(self, term_id: int) -> bool:
+        if term_id >= self.base:
+            return bool(self.keyword_flags[term_id - self.base])
+        word, polarity = self.pair(term_id)
+        return len(word) >= 2 and abs(polarity) >= 1
+
+    def polarity_array(self):
+        return np.concatenate((self.shared.polarities, np.frombuffer(self.polarities, dtype=np.int8)))
+
+
 class AdvancedSentimentAnalyzer:
     """KNU 한국어 감성사전 기반 감성 분석기"""
 
-    def __init__(self, senti_dict_path="SentiWord_info.json"):
+    def __init__(self, senti_dict_path="SentiWord_info.json", keywords_path="ad_keywords.json", quiet=False,
+                 cache_size: int = 0, cache_path: Optional[str] = None,
+                 shared_lexicon: Optional[SharedLexicon] = None):
+        # quiet: 로딩 스피너와 완료 메시지 생략 (메뉴를 그리는 동안 백그라운드에서 로드할 때)
+        self.quiet = quiet
+        # shared_lexicon: 매핑한 공유 감성사전 (주면 감성사전을 따로 로드하지 않음, 병렬 분석 워커용)
+        self.shared_lexicon = shared_lexicon
         self.sentiment_dict = {}
+        self.word_roots = {}
+        self.stem_index = {}
+        self._max_stem_length = 0
+        self._phrase_matcher = None
+        self._lexicon_version = None
+        self._token_ids = None
 
         # 현재 스크립트 디렉토리 기준으로 경로 설정
         script_dir = os.path.dirname(os.path.abspath(__file__))
         full_path = os.path.join(script_dir, senti_dict_path)
 
-        self.load_sentiment_dict(full_path)
-
-        # 광고 스타일 키워드 사전 (확장)
-        self.style_keywords = {
-            '유머형': ['ㅋ', 'ㅎ', '웃', '재미', '유머', '우습', '깔깔', '하하'],
-            '감성형': ['마음', '사랑', '행복', '따뜻', '소중', '감동', '추억', '함께', '가족', '일상', '순간'],
-            '정보형': ['새로운', '최초', '기술', '혁신', '특허', '개발', '성분', '효과', '과학'],
-            '긴급형': ['지금', '오늘', '한정', '마지막', '서둘', '빨리', '곧', '즉시', '바로'],
-            '프리미엄형': ['프리미엄', '럭셔리', '고급', '명품', '최고급', '특별', '한정판', '격'],
-            '실용형': ['편리', '간편', '실용', '유용', '효율', '절약', '알뜸', '가성비', '쉽', '빠른'],
-            '도전형': ['도전', '극복', '성취', '꿈', '목표', '열정', '성공', '이루', '시작', '변화'],
-            '언어유희형': ['친구', '팀', '국룰', '케미', '통역'],
-            '건강웰빙형': ['건강', '피로', '상처', '통증', '영양', '케어'],
-            '라이프형': ['스타일', '삶', '생활', '디자인', '취향', '나답', '매일'],
-            '혁신기술형': ['AI', '혁신', '미래', '성장', '발전', '진화', '스마트']
-        }
+        self.senti_dict_file = full_path
+        if shared_lexicon is None:
+            self.load_sentiment_dict(full_path)
 
-        # 산업군 키워드 사전
-        self.industry_keywords = {
-            '기술IT': ['AI', '기술', '혁신', '앱', '데이터', '전자', '스마트', '디지털'],
-            '패션뷰티': ['스타일', '패션', '옷', '뷰티', '화장', '피부'],
-            '식품음료': ['맛', '먹', '음식', '커피', '술', '음료', '식품'],
-            '건강의료': ['건강', '의료', '치료', '약', '병원', '운동', '다이어트'],
-            '금융서비스': ['은행', '카드', '보험', '금융', '투자', '적립'],
-            '여행레저': ['여행', '휴가', '레저', '관광', '호텔', '항공'],
-            '자동차': ['차', '자동차', '운전', '엔진', '주행'],
-            '가전홈': ['가전', '집', '홈', '가구', '생활', '청소']
-        }
+        # 스타일·산업군 키워드 사전 (외부 설정 파일)
+        self.style_keywords = {}
+        self.industry_keywords = {}
+        self.keywords_file = os.path.join(script_dir, keywords_path)
+        self.load_keyword_tables(self.keywords_file)
+
+        # 분석 결과 캐시 (cache_size나 cache_path를 주었을 때만)
+        self.cache = None
+        if cache_size or cache_path:
+            self.enable_cache(cache_size, cache_path)
+
+    def load_keyword_tables(self, filepath):
+        """스타일·산업군 키워드 사전 로드 후 분류기 컴파일"""
+        if not os.path.exists(filepath):
+            console.print(f"[yellow]⚠️  키워드 사전 파일({filepath})을 찾을 수 없습니다.[/yellow]")
+            console.print("[yellow]광고 스타일/산업군 분류가 비활성화됩니다.[/yellow]")
+        else:
+            try:
+                with open(filepath, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.style_keywords = data.get('style_keywords', {})
+                self.industry_keywords = data.get('industry_keywords', {})
+            except Exception as e:
+                console.print(f"[red]⚠️  키워드 사전 로드 실패: {e}[/red]")
+
+        self.rebuild_classifier()
+
+    def rebuild_classifier(self):
+        """키워드 표를 바꾼 뒤 분류기 다시 컴파일"""
+        self._lexicon_version = None
+        self.classifier = KeywordClassifier({
+            'ad_styles': self.style_keywords,
+            'industries': self.industry_keywords
+        })
 
     def load_sentiment_dict(self, filepath):
-        """감성사전 로드"""
+        """감성사전 로드 (컴파일된 캐시가 있으면 우선 사용)"""
         if not os.path.exists(filepath):
             console.print(f"[yellow]⚠️  감성사전 파일({filepath})을 찾을 수 없습니다.[/yellow]")
             console.print("[yellow]감성 분석 기능이 비활성화됩니다.[/yellow]")
             return
 
         try:
-            with console.status("[bold green]감성사전 로딩 중...", spinner="dots"):
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
+            status = contextlib.nullcontext() if self.quiet else console.status("[bold green]감성사전 로딩 중...", spinner="dots")
+            with status:
+                cache_path = os.path.splitext(filepath)[0] + LEXICON_CACHE_SUFFIX
+                cached = read_lexicon_cache(cache_path, filepath)
+
+                if cached is not None:
+                    self.sentiment_dict, self.word_roots, self.stem_index = cached
+                else:
+                    with open(filepath, 'r', encoding='utf-8') as f:
+                        data = json.load(f)
+
+                    # 단어: 극성 매핑, 단어: 어근 매핑
+                    for item in data:
+                        word = item['word']
+                        polarity = int(item['polarity'])
+                        self.sentiment_dict[word] = polarity
+                        self.word_roots[word] = item.get('word_root', word)
 
-                # 단어: 극성 매핑
-                for item in data:
-                    word = item['word']
-                    polarity = int(item['polarity'])
-                    self.sentiment_dict[word] = polarity
+                    # 활용형 조회를 위한 어근 색인
+                    self.stem_index = build_stem_index(self.sentiment_dict, self.word_roots)
 
-            console.print(f"[green]✅ 감성사전 로드 완료: {len(self.sentiment_dict):,}개 단어[/green]")
+                    write_lexicon_cache(cache_path, filepath, self.sentiment_dict, self.word_roots, self.stem_index)
+
+                self._max_stem_length = max(map(len, self.stem_index), default=0)
+
+            if not self.quiet:
+                console.print(f"[green]✅ 감성사전 로드 완료: {len(self.sentiment_dict):,}개 단어[/green]")
         except Exception as e:
             console.print(f"[red]⚠️  감성사전 로드 실패: {e}[/red]")
 
+    def enable_cache(self, maxsize: int = ANALYSIS_CACHE_SIZE, path: Optional[str] = None) -> AnalysisCache:
+        """analyze_text 앞에 LRU 캐시 두기 (path를 주면 SQLite 디스크 캐시도 사용)"""
+        self.cache = AnalysisCache(maxsize, path)
+        return self.cache
+
+    @property
+    def has_lexicon(self) -> bool:
+        """감성사전을 쓸 수 있는지 (직접 로드했거나 공유 감성사전을 매핑함)"""
+        return bool(self.sentiment_dict) or self.shared_lexicon is not None
+
+    def publish_shared_lexicon(self) -> Optional[str]:
+        """병렬 분석 워커가 매핑할 공유 감성사전 파일 경로 (필요하면 새로 컴파일, 만들 수 없으면 None)"""
+        if self.shared_lexicon is not None:
+            return self.shared_lexicon.path
+        if not self.sentiment_dict:
+            return None
+        path = os.path.splitext(self.senti_dict_file)[0] + SHARED_LEXICON_SUFFIX
+        return SharedLexicon.publish(path, self.senti_dict_file, self.sentiment_dict, self.stem_index)
+
+    @property
+    def lexicon_version(self) -> str:
+        """분석 결과를 좌우하는 입력(감성사전 파일, 키워드 표, 분석 규칙 버전)의 해시"""
+        if self._lexicon_version is None:
+            digest = hashlib.sha1(f"v{ANALYSIS_VERSION}".encode('utf-8'))
+            if os.path.exists(self.senti_dict_file):
+                digest.update(_file_sha1(self.senti_dict_file))
+            digest.update(json.dumps([self.style_keywords, self.industry_keywords], ensure_ascii=False).encode('utf-8'))
+            self._lexicon_version = digest.hexdigest()[:16]
+        return self._lexicon_version
+
     def extract_words(self, text: str) -> List[str]:
         """텍스트에서 단어 추출 (한글, 영어)"""
-        return re.findall(r'[가-힣]+|[a-zA-Z]+', text)
+        return WORD_PATTERN.findall(text)
+
+    def lookup_stem(self, word: str) -> Optional[int]:
+        """활용형 단어의 극성을 가장 긴 어근 접두사로 조회 (나머지가 STEM_ENDINGS일 때만, 단어 길이에 비례)"""
+        for length in range(min(len(word), self._max_stem_length), MIN_STEM_LENGTH - 1, -1):
+            if word[length:] not in STEM_ENDINGS:
+                continue
+            polarity = self.stem_index.get(word[:length])
+            if polarity is not None:
+                return polarity
+        return None
+
+    def lookup_polarity(self, word: str) -> Optional[int]:
+        """단어 극성 조회 (정확히 일치하는 표제어 우선, 없으면 어근 색인)"""
+        polarity = self.sentiment_dict.get(word)
+        if polarity is None:
+            polarity = self.lookup_stem(word)
+        return polarity
+
+    @property
+    def phrase_matcher(self) -> PhraseMatcher:
+        """감성사전 전체(단어 + 다어절 구)로 만든 매처 (처음 사용할 때 구성)"""
+        if self._phrase_matcher is None:
+            self._phrase_matcher = PhraseMatcher(lexicon_phrases(self.sentiment_dict))
+        return self._phrase_matcher
 
     def classify_ad_style(self, text: str) -> List[Tuple[str, int]]:
         """광고 스타일 자동 분류"""
-        style_scores = {}
-
-        for style, keywords in self.style_keywords.items():
-            score = sum(1 for keyword in keywords if keyword in text)
-            if score > 0:
-                style_scores[style] = score
-
-        # 점수 순으로 정렬
-        sorted_styles = sorted(style_scores.items(), key=lambda x: x[1], reverse=True)
-        return sorted_styles if sorted_styles else [('기타', 0)]
+        return self.classifier.classify(text)['ad_styles']
 
     def classify_industry(self, text: str) -> List[Tuple[str, int]]:
         """산업군 자동 분류"""
-        industry_scores = {}
-
-        for industry, keywords in self.industry_keywords.items():
-            score = sum(1 for keyword in keywords if keyword in text)
-            if score > 0:
-                industry_scores[industry] = score
-
-        # 점수 순으로 정렬
-        sorted_industries = sorted(industry_scores.items(), key=lambda x: x[1], reverse=True)
-        return sorted_industries if sorted_industries else [('기타', 0)]
+        return self.classifier.classify(text)['industries']
 
     def extract_keywords(self, words: List[str], top_n: int = 5) -> List[Tuple[str, int]]:
         """감성 키워드 추출"""
         keyword_scores = {}
 
         for word in words:
-            if word in self.sentiment_dict and len(word) >= 2:
-                score = abs(self.sentiment_dict[word])
+            polarity = self.lookup_polarity(word) if len(word) >= 2 else None
+            if polarity is not None:
+                score = abs(polarity)
                 if score >= 1:  # 극성이 강한 단어만
-                    keyword_scores[word] = self.sentiment_dict[word]
+                    keyword_scores[word] = polarity
 
         # 극성 강도 순으로 정렬
         sorted_keywords = sorted(keyword_scores.items(), key=lambda x: abs(x[1]), reverse=True)
@@ -126,14 +1138,7 @@ class AdvancedSentimentAnalyzer:
 
     def analyze_language_pattern(self, text: str) -> Dict:
         """언어 패턴 분석"""
-        return {
-            'length': len(text),
-            'word_count': len(re.findall(r'[가-힣]+', text)),
-            'has_question': '?' in text,
-            'has_exclamation': '!' in text,
-            'has_emoji': bool(re.search(r'[ㅋㅎ😀-🙏]+', text)),
-            'sentence_count': len(re.split(r'[.!?]', text.strip()))
-        }
+        return text_language_pattern(text)
 
     def detect_sentiment_conflict(self, positive_words: List[Tuple], negative_words: List[Tuple]) -> Dict:
         """감성 충돌 감지 및 분석"""
@@ -165,36 +1170,80 @@ class AdvancedSentimentAnalyzer:
             'negative_strength': neg_strength
         }
 
-    def analyze_text(self, text: str) -> Dict:
+    def match_lexicon(self, words: List[str]) -> List[Tuple[int, int, Tuple[str, int]]]:
+        """단어 목록에서 감성 단어·구 찾기 (시작, 끝, (표현, 극성)), 위치 순"""
+        # 단어·구 매칭 (겹치면 가장 긴 구 우선)
+        hits = PhraseMatcher.select_longest(self.phrase_matcher.find_all(words))
+
+        # 사전에 없는 활용형은 어근 색인으로 보완 ("행복했던" → "행복")
+        covered = set()
+        for start, end, _ in hits:
+            covered.update(range(start, end))
+        for i, word in enumerate(words):
+            if i not in covered:
+                polarity = self.lookup_stem(word)
+                if polarity is not None:
+                    hits.append((i, i + 1, (word, polarity)))
+        hits.sort()
+        return hits
+
+    def analyze_text(self, text: str) -> Optional[SentimentResult]:
         """
-        종합 텍스트 감성 분석
+        종합 텍스트 감성 분석 (캐시가 있으면 같은 문구는 다시 분석하지 않음)
         """
-        if not self.sentiment_dict:
+        if not self.has_lexicon:
             return None
+        if self.cache is None:
+            # 캐시가 없어도 캐시 경로와 같은 결과가 되도록 NFC 정규화
+            return self._analyze_uncached(unicodedata.normalize('NFC', text))
+
+        text, result = self._cache_lookup(text)
+        if result is None:
+            result = self._analyze_uncached(text)
+            self.cache.put(self.lexicon_version, text, result)
+        return result
+
+    def _cache_lookup(self, text: str) -> Tuple[str, Optional[SentimentResult]]:
+        """(NFC 정규화한 문구, 캐시된 결과 또는 None)"""
+        text = unicodedata.normalize('NFC', text)
+        return text, self.cache.get(self.lexicon_version, text)
+
+    def _analyze_uncached(self, text: str) -> SentimentResult:
+        """캐시를 거치지 않는 분석 본체"""
+        if self.shared_lexicon is not None:
+            # 공유 감성사전에는 구 매처가 없으므로 배치 경로로 분석
+            return self._analyze_batch_uncached([text])[0]
 
         # 단어 추출
         words = self.extract_words(text)
 
+        # 감성사전 매칭
+        hits = self.match_lexicon(words)
+
+        matched_terms = [term for _, _, (term, _) in hits]
+
         scores = []
         positive_words = []
         negative_words = []
         neutral_count = 0
 
-        for word in words:
-            if word in self.sentiment_dict:
-                score = self.sentiment_dict[word]
-                scores.append(score)
-
-                if score >= 1:
-                    positive_words.append((word, score))
-                elif score <= -1:
-                    negative_words.append((word, score))
-                else:
-                    neutral_count += 1
+        for _, _, pair in hits:
+            score = pair[1]
+            scores.append(score)
+
+            if score >= 1:
+                positive_words.append(pair)
+            elif score <= -1:
+                negative_words.append(pair)
+            else:
+                neutral_count += 1
 
         # 평균 점수 계산
         avg_score = sum(scores) / len(scores) if scores else 0
 
+        # 스타일·산업군 분류 (한 번의 스캔)
+        classification = self.classifier.classify(text)
+
         # 감성 충돌 감지
         conflict_info = self.detect_sentiment_conflict(positive_words, negative_words)
 
@@ -223,46 +1272,1545 @@ class AdvancedSentimentAnalyzer:
             else:
                 label = "중립"
 
-        return {
-            'score': round(avg_score, 2),
-            'sentiment_label': label,
-            'positive_words': positive_words,
-            'negative_words': negative_words,
-            'neutral_count': neutral_count,
-            'total_sentiment_words': len(scores),
-            'ad_styles': self.classify_ad_style(text),
-            'industries': self.classify_industry(text),
-            'keywords': self.extract_keywords(words),
-            'language_pattern': self.analyze_language_pattern(text),
-            'sentiment_conflict': conflict_info,
-            'words': words[:10]  # 처음 10개 단어만 저장
+        return SentimentResult(
+            score=round(avg_score, 2),
+            sentiment_label=label,
+            positive_words=positive_words,
+            negative_words=negative_words,
+            neutral_count=neutral_count,
+            ad_styles=classification['ad_styles'],
+            industries=classification['industries'],
+            keywords=self.extract_keywords(matched_terms),
+            conflict_type=conflict_info['conflict_type'],
+            language_pattern=self.analyze_language_pattern(text),
+            words=words[:ANALYSIS_WORD_COUNT]  # 처음 10개 단어만 저장
+        )
+
+    @property
+    def token_ids(self) -> TokenIdLexicon:
+        """감성 표현 id 표 (처음 사용할 때 구성)"""
+        if self._token_ids is None:
+            if self.shared_lexicon is not None:
+                self._token_ids = SharedTokenIds(self.shared_lexicon)
+            else:
+                self._token_ids = TokenIdLexicon(self.sentiment_dict)
+        return self._token_ids
+
+    def analyze_batch(self, texts: Sequence[str]) -> List[Optional[SentimentResult]]:
+        """여러 텍스트를 한 번에 분석 (결과는 analyze_text와 필드 단위로 같음)
+
+        캐시가 있으면 캐시에 없는 문구만 분석합니다.
+        """
+        if not self.has_lexicon:
+            return [None] * len(texts)
+        if self.cache is None:
+            return self._analyze_batch_uncached([unicodedata.normalize('NFC', text) for text in texts])
+
+        results, missing = [], []
+        for i, text in enumerate(texts):
+            text, result = self._cache_lookup(text)
+            results.append(result)
+            if result is None:
+                missing.append((i, text))
+        for (i, text), result in zip(missing, self._analyze_batch_uncached([text for _, text in missing])):
+            self.cache.put(self.lexicon_version, text, result)
+            results[i] = result
+        return results
+
+    def _analyze_batch_uncached(self, texts: List[str]) -> List[SentimentResult]:
+        """배치 분석 본체: 문구를 감성 표현 id 배열로 바꾼 뒤 점수·개수·라벨을 벡터 연산으로 계산
+
+        단어·구 매칭과 스타일·산업군 분류는 문구마다 하고, 배치 전체 id를 이어 붙인 배열에서
+        극성 gather, 긍정/부정 마스크, 문구 번호 bincount로 집계합니다.
+        """
+        if not texts:
+            return []
+        token_ids = self.token_ids
+
+        # 문구마다 단어 추출 → 감성 표현 id (배치 전체를 한 배열로 이어 붙임)
+        word_lists = [self.extract_words(text) for text in texts]
+        if self.shared_lexicon is not None:
+            id_lists = self.shared_lexicon.encode_batch(word_lists, token_ids)
+        else:
+            id_lists = [token_ids.encode(self.match_lexicon(words)) for words in word_lists]
+
+        n = len(texts)
+        lengths = np.fromiter(map(len, id_lists), dtype=np.int64, count=n)
+        ids = np.fromiter(itertools.chain.from_iterable(id_lists), dtype=np.int64, count=int(lengths.sum()))
+        segments = np.repeat(np.arange(n), lengths)
+
+        polarities = token_ids.polarity_array()[ids].astype(np.int64)
+        positive = polarities >= 1
+        negative = polarities <= -1
+
+        totals = np.bincount(segments, weights=polarities, minlength=n)
+        pos_counts = np.bincount(segments[positive], minlength=n)
+        neg_counts = np.bincount(segments[negative], minlength=n)
+        pos_strengths = np.bincount(segments[positive], weights=polarities[positive], minlength=n).astype(np.int64)
+        neg_strengths = -np.bincount(segments[negative], weights=polarities[negative], minlength=n).astype(np.int64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            averages = np.where(lengths > 0, totals / lengths, 0.0)
+
+        # 감성 충돌 유형과 라벨 (detect_sentiment_conflict, analyze_text와 같은 규칙)
+        has_conflict = (pos_counts >= 1) & (neg_counts >= 1)
+        strong = has_conflict & (pos_counts >= 2) & (neg_counts >= 2)
+        pos_dominant = has_conflict & ~strong & (pos_strengths > neg_strengths * 1.5)
+        neg_dominant = has_conflict & ~strong & ~pos_dominant & (neg_strengths > pos_strengths * 1.5)
+        conflict_codes = np.select([strong, pos_dominant, neg_dominant, has_conflict], [1, 2, 3, 4], default=0)
+        label_codes = np.select(
+            [has_conflict, averages >= 1.5, averages >= 0.5, averages <= -1.5, averages <= -0.5],
+            [conflict_codes + 4, 1, 2, 3, 4], default=0)
+
+        # 문구별 긍정/부정 표현 목록은 이어 붙인 id 목록을 문구 경계에서 잘라 만듦
+        # (문구마다 반복하는 부분은 numpy 스칼라 대신 파이썬 리스트로 바꿔서 접근)
+        pos_ids = ids[positive].tolist()
+        neg_ids = ids[negative].tolist()
+        pos_ends = np.cumsum(pos_counts).tolist()
+        neg_ends = np.cumsum(neg_counts).tolist()
+        lengths = lengths.tolist()
+        averages = averages.tolist()
+        conflict_codes = conflict_codes.tolist()
+        label_codes = label_codes.tolist()
+
+        pair, is_keyword = token_ids.pair, token_ids.is_keyword
+        results = []
+        pos_start = neg_start = 0
+        for i, text in enumerate(texts):
+            classification = self.classifier.classify(text)
+
+            # extract_keywords와 같은 순서: 처음 나온 순서대로 모은 뒤 극성 강도 순 (안정 정렬)
+            keyword_scores = dict(pair(term_id) for term_id in id_lists[i] if is_keyword(term_id))
+            keywords = sorted(keyword_scores.items(), key=lambda x: abs(x[1]), reverse=True)[:5]
+
+            count = lengths[i]
+            positive_words = [pair(term_id) for term_id in pos_ids[pos_start:pos_ends[i]]]
+            negative_words = [pair(term_id) for term_id in neg_ids[neg_start:neg_ends[i]]]
+            pos_start, neg_start = pos_ends[i], neg_ends[i]
+
+            results.append(SentimentResult(
+                score=round(averages[i], 2) if count else 0,
+                sentiment_label=SENTIMENT_LABEL_CODES[label_codes[i]],
+                positive_words=positive_words,
+                negative_words=negative_words,
+                neutral_count=count - len(positive_words) - len(negative_words),
+                ad_styles=classification['ad_styles'],
+                industries=classification['industries'],
+                keywords=keywords,
+                conflict_type=CONFLICT_TYPE_CODES[conflict_codes[i]],
+                language_pattern=self.analyze_language_pattern(text),
+                words=word_lists[i][:ANALYSIS_WORD_COUNT]
+            ))
+        return results
+
+    def iter_analyze_many(self, texts: Iterable[str], workers: Optional[int] = None,
+                          chunksize: int = 64) -> Iterator[Optional[SentimentResult]]:
+        """여러 텍스트를 프로세스 풀로 분석해 입력 순서대로 하나씩 반환 (스트리밍)
+
+        workers가 1이면 현재 프로세스에서 분석합니다. 입력은 청크 단위로 읽어
+        워커 수의 두 배만큼만 미리 제출하므로 입력 크기와 무관하게 메모리가 제한됩니다.
+        """
+        workers = workers or os.cpu_count() or 1
+        if workers == 1:
+            for chunk in _chunked(texts, chunksize):
+                yield from self.analyze_batch(chunk)
+            return
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_analysis_worker,
+                                 initargs=self.worker_initargs()) as pool:
+            pending = deque()
+            for chunk in _chunked(texts, chunksize):
+                pending.append(self._submit_chunk(pool, chunk))
+                if len(pending) >= workers * 2:
+                    yield from self._collect_chunk(*pending.popleft())
+
+            while pending:
+                yield from self._collect_chunk(*pending.popleft())
+
+    def worker_initargs(self) -> Tuple:
+        """병렬 분석 워커 초기화 인자 (_init_analysis_worker)
+
+        감성사전은 공유 파일로 한 번만 컴파일하고 워커는 매핑만 합니다 (워커 수만큼 로드·복사하지 않음).
+        """
+        return (self.senti_dict_file, self.keywords_file, self.style_keywords, self.industry_keywords,
+                self.publish_shared_lexicon())
+
+    def _submit_chunk(self, pool, chunk: List[str]):
+        """캐시에 없는 문구만 워커에 제출: (청크 결과 자리, 분석할 (위치, 문구) 목록, future)"""
+        if self.cache is None or not self.has_lexicon:
+            return [None] * len(chunk), list(enumerate(chunk)), pool.submit(_analyze_chunk, chunk)
+
+        results, missing = [], []
+        for i, text in enumerate(chunk):
+            text, result = self._cache_lookup(text)
+            results.append(result)
+            if result is None:
+                missing.append((i, text))
+        future = pool.submit(_analyze_chunk, [text for _, text in missing]) if missing else None
+        return results, missing, future
+
+    def _collect_chunk(self, results: List[Optional[SentimentResult]], missing: List[Tuple[int, str]],
+                       future) -> List[Optional[SentimentResult]]:
+        """워커 결과를 청크 자리에 채우고 캐시에 저장"""
+        if future is not None:
+            for (i, text), result in zip(missing, future.result()):
+                if self.cache is not None and result is not None:
+                    self.cache.put(self.lexicon_version, text, result)
+                results[i] = result
+        return results
+
+    def analyze_many(self, texts: Iterable[str], workers: Optional[int] = None,
+                     chunksize: int = 64) -> List[Optional[SentimentResult]]:
+        """여러 텍스트 일괄 분석 (결과는 입력 순서대로)"""
+        return list(self.iter_analyze_many(texts, workers=workers, chunksize=chunksize))
+
+
+# 병렬 분석 워커 프로세스의 분석기 (워커마다 시작할 때 한 번만 로드)
+_worker_analyzer = None
+
+
+def _chunked(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """이터러블을 size개씩 묶어서 반환"""
+    iterator = iter(items)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _init_analysis_worker(senti_dict_file, keywords_file, style_keywords, industry_keywords,
+                          shared_lexicon_file=None):
+    """워커 프로세스 초기화: 공유 감성사전을 매핑 (없으면 감성사전 로드), 키워드 표는 한 번만 로드"""
+    global _worker_analyzer
+    console.quiet = True
+    shared = SharedLexicon.open(shared_lexicon_file, senti_dict_file) if shared_lexicon_file else None
+    _worker_analyzer = AdvancedSentimentAnalyzer(senti_dict_file, keywords_file, shared_lexicon=shared)
+    _worker_analyzer.style_keywords = style_keywords
+    _worker_analyzer.industry_keywords = industry_keywords
+    _worker_analyzer.rebuild_classifier()
+
+
+def _analyze_chunk(texts: List[str]) -> List[Optional[SentimentResult]]:
+    """워커 프로세스에서 텍스트 묶음 분석"""
+    return _worker_analyzer.analyze_batch(texts)
+
+
+# 평가 기록 저널 (ad_data.json 옆에 추가 전용으로 기록)
+JOURNAL_SUFFIX = ".journal.jsonl"
+
+# 저장소가 기억하는 기록 보기 (필터·정렬 조합) 수
+HISTORY_VIEW_CACHE_SIZE = 8
+
+# 평가 기록 보기 한 페이지의 행 수
+HISTORY_PAGE_SIZE = 20
+
+# SQLite 평가 저장소 (이 파일이 있으면 JSON 대신 사용)
+SQLITE_SUFFIX = ".sqlite3"
+
+# 평가 기록 스냅샷(ad_data.json) 형식
+# v1: 평가 dict의 JSON 배열 (들여쓰기, 불러올 때 원본을 .v1.bak으로 남기고 v2로 자동 변환)
+# v2: JSON Lines (머리글 줄 + 심볼 정의 줄 + 평가 줄)
+SNAPSHOT_FORMAT = "ad_ratings"
+SNAPSHOT_VERSION = 2
+SNAPSHOT_V1_BACKUP_SUFFIX = ".v1.bak"
+
+# v2 평가 줄에 담는 평가 dict의 키 (다른 키가 있는 평가는 dict 그대로 한 줄로 저장)
+SNAPSHOT_RECORD_KEYS = ('ad_text', 'overall_rating', 'sentiment_analysis', 'timestamp')
+
+# v2 분석 필드 수: 점수, 라벨, 충돌 유형, 긍정, 부정, 중립 수, 스타일, 산업군, 키워드, 단어 목록, 언어 패턴
+SNAPSHOT_ANALYSIS_FIELDS = 11
+
+
+def rating_group_key(ad: Dict, field: str) -> Optional[str]:
+    """취향 리포트 집계 기준 값 (감성 라벨 또는 주 스타일), 감성 분석이 없으면 None"""
+    analysis = ad.get("sentiment_analysis")
+    if not analysis:
+        return None
+    if field == 'sentiment_label':
+        return analysis.sentiment_label
+    if analysis.ad_styles:
+        return analysis.ad_styles[0][0]
+    return None
+
+
+# 평가 집계 캐시 (ad_data.json 옆에 저장, 시작할 때 전체 기록을 다시 훑지 않도록)
+AGGREGATES_SUFFIX = ".aggregates.json"
+AGGREGATES_VERSION = 1
+
+
+class RatingAggregates:
+    """평가 집계: 평점 분포, 감성 라벨/주 스타일별 (개수, 합, 제곱합), 최고·최저 평점 위치
+
+    평가 하나가 추가될 때마다 O(1)로 갱신되며, 취향 리포트는 이 값만 읽습니다.
+    파일에는 반영한 평가 수와 마지막 평가의 지문이 함께 저장되어, 기록과 어긋나면
+    (다른 프로그램이 기록을 바꾼 경우 등) 전체 기록으로 한 번 다시 계산합니다.
+    """
+
+    GROUP_FIELDS = ('sentiment_label', 'main_style')
+
+    def __init__(self, path: str):
+        self.path = path
+        self.count = 0
+        self.total = 0
+        self.total_sq = 0
+        self.histogram: Dict[int, int] = {}
+        # 값별 [개수, 평점 합, 평점 제곱합] (처음 나온 순서 유지)
+        self.groups: Dict[str, Dict[str, List[int]]] = {field: {} for field in self.GROUP_FIELDS}
+        # 최고 평점 중 먼저 평가한 것, 최저 평점 중 나중에 평가한 것의 위치
+        self.best: Optional[Tuple[int, int]] = None
+        self.worst: Optional[Tuple[int, int]] = None
+        self.last_fingerprint = ""
+
+    @staticmethod
+    def fingerprint(ad: Dict) -> str:
+        """평가 하나의 지문 (집계 파일이 기록과 맞는지 확인용)"""
+        key = f"{ad.get('ad_text', '')}\0{ad.get('overall_rating')}\0{ad.get('timestamp', '')}"
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+
+    def add(self, ad: Dict):
+        """평가 하나 반영 (O(1))"""
+        self.add_values(ad['overall_rating'], rating_group_key(ad, 'sentiment_label'),
+                        rating_group_key(ad, 'main_style'), self.fingerprint(ad))
+
+    def add_values(self, rating: int, sentiment_label: Optional[str], main_style: Optional[str], fingerprint: str):
+        index = self.count
+        self.count += 1
+        self.total += rating
+        self.total_sq += rating * rating
+        self.histogram[rating] = self.histogram.get(rating, 0) + 1
+
+        for field, key in (('sentiment_label', sentiment_label), ('main_style', main_style)):
+            if key is not None:
+                stats = self.groups[field].setdefault(key, [0, 0, 0])
+                stats[0] += 1
+                stats[1] += rating
+                stats[2] += rating * rating
+
+        if self.best is None or rating > self.best[0]:
+            self.best = (rating, index)
+        if self.worst is None or rating <= self.worst[0]:
+            self.worst = (rating, index)
+        self.last_fingerprint = fingerprint
+
+    def matches(self, count: int, last_fingerprint: str) -> bool:
+        """저장된 집계가 현재 기록(평가 수, 마지막 평가 지문)과 맞는지"""
+        return self.count == count and self.last_fingerprint == (last_fingerprint if count else "")
+
+    def count_at_least(self, min_rating: int) -> int:
+        return sum(n for rating, n in self.histogram.items() if rating >= min_rating)
+
+    def average(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def group_stats(self, field: str) -> List[Tuple[str, float, int]]:
+        """값별 (값, 평균 평점, 평가 수), 평균 높은 순 (동점이면 먼저 나온 값)"""
+        stats = [(key, total / n, n) for key, (n, total, _) in self.groups[field].items()]
+        return sorted(stats, key=lambda x: x[1], reverse=True)
+
+    def group_stddev(self, field: str, key: str) -> float:
+        """값별 평점 표준편차 (제곱합으로 계산)"""
+        n, total, total_sq = self.groups[field][key]
+        return math.sqrt(max(0.0, total_sq / n - (total / n) ** 2))
+
+    def load(self) -> bool:
+        """집계 파일 읽기 (없거나 형식이 다르면 False)"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != AGGREGATES_VERSION:
+                return False
+            self.count, self.total, self.total_sq = data['count'], data['total'], data['total_sq']
+            self.histogram = {int(rating): n for rating, n in data['histogram'].items()}
+            self.groups = {field: {key: list(stats) for key, stats in data['groups'][field]}
+                           for field in self.GROUP_FIELDS}
+            self.best = tuple(data['best']) if data['best'] else None
+            self.worst = tuple(data['worst']) if data['worst'] else None
+            self.last_fingerprint = data['last_fingerprint']
+            return True
+        except (OSError, ValueError, KeyError, TypeError):
+            self.__init__(self.path)
+            return False
+
+    def save(self):
+        """집계 파일 저장 (임시 파일에 쓴 뒤 교체, 실패해도 다음 시작 때 다시 계산하면 됨)"""
+        data = {
+            'version': AGGREGATES_VERSION,
+            'count': self.count,
+            'total': self.total,
+            'total_sq': self.total_sq,
+            'histogram': self.histogram,
+            # 처음 나온 순서를 보존하도록 목록으로 저장
+            'groups': {field: list(groups.items()) for field, groups in self.groups.items()},
+            'best': self.best,
+            'worst': self.worst,
+            'last_fingerprint': self.last_fingerprint
         }
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass
+
+
+def iter_json_array(f, chunk_size: int = 1 << 16) -> Iterator[Any]:
+    """JSON 배열 파일을 원소 하나씩 읽기 (문서 전체를 한 번에 파싱하지 않음)"""
+    decoder = json.JSONDecoder()
+    buffer, pos, eof = '', 0, False
+
+    def fill():
+        nonlocal buffer, pos, eof
+        chunk = f.read(chunk_size)
+        buffer, pos, eof = buffer[pos:] + chunk, 0, not chunk
+
+    fill()
+    buffer = buffer.lstrip()
+    if not buffer.startswith('['):
+        raise ValueError("목록 형식이 아닙니다")
+    pos = 1
+    while True:
+        # 원소 사이의 공백과 쉼표 건너뛰기
+        while True:
+            while pos < len(buffer) and (buffer[pos] == ',' or buffer[pos].isspace()):
+                pos += 1
+            if pos < len(buffer) or eof:
+                break
+            fill()
+        if pos >= len(buffer):
+            raise ValueError("배열이 닫히지 않았습니다")
+        if buffer[pos] == ']':
+            return
 
+        try:
+            value, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            fill()
+            continue
+        # 값 바로 뒤가 구분자가 아니면 (버퍼 끝에서 숫자 등이 잘린 경우) 더 읽고 다시 해석
+        if not eof and (end == len(buffer) or buffer[end] not in ', \t\r\n]'):
+            fill()
+            continue
+        pos = end
+        yield value
+
+
+class RatingSnapshotCodec:
+    """평가 기록 v2 줄 인코더/디코더 (읽기와 쓰기에 각각 새 인스턴스 사용)
+
+    감성 라벨·충돌 유형 문자열과 (표현, 극성)·(분류, 점수) 쌍은 파일에서 처음 나올 때
+    {"symbols": [...]} 줄로 한 번만 정의하고, 평가 줄에서는 정의된 순서의 번호로 가리킵니다.
+    평가 줄은 [문구, 평점, 시각, 분석]이며 분석은 SNAPSHOT_ANALYSIS_FIELDS 순서의 목록입니다.
+    단어 목록과 언어 패턴은 문구에서 다시 계산한 값과 다를 때만, 감성 단어 수와 충돌 강도는
+    저장하지 않습니다. 한 줄씩 읽고 쓰므로 파일 전체를 한 번에 메모리에 올리지 않습니다.
+    """
 
-class AdPreferenceAnalyzer:
     def __init__(self):
+        self.symbols: List[Any] = []
+        self.ids: Dict[Any, int] = {}
+        self._new_symbols: List[Any] = []
+
+    @staticmethod
+    def header() -> str:
+        return json.dumps({'format': SNAPSHOT_FORMAT, 'version': SNAPSHOT_VERSION}) + '\n'
+
+    def _symbol(self, value) -> int:
+        symbol_id = self.ids.get(value)
+        if symbol_id is None:
+            symbol_id = self.ids[value] = len(self.symbols)
+            self.symbols.append(value)
+            self._new_symbols.append(value)
+        return symbol_id
+
+    def _encode_analysis(self, text: str, analysis: SentimentResult) -> List[Any]:
+        symbol = self._symbol
+        words, pattern = analysis.overrides(text)
+        fields = [
+            analysis.score,
+            symbol(analysis.sentiment_label),
+            None if analysis.conflict_type is None else symbol(analysis.conflict_type),
+            [symbol(pair) for pair in analysis.positive_words],
+            [symbol(pair) for pair in analysis.negative_words],
+            analysis.neutral_count,
+            [symbol(pair) for pair in analysis.ad_styles],
+            [symbol(pair) for pair in analysis.industries],
+            [symbol(pair) for pair in analysis.keywords],
+            words,
+            None if pattern is None else [pattern[field] for field in LANGUAGE_PATTERN_FIELDS]
+        ]
+        # 다시 계산하는 끝 필드는 생략
+        while fields[-1] is None:
+            fields.pop()
+        return fields
+
+    def encode(self, ad: Dict) -> str:
+        """평가 하나를 v2 줄로 (새 심볼이 있으면 정의 줄이 앞에 붙음)"""
+        analysis = ad.get('sentiment_analysis')
+        if len(ad) == len(SNAPSHOT_RECORD_KEYS) and all(key in ad for key in SNAPSHOT_RECORD_KEYS) \
+                and (analysis is None or isinstance(analysis, SentimentResult)):
+            text = ad['ad_text']
+            encoded = None if analysis is None else self._encode_analysis(text, analysis)
+            entry = [text, ad['overall_rating'], ad['timestamp'], encoded]
+        else:
+            entry = {'ad': ad}
+
+        line = json.dumps(entry, ensure_ascii=False, separators=(',', ':'), default=json_default) + '\n'
+        if self._new_symbols:
+            line = json.dumps({'symbols': self._new_symbols}, ensure_ascii=False, separators=(',', ':')) + '\n' + line
+            self._new_symbols = []
+        return line
+
+    def decode(self, entry: Any) -> Optional[Dict]:
+        """v2 줄 하나를 평가 dict로 (심볼 정의 줄이면 표에 추가하고 None)"""
+        if isinstance(entry, dict):
+            if 'symbols' in entry:
+                self.symbols.extend(intern_pair(value) if isinstance(value, list) else sys.intern(value)
+                                    for value in entry['symbols'])
+                return None
+            return compact_rating(entry['ad'])
+
+        text, rating, timestamp, fields = entry
+        analysis = None
+        if fields is not None:
+            symbols = self.symbols
+            fields = fields + [None] * (SNAPSHOT_ANALYSIS_FIELDS - len(fields))
+            score, label, conflict, positive, negative, neutral, styles, industries, keywords, words, pattern = fields
+            analysis = SentimentResult(
+                score, symbols[label],
+                [symbols[i] for i in positive], [symbols[i] for i in negative], neutral,
+                [symbols[i] for i in styles], [symbols[i] for i in industries], [symbols[i] for i in keywords],
+                None if conflict is None else symbols[conflict],
+                None if pattern is None else dict(zip(LANGUAGE_PATTERN_FIELDS, pattern)), words,
+                text=text
+            )
+        return {'ad_text': text, 'overall_rating': rating, 'sentiment_analysis': analysis, 'timestamp': timestamp}
+
+    @classmethod
+    def read(cls, f) -> Iterator[Dict]:
+        """v2 파일에서 평가를 하나씩 읽기"""
+        header = json.loads(f.readline())
+        if not isinstance(header, dict) or header.get('format') != SNAPSHOT_FORMAT:
+            raise ValueError("평가 기록 형식이 아닙니다")
+        if header.get('version') != SNAPSHOT_VERSION:
+            raise ValueError(f"지원하지 않는 평가 기록 버전입니다: {header.get('version')}")
+
+        codec = cls()
+        for line in f:
+            if line.strip():
+                ad = codec.decode(json.loads(line))
+                if ad is not None:
+                    yield ad
+
+    @classmethod
+    def write(cls, f, ads: Iterable[Dict]):
+        """평가를 하나씩 v2로 쓰기"""
+        codec = cls()
+        f.write(cls.header())
+        for ad in ads:
+            f.write(codec.encode(ad))
+
+
+class RatingJournal:
+    """평가 기록 저장소: 스냅샷(ad_data.json) + 추가 전용 저널(JSON Lines)
+
+    평가 하나는 저널에 한 줄로 추가(fsync)되고, 시작할 때 스냅샷 뒤에 재생됩니다.
+    저널 항목에는 전체 기록에서의 위치(index)가 함께 기록되므로, 압축 도중 중단되어
+    이미 스냅샷에 들어간 항목이 저널에 남아 있어도 두 번 적용되지 않습니다.
+    """
+
+    def __init__(self, snapshot_path: str):
+        self.snapshot_path = snapshot_path
+        self.journal_path = os.path.splitext(snapshot_path)[0] + JOURNAL_SUFFIX
+        self.ads: List[Dict] = []
+        # history_rows 조회 캐시: ((필터, 정렬) 조건 -> (반영한 기록 수, 조건에 맞는 위치 목록)), 최근 것부터 유지
+        self._view_cache: OrderedDict[Tuple, Tuple[int, List[int]]] = OrderedDict()
+        self.aggregates = RatingAggregates(os.path.splitext(snapshot_path)[0] + AGGREGATES_SUFFIX)
+
+    def load(self) -> List[Dict]:
+        """스냅샷을 읽고 저널을 재생해 전체 기록 복원"""
+        ads = self._load_snapshot()
+        self._replay_journal(ads)
+        self.ads = ads
+        self._view_cache.clear()
+        self._load_aggregates()
+        return ads
+
+    def _load_aggregates(self):
+        """저장된 집계를 읽고, 기록과 맞지 않으면 메모리의 기록으로 다시 계산"""
+        last = RatingAggregates.fingerprint(self.ads[-1]) if self.ads else ""
+        if self.aggregates.load() and self.aggregates.matches(len(self.ads), last):
+            return
+        self.aggregates = RatingAggregates(self.aggregates.path)
+        for ad in self.ads:
+            self.aggregates.add(ad)
+        self.aggregates.save()
+
+    def _load_snapshot(self) -> List[Dict]:
+        """스냅샷 읽기 (손상된 파일은 덮어쓰지 않도록 옆으로 옮겨 둠)"""
+        if not os.path.exists(self.snapshot_path):
+            return []
+
+        try:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                # 비어 있거나 공백뿐이면 빈 기록, v1(JSON 배열)이면 v2로 변환
+                first = f.read(1)
+                while first.isspace():
+                    first = f.read(1)
+                if not first:
+                    return []
+                if first != '[':
+                    f.seek(0)
+                    return list(RatingSnapshotCodec.read(f))
+            return self._migrate_snapshot()
+        except (OSError, ValueError, TypeError, KeyError, IndexError) as e:
+            error = e
+
+        backup_path = f"{self.snapshot_path}.corrupt-{datetime.now():%Y%m%d%H%M%S}"
+        try:
+            os.replace(self.snapshot_path, backup_path)
+        except OSError:
+            backup_path = self.snapshot_path
+        console.print(f"[red]⚠️ 평가 기록 파일을 읽을 수 없습니다: {error}[/red]")
+        console.print(f"[yellow]   원본은 {backup_path}에 보존했습니다. 저널에 남은 평가만 복원합니다.[/yellow]")
+        return []
+
+    def _migrate_snapshot(self) -> List[Dict]:
+        """v1 스냅샷을 원소 하나씩 읽어 v2로 다시 쓰기 (원본은 .v1.bak으로 복사, 쓸 수 없는 위치면 읽기만)"""
+        old_size = os.path.getsize(self.snapshot_path)
+        ads = []
+        with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+            for ad in iter_json_array(f):
+                if not isinstance(ad, dict):
+                    raise ValueError("평가 항목이 객체가 아닙니다")
+                ads.append(compact_rating(ad))
+
+        # 변환은 되돌릴 수 없으므로 (파생 필드는 다시 계산) 원본을 먼저 복사해 둠
+        backup_path = self.snapshot_path + SNAPSHOT_V1_BACKUP_SUFFIX
+        try:
+            shutil.copy2(self.snapshot_path, backup_path)
+            self._write_snapshot(ads)
+        except OSError:
+            return ads
+        console.print(f"[dim]평가 기록을 새 형식(v{SNAPSHOT_VERSION})으로 변환했습니다: "
+                      f"{old_size:,} → {os.path.getsize(self.snapshot_path):,} bytes (원본: {backup_path})[/dim]")
+        return ads
+
+    def _write_snapshot(self, ads: Iterable[Dict]):
+        """스냅샷을 v2로 원자적으로 저장 (임시 파일에 쓴 뒤 교체)"""
+        tmp_path = f"{self.snapshot_path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                RatingSnapshotCodec.write(f, ads)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _replay_journal(self, ads: List[Dict]):
+        """저널 재생 (스냅샷에 이미 있는 항목은 건너뛰고, 끊긴 마지막 줄은 잘라냄)"""
+        if not os.path.exists(self.journal_path):
+            return
+
+        offset = 0
+        good_end = 0
+        skipped = 0
+        with open(self.journal_path, 'rb') as f:
+            for line in f:
+                offset += len(line)
+                try:
+                    entry = json.loads(line)
+                    index, ad = entry['index'], entry['ad']
+                except (ValueError, KeyError, TypeError):
+                    skipped += 1
+                    continue
+
+                good_end = offset
+                if index >= len(ads):
+                    ads.append(compact_rating(ad))
+
+        # 기록 도중 중단되어 끝에 남은 불완전한 줄 제거 (다음 추가가 이어 붙지 않도록)
+        if good_end < offset:
+            with open(self.journal_path, 'r+b') as f:
+                f.truncate(good_end)
+        if skipped:
+            console.print(f"[yellow]⚠️ 평가 저널에서 읽을 수 없는 줄 {skipped}개를 건너뛰었습니다.[/yellow]")
+
+    def append(self, ad: Dict):
+        """평가 하나를 저널에 추가 (O(1), fsync로 디스크 기록 보장)"""
+        line = json.dumps({'index': len(self.ads), 'ad': ad}, ensure_ascii=False, default=json_default) + '\n'
+        with open(self.journal_path, 'a', encoding='utf-8') as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+        self.ads.append(ad)
+        self.aggregates.add(ad)
+        self.aggregates.save()
+
+    def compact(self):
+        """전체 기록을 스냅샷으로 원자적으로 저장하고 저널 비우기"""
+        self._write_snapshot(self.ads)
+
+        # 여기서 중단되어도 저널 항목은 index로 걸러지므로 중복 적용되지 않음
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+
+    def get(self, index: int) -> Dict:
+        """index번째 평가"""
+        return self.ads[index]
+
+    def count(self, min_rating: Optional[int] = None) -> int:
+        """평가 수 (min_rating 이상만 셀 수 있음)"""
+        if min_rating is None:
+            return len(self.ads)
+        return self.aggregates.count_at_least(min_rating)
+
+    def average_rating(self) -> float:
+        """전체 평균 평점"""
+        return self.aggregates.average()
+
+    def texts(self, min_rating: Optional[int] = None) -> List[str]:
+        """광고 문구 목록 (기록 순서, min_rating 이상만 고를 수 있음)"""
+        return [ad['ad_text'] for ad in self.ads if min_rating is None or ad['overall_rating'] >= min_rating]
+
+    def group_stats(self, field: str) -> List[Tuple[str, float, int]]:
+        """감성 라벨/주 스타일별 (값, 평균 평점, 평가 수), 평균 높은 순"""
+        return self.aggregates.group_stats(field)
+
+    def _view(self, min_rating: Optional[int], sentiment_label: Optional[str], sort: str, descending: bool) -> List[int]:
+        """조건에 맞는 기록 위치 목록 (같은 조건이면 캐시, 기록 순 보기는 새 평가만 이어 붙임)"""
+        key = ((min_rating, sentiment_label), (sort, descending))
+
+        def matches(ad):
+            return ((min_rating is None or ad['overall_rating'] >= min_rating)
+                    and (sentiment_label is None or rating_group_key(ad, 'sentiment_label') == sentiment_label))
+
+        cached = self._view_cache.get(key)
+        if cached is not None:
+            seen, positions = cached
+            self._view_cache.move_to_end(key)
+            if seen == len(self.ads):
+                return positions
+            if sort == 'index' and not descending:
+                positions.extend(i for i in range(seen, len(self.ads)) if matches(self.ads[i]))
+                self._view_cache[key] = (len(self.ads), positions)
+                return positions
+
+        positions = [i for i, ad in enumerate(self.ads) if matches(ad)]
+        if sort == 'rating':
+            # 평점이 같으면 기록 순
+            positions.sort(key=lambda i: (-self.ads[i]['overall_rating'] if descending else self.ads[i]['overall_rating'], i))
+        elif descending:
+            positions.reverse()
+        self._view_cache[key] = (len(self.ads), positions)
+        self._view_cache.move_to_end(key)
+        while len(self._view_cache) > HISTORY_VIEW_CACHE_SIZE:
+            self._view_cache.popitem(last=False)
+        return positions
+
+    def count_matching(self, min_rating: Optional[int] = None, sentiment_label: Optional[str] = None) -> int:
+        """평점·감성 라벨 조건에 맞는 평가 수 (같은 필터로 만든 보기가 있으면 정렬과 관계없이 그 길이)"""
+        filters = (min_rating, sentiment_label)
+        for (view_filters, _), (seen, positions) in self._view_cache.items():
+            if view_filters == filters and seen == len(self.ads):
+                return len(positions)
+        return len(self._view(min_rating, sentiment_label, 'index', False))
+
+    def history_rows(self, offset: int, limit: int, min_rating: Optional[int] = None,
+                     sentiment_label: Optional[str] = None, sort: str = 'index',
+                     descending: bool = False) -> List[Tuple[int, str, int, Optional[str]]]:
+        """기록 한 페이지 (번호, 광고 문구, 평점, 감성 라벨), sort는 'index'(기록 순) 또는 'rating'"""
+        positions = self._view(min_rating, sentiment_label, sort, descending)[offset:offset + limit]
+        return [
+            (i + 1, self.ads[i]['ad_text'], self.ads[i]['overall_rating'], rating_group_key(self.ads[i], 'sentiment_label'))
+            for i in positions
+        ]
+
+    def best_and_worst(self) -> Tuple[Optional[Dict], Optional[Dict]]:
+        """최고 평점 광고(먼저 평가한 것)와 최저 평점 광고(나중에 평가한 것)"""
+        if not self.ads:
+            return None, None
+        return self.ads[self.aggregates.best[1]], self.ads[self.aggregates.worst[1]]
+
+
+class SQLiteRatingStore:
+    """SQLite 평가 저장소: 평점·감성 라벨·주 스타일·시각 인덱스로 리포트를 집계 쿼리로 계산
+
+    전체 기록(ads)은 유사 광고 검색처럼 실제로 필요할 때 처음 한 번만 불러옵니다.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS ratings (
+            id INTEGER PRIMARY KEY,
+            ad_text TEXT NOT NULL,
+            overall_rating INTEGER NOT NULL,
+            sentiment_label TEXT,
+            main_style TEXT,
+            timestamp TEXT,
+            record TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_ratings_rating ON ratings(overall_rating);
+        CREATE INDEX IF NOT EXISTS idx_ratings_sentiment ON ratings(sentiment_label, overall_rating);
+        CREATE INDEX IF NOT EXISTS idx_ratings_style ON ratings(main_style, overall_rating);
+        CREATE INDEX IF NOT EXISTS idx_ratings_timestamp ON ratings(timestamp);
+    """
+
+    # group_stats에서 허용하는 집계 기준 컬럼
+    GROUP_FIELDS = ('sentiment_label', 'main_style')
+
+    def __init__(self, db_path: str, aggregates_path: Optional[str] = None):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript(self.SCHEMA)
+        self._ads: Optional[List[Dict]] = None
+        self.aggregates = RatingAggregates(aggregates_path or os.path.splitext(db_path)[0] + AGGREGATES_SUFFIX)
+        self._load_aggregates()
+
+    def _load_aggregates(self):
+        """저장된 집계를 읽고, 기록과 맞지 않으면 평점·라벨 컬럼만 읽어 다시 계산"""
+        # id는 1부터 빠짐없이 늘어나므로 MAX(id)가 평가 수 (COUNT(*)와 달리 전체를 훑지 않음)
+        count = self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM ratings").fetchone()[0]
+        last = self.conn.execute("SELECT record FROM ratings ORDER BY id DESC LIMIT 1").fetchone()
+        last_fingerprint = RatingAggregates.fingerprint(json.loads(last[0])) if last else ""
+        if self.aggregates.load() and self.aggregates.matches(count, last_fingerprint):
+            return
+
+        self.aggregates = RatingAggregates(self.aggregates.path)
+        rows = self.conn.execute("SELECT overall_rating, sentiment_label, main_style FROM ratings ORDER BY id")
+        for rating, sentiment_label, main_style in rows:
+            self.aggregates.add_values(rating, sentiment_label, main_style, "")
+        self.aggregates.last_fingerprint = last_fingerprint
+        self.aggregates.save()
+
+    @staticmethod
+    def _row(ad: Dict) -> Tuple:
+        return (
+            ad['ad_text'], ad['overall_rating'],
+            rating_group_key(ad, 'sentiment_label'), rating_group_key(ad, 'main_style'),
+            ad.get('timestamp'), json.dumps(ad, ensure_ascii=False, default=json_default)
+        )
+
+    def import_ads(self, ads: Iterable[Dict]):
+        """여러 평가를 한 트랜잭션으로 추가 (마이그레이션용)"""
+        def rows():
+            for ad in ads:
+                self.aggregates.add(ad)
+                yield self._row(ad)
+
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO ratings (ad_text, overall_rating, sentiment_label, main_style, timestamp, record) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows()
+            )
+        self.aggregates.save()
+
+    @property
+    def ads(self) -> List[Dict]:
+        """전체 기록 (처음 접근할 때 불러와서 캐시)"""
+        if self._ads is None:
+            rows = self.conn.execute("SELECT record FROM ratings ORDER BY id")
+            self._ads = [compact_rating(json.loads(record)) for record, in rows]
+        return self._ads
+
+    def append(self, ad: Dict):
+        """평가 하나 추가 (행 하나 INSERT)"""
+        self.import_ads([ad])
+        if self._ads is not None:
+            self._ads.append(ad)
+
+    def compact(self):
+        """SQLite는 매 평가가 바로 커밋되므로 파일 공간만 정리"""
+        self.conn.execute("VACUUM")
+
+    def get(self, index: int) -> Dict:
+        """index번째 평가 (전체 기록을 불러오지 않고 한 행만 읽음, id는 1부터 빠짐없이 증가)"""
+        if self._ads is not None:
+            return self._ads[index]
+        row = self.conn.execute("SELECT record FROM ratings WHERE id = ?", (index + 1,)).fetchone()
+        if row is None:
+            raise IndexError(index)
+        return compact_rating(json.loads(row[0]))
+
+    def count(self, min_rating: Optional[int] = None) -> int:
+        """평가 수 (min_rating 이상만 셀 수 있음)"""
+        if min_rating is None:
+            return self.aggregates.count
+        return self.aggregates.count_at_least(min_rating)
+
+    def average_rating(self) -> float:
+        """전체 평균 평점"""
+        return self.aggregates.average()
+
+    def texts(self, min_rating: Optional[int] = None) -> List[str]:
+        """광고 문구 목록 (기록 순서, min_rating 이상만 고를 수 있음)"""
+        rows = self.conn.execute(
+            "SELECT ad_text FROM ratings WHERE overall_rating >= ? ORDER BY id",
+            (min_rating if min_rating is not None else -1,)
+        )
+        return [text for text, in rows]
+
+    def group_stats(self, field: str) -> List[Tuple[str, float, int]]:
+        """감성 라벨/주 스타일별 (값, 평균 평점, 평가 수), 평균 높은 순 (동점이면 먼저 나온 값)"""
+        if field not in self.GROUP_FIELDS:
+            raise ValueError(f"지원하지 않는 집계 기준: {field}")
+        return self.aggregates.group_stats(field)
+
+    @staticmethod
+    def _history_filter(min_rating: Optional[int], sentiment_label: Optional[str]) -> Tuple[str, List]:
+        clauses, params = [], []
+        if min_rating is not None:
+            clauses.append("overall_rating >= ?")
+            params.append(min_rating)
+        if sentiment_label is not None:
+            clauses.append("sentiment_label = ?")
+            params.append(sentiment_label)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def count_matching(self, min_rating: Optional[int] = None, sentiment_label: Optional[str] = None) -> int:
+        """평점·감성 라벨 조건에 맞는 평가 수"""
+        where, params = self._history_filter(min_rating, sentiment_label)
+        return self.conn.execute(f"SELECT COUNT(*) FROM ratings{where}", params).fetchone()[0]
+
+    def history_rows(self, offset: int, limit: int, min_rating: Optional[int] = None,
+                     sentiment_label: Optional[str] = None, sort: str = 'index',
+                     descending: bool = False) -> List[Tuple[int, str, int, Optional[str]]]:
+        """기록 한 페이지 (번호, 광고 문구, 평점, 감성 라벨), 필터·정렬·페이지 나누기를 쿼리에서 처리"""
+        where, params = self._history_filter(min_rating, sentiment_label)
+        direction = "DESC" if descending else ""
+        order = f"overall_rating {direction}, id" if sort == 'rating' else f"id {direction}"
+        rows = self.conn.execute(
+            f"SELECT id, ad_text, overall_rating, sentiment_label FROM ratings{where} "
+            f"ORDER BY {order} LIMIT ? OFFSET ?",
+            params + [limit, offset]
+        )
+        return rows.fetchall()
+
+    def best_and_worst(self) -> Tuple[Optional[Dict], Optional[Dict]]:
+        """최고 평점 광고(먼저 평가한 것)와 최저 평점 광고(나중에 평가한 것)"""
+        if not self.aggregates.count:
+            return None, None
+        return self.get(self.aggregates.best[1]), self.get(self.aggregates.worst[1])
+
+
+def open_rating_store(data_file: str):
+    """평가 저장소 열기 (ad_data.sqlite3가 있으면 SQLite, 없으면 JSON 스냅샷 + 저널)"""
+    sqlite_path = os.path.splitext(data_file)[0] + SQLITE_SUFFIX
+    if os.path.exists(sqlite_path):
+        return SQLiteRatingStore(sqlite_path)
+
+    store = RatingJournal(data_file)
+    store.load()
+    return store
+
+
+def migrate_to_sqlite(data_file: str) -> int:
+    """ad_data.json(+저널)을 SQLite 저장소로 옮기기, 옮긴 평가 수 반환
+
+    원본 JSON 파일은 그대로 두며, 이후에는 SQLite 파일이 우선 사용됩니다.
+    """
+    sqlite_path = os.path.splitext(data_file)[0] + SQLITE_SUFFIX
+    if os.path.exists(sqlite_path):
+        raise FileExistsError(f"이미 SQLite 저장소가 있습니다: {sqlite_path}")
+
+    journal = RatingJournal(data_file)
+    ads = journal.load()
+
+    # 임시 파일에 만든 뒤 교체 (중간에 실패해도 반쯤 만들어진 DB가 남지 않도록)
+    tmp_path = f"{sqlite_path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    store = SQLiteRatingStore(tmp_path, aggregates_path=os.path.splitext(sqlite_path)[0] + AGGREGATES_SUFFIX)
+    store.import_ads(ads)
+    store.conn.close()
+    os.replace(tmp_path, sqlite_path)
+    return len(ads)
+
+
+def _rating_pair(ad: Any) -> Tuple[str, int]:
+    """평가 항목 하나를 (광고 문구, 평점)으로 (평가 기록 형식이 아니면 ValueError)"""
+    if not isinstance(ad, dict) or not isinstance(ad.get('ad_text'), str) \
+            or not isinstance(ad.get('overall_rating'), int) or isinstance(ad['overall_rating'], bool):
+        raise ValueError("ad_text·overall_rating이 있는 평가 항목이 아닙니다")
+    return ad['ad_text'], ad['overall_rating']
+
+
+def read_rating_history(data_file: str) -> List[Tuple[str, int]]:
+    """평가 기록을 읽기 전용으로 (광고 문구, 평점) 목록으로 읽기
+
+    open_rating_store와 달리 파일을 전혀 바꾸지 않습니다 (v1 → v2 변환, 저널 정리,
+    집계 파일 저장, 손상 파일 격리 없음). 평가 기록 형식이 아니면 ValueError.
+    """
+    sqlite_path = os.path.splitext(data_file)[0] + SQLITE_SUFFIX
+    if os.path.exists(sqlite_path):
+        uri = f"file:{urllib.parse.quote(os.path.abspath(sqlite_path))}?mode=ro"
+        with contextlib.closing(sqlite3.connect(uri, uri=True)) as conn:
+            return [(text, rating) for text, rating in
+                    conn.execute("SELECT ad_text, overall_rating FROM ratings ORDER BY id")]
+
+    with open(data_file, 'r', encoding='utf-8') as f:
+        first = f.read(1)
+        while first.isspace():
+            first = f.read(1)
+        f.seek(0)
+        if not first:
+            ads = []
+        elif first == '[':
+            ads = iter_json_array(f)
+        else:
+            # v2 머리글이 없는 JSON 객체 등은 평가 기록이 아님
+            try:
+                header = json.loads(f.readline())
+            except ValueError:
+                header = None
+            if not isinstance(header, dict) or header.get('format') != SNAPSHOT_FORMAT:
+                raise ValueError("평가 기록 파일이 아닙니다")
+            f.seek(0)
+            ads = RatingSnapshotCodec.read(f)
+        pairs = [_rating_pair(ad) for ad in ads]
+
+    # 저널 재생 (스냅샷에 이미 있는 항목과 읽을 수 없는 줄은 건너뜀)
+    journal_path = os.path.splitext(data_file)[0] + JOURNAL_SUFFIX
+    if os.path.exists(journal_path):
+        with open(journal_path, 'rb') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    if entry['index'] >= len(pairs):
+                        pairs.append(_rating_pair(entry['ad']))
+                except (ValueError, KeyError, TypeError):
+                    continue
+    return pairs
+
+
+# 광고 카피 DB TF-IDF 색인 포맷 버전 (학습 방식이 바뀌면 올려서 기존 색인 무효화)
+CATALOG_INDEX_VERSION = 1
+
+
+def cosine_scores(profiles, matrix, matrix_norms: Optional[np.ndarray] = None):
+    """희소 프로필 행마다 matrix 행과의 코사인 유사도 (프로필 수 x 행 수 CSR, 공통 단어가 있는 항목만 값이 있음)"""
+    profiles = sparse.csr_matrix(profiles)
+    if matrix_norms is None:
+        matrix_norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    profile_norms = np.sqrt(np.asarray(profiles.multiply(profiles).sum(axis=1)).ravel())
+
+    # 카탈로그 CSR 행렬을 왼쪽에 두어야 큰 행렬의 전치 변환이 일어나지 않음
+    scores = (matrix @ profiles.T).T.tocsr()
+
+    # 0으로 나누는 항목(빈 벡터)은 유사도 0
+    row_norms = np.repeat(profile_norms, np.diff(scores.indptr))
+    denominators = matrix_norms[scores.indices] * row_norms
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scores.data = np.where(denominators > 0, scores.data / denominators, 0.0)
+    return scores
+
+
+def select_top_k(scores, top_n: int, threshold: float = 0.1) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """점수 행렬의 행마다 threshold 이상인 상위 top_n개 (열 번호 배열, 점수 배열)
+
+    argpartition으로 상위 후보만 추린 뒤 정렬하며, 점수가 같으면 열 번호가 작은 쪽이 앞에 옵니다.
+    """
+    results = []
+    for row in range(scores.shape[0]):
+        start, end = scores.indptr[row], scores.indptr[row + 1]
+        indices = scores.indices[start:end]
+        values = scores.data[start:end]
+
+        keep = values >= threshold
+        indices, values = indices[keep], values[keep]
+        if len(values) > top_n:
+            # argpartition으로 상위 top_n개만 추림 (경계 점수와 같은 동점은 함께 남김)
+            cutoff = values[np.argpartition(-values, top_n - 1)[:top_n]].min()
+            keep = values >= cutoff
+            indices, values = indices[keep], values[keep]
+
+        order = np.lexsort((indices, -values))[:top_n]
+        results.append((indices[order], values[order]))
+    return results
+
+
+def top_k_cosine(profiles, matrix, top_n: int, threshold: float = 0.1,
+                 matrix_norms: Optional[np.ndarray] = None) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """희소 프로필 행마다 matrix 행과의 코사인 유사도 상위 top_n개 (행 번호 배열, 유사도 배열)
+
+    프로필과 행렬을 밀집 배열로 바꾸지 않고 희소 곱 한 번으로 점수를 구한 뒤,
+    threshold 이상인 점수만 남겨 argpartition으로 상위 후보를 고릅니다.
+    """
+    return select_top_k(cosine_scores(profiles, matrix, matrix_norms), top_n, threshold)
+
+
+class CatalogTfidfIndex:
+    """광고 카피 DB의 TF-IDF 행렬과 어휘를 한 번만 학습해 디스크에 저장해 두는 색인
+
+    행렬은 희소 .npz, 어휘와 IDF는 .json으로 ad_copy_database.json 옆에 저장하며,
+    DB 문구의 해시가 바뀌면 자동으로 다시 학습합니다. 추천할 때는 사용자가 좋아한
+    문구만 transform하면 되므로 카탈로그가 커져도 응답 시간이 늘지 않습니다.
+    """
+
+    def __init__(self, db_path: str, texts: List[str]):
+        base = os.path.splitext(db_path)[0]
+        self.matrix_path = base + ".tfidf.npz"
+        self.vocab_path = base + ".tfidf.json"
+
+        digest = hashlib.sha1(f"v{CATALOG_INDEX_VERSION}".encode('utf-8'))
+        for text in texts:
+            digest.update(text.encode('utf-8'))
+            digest.update(b'\0')
+        self.source_hash = digest.hexdigest()
+
+        loaded = self._load(len(texts))
+        if loaded is None:
+            loaded = self._build(texts)
+        self.vectorizer, self.matrix = loaded
+        self.row_norms = np.sqrt(np.asarray(self.matrix.multiply(self.matrix).sum(axis=1)).ravel())
+
+    def _load(self, num_texts: int):
+        """저장된 색인 읽기 (없거나 DB가 바뀌었으면 None)"""
+        if not (os.path.exists(self.vocab_path) and os.path.exists(self.matrix_path)):
+            return None
+
+        try:
+            with open(self.vocab_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get('source_hash') != self.source_hash:
+                return None
+
+            vectorizer = sklearn_text.TfidfVectorizer(vocabulary=meta['vocabulary'])
+            vectorizer.idf_ = np.asarray(meta['idf'])
+            matrix = sparse.load_npz(self.matrix_path).tocsr()
+            if matrix.shape != (num_texts, len(meta['vocabulary'])):
+                return None
+            return vectorizer, matrix
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _build(self, texts: List[str]):
+        """DB 전체로 TF-IDF 학습 후 저장 (저장 실패 시 메모리에서만 사용)"""
+        vectorizer = sklearn_text.TfidfVectorizer()
+        matrix = vectorizer.fit_transform(texts).tocsr()
+
+        meta = {
+            'source_hash': self.source_hash,
+            'vocabulary': {term: int(col) for term, col in vectorizer.vocabulary_.items()},
+            'idf': vectorizer.idf_.tolist()
+        }
+        try:
+            # 행렬 먼저, 해시가 담긴 어휘 파일을 나중에 교체 (중간에 멈추면 다음에 다시 학습)
+            tmp_matrix = f"{os.path.splitext(self.matrix_path)[0]}.tmp.npz"
+            sparse.save_npz(tmp_matrix, matrix)
+            os.replace(tmp_matrix, self.matrix_path)
+
+            tmp_vocab = f"{self.vocab_path}.tmp"
+            with open(tmp_vocab, 'w', encoding='utf-8') as f:
+                json.dump(meta, f, ensure_ascii=False)
+            os.replace(tmp_vocab, self.vocab_path)
+        except OSError:
+            pass
+
+        return vectorizer, matrix
+
+    def transform(self, texts: List[str]):
+        """질의 문구를 카탈로그와 같은 TF-IDF 공간으로 변환"""
+        return self.vectorizer.transform(texts)
+
+    def profile(self, texts: List[str]):
+        """문구들의 평균 TF-IDF 벡터 (희소 1행 행렬)"""
+        vectors = self.transform(texts)
+        weights = sparse.csr_matrix(np.full((1, vectors.shape[0]), 1.0 / vectors.shape[0]))
+        return weights @ vectors
+
+    def profiles(self, text_groups: List[List[str]]):
+        """문구 묶음마다 평균 TF-IDF 벡터 (묶음 수 x 어휘 크기 희소 행렬, 빈 묶음은 0행)
+
+        모든 문구를 한 번에 변환한 뒤 (묶음 x 문구) 평균 행렬을 곱해 프로필을 만듭니다.
+        """
+        rows, cols, weights = [], [], []
+        texts = []
+        for row, group in enumerate(text_groups):
+            for text in group:
+                rows.append(row)
+                cols.append(len(texts))
+                weights.append(1.0 / len(group))
+                texts.append(text)
+
+        vectors = self.transform(texts) if texts else sparse.csr_matrix((0, self.matrix.shape[1]))
+        averaging = sparse.csr_matrix((weights, (rows, cols)), shape=(len(text_groups), len(texts)))
+        return (averaging @ vectors).tocsr()
+
+    def top_k(self, profiles, top_n: int, threshold: float = 0.1) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """프로필 행마다 카탈로그에서 가장 유사한 top_n개"""
+        return top_k_cosine(profiles, self.matrix, top_n, threshold, matrix_norms=self.row_norms)
+
+
+# 유사 광고 색인 (ad_data.json 옆에 문서마다 한 줄씩 추가 기록)
+SIMILARITY_INDEX_SUFFIX = ".simindex.jsonl"
+
+# TfidfVectorizer 기본 토큰화와 같은 규칙 (소문자화 후 두 글자 이상 단어)
+TFIDF_TOKEN_PATTERN = re.compile(r"(?u)\b\w\w+\b")
+
+
+class SimilarityIndex:
+    """평가 기록 유사도 색인: 문서 빈도와 역색인을 누적 갱신해 재학습 없이 TF-IDF 코사인 유사도 계산
+
+    문서 추가는 문서 길이에 비례하고, 질의는 질의와 단어를 공유하는 문서만 살펴봅니다.
+    점수는 (기록 + 질의 문구)로 TfidfVectorizer를 학습했을 때의 코사인 유사도와 같습니다.
+    문서별 단어 빈도는 파일에 한 줄씩 추가 기록되어 다음 실행 때 그대로 불러옵니다.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.doc_terms: List[Dict[str, int]] = []
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+        self.df: Counter = Counter()
+        # 색인 파일을 고칠 수 없으면 (읽기 전용 위치 등) False로 두고 메모리 색인만 사용
+        self.persist = True
+
+    @staticmethod
+    def tokenize(text: str) -> Dict[str, int]:
+        """단어 빈도 (TfidfVectorizer 기본 설정과 같은 토큰화)"""
+        return Counter(TFIDF_TOKEN_PATTERN.findall(text.lower()))
+
+    @staticmethod
+    def _text_hash(text: str) -> str:
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()[:12]
+
+    def _insert(self, terms: Dict[str, int]):
+        """메모리 색인에 문서 하나 반영"""
+        doc_id = len(self.doc_terms)
+        self.doc_terms.append(terms)
+        for term, tf in terms.items():
+            self.postings.setdefault(term, []).append((doc_id, tf))
+        self.df.update(terms.keys())
+
+    def sync(self, texts: List[str]):
+        """저장된 색인을 불러오고 기록과 어긋나면 다시 만들거나 빠진 문서만 추가"""
+        entries = []
+        if os.path.exists(self.path):
+            good_end = 0
+            with open(self.path, 'rb') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        entries.append((entry['h'], entry['tf']))
+                    except (ValueError, KeyError, TypeError):
+                        break
+                    good_end += len(line)
+            if good_end < os.path.getsize(self.path):
+                try:
+                    with open(self.path, 'r+b') as f:
+                        f.truncate(good_end)
+                except OSError:
+                    self.persist = False
+
+        # 색인이 기록보다 길거나 문서 하나라도 해시가 다르면 기록이 바뀐 것이므로 새로 만듦
+        if len(entries) > len(texts) or any(h != self._text_hash(text) for (h, _), text in zip(entries, texts)):
+            entries = []
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+            except OSError:
+                self.persist = False
+
+        for _, terms in entries:
+            self._insert(terms)
+        for text in texts[len(entries):]:
+            self.add(text)
+
+    def add(self, text: str):
+        """문서 하나 추가 (문서 길이에 비례, 파일에는 한 줄 추가)"""
+        terms = self.tokenize(text)
+        self._insert(terms)
+        if not self.persist:
+            return
+        try:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'h': self._text_hash(text), 'tf': terms}, ensure_ascii=False) + '\n')
+        except OSError:
+            # 한 줄이라도 빠지면 이후 위치가 어긋나므로 이번 실행은 더 기록하지 않음
+            self.persist = False
+
+    def query(self, text: str, top_n: int = 3, threshold: float = 0.1,
+              candidates: Optional[Iterable[int]] = None) -> List[Tuple[int, float]]:
+        """질의와 유사한 문서 (문서 번호, 유사도), 유사도 높은 순
+
+        candidates를 주면 (근사 색인이 고른) 그 문서들만 정확한 유사도로 다시 계산합니다.
+        """
+        query_terms = self.tokenize(text)
+        if not query_terms:
+            return []
+
+        # 질의 문구도 말뭉치에 포함된 것으로 보고 IDF 계산 (smooth_idf)
+        n = len(self.doc_terms) + 1
+
+        def idf(term):
+            df = self.df.get(term, 0) + (1 if term in query_terms else 0)
+            return math.log((1 + n) / (1 + df)) + 1
+
+        query_weights = {term: tf * idf(term) for term, tf in query_terms.items()}
+        query_norm = math.sqrt(sum(w * w for w in query_weights.values()))
+
+        dots = {}
+        if candidates is None:
+            for term, weight in query_weights.items():
+                term_idf = idf(term)
+                for doc_id, tf in self.postings.get(term, ()):
+                    dots[doc_id] = dots.get(doc_id, 0.0) + weight * tf * term_idf
+        else:
+            for doc_id in candidates:
+                doc_terms = self.doc_terms[doc_id]
+                dot = sum(weight * doc_terms[term] * idf(term)
+                          for term, weight in query_weights.items() if term in doc_terms)
+                if dot:
+                    dots[doc_id] = dot
+
+        results = []
+        for doc_id, dot in dots.items():
+            doc_norm = math.sqrt(sum((tf * idf(term)) ** 2 for term, tf in self.doc_terms[doc_id].items()))
+            similarity = dot / (query_norm * doc_norm)
+            if similarity >= threshold:
+                results.append((doc_id, similarity))
+
+        results.sort(key=lambda x: (-x[1], x[0]))
+        return results[:top_n]
+
+
+# 근사 유사 광고 색인 (MinHash LSH, 문서마다 고정 길이 서명을 추가 기록)
+LSH_INDEX_SUFFIX = ".lsh.bin"
+LSH_MAGIC = b"ADLH"
+LSH_HEADER = struct.Struct("<4sIII")  # magic, 밴드 수, 밴드당 행 수, 시드
+LSH_DEFAULT_BANDS = 64
+LSH_DEFAULT_ROWS = 2
+LSH_SEED = 1
+LSH_PRIME = (1 << 61) - 1
+
+
+class MinHashLSHIndex:
+    """유사 광고 후보를 찾는 MinHash LSH 근사 색인 (SimilarityIndex와 같은 단어 특징 사용)
+
+    문서마다 bands x rows개의 MinHash 서명을 만들고 밴드별 버킷 키로 묶어 두면,
+    질의와 버킷이 하나라도 겹치는 문서만 후보가 되므로 전체 기록을 훑지 않습니다.
+    자카드 유사도가 s인 문서가 후보가 될 확률은 1 - (1 - s^rows)^bands로,
+    bands를 늘리거나 rows를 줄이면 재현율이 오르고 후보 수(질의 시간)도 늘어납니다.
+    서명은 문서 하나에 고정 길이 레코드로 파일 끝에 추가 기록되고, 불러올 때는
+    밴드별 정렬 키 배열을 한 번에 만들어 이진 탐색으로 버킷을 찾습니다.
+    """
+
+    def __init__(self, path: str, bands: int = LSH_DEFAULT_BANDS, rows: int = LSH_DEFAULT_ROWS, seed: int = LSH_SEED):
+        self.path = path
+        self.bands = bands
+        self.rows = rows
+        self.seed = seed
+        self.num_perm = bands * rows
+
+        # 해시 (a * x + b) mod p: x, a, b가 32비트라 uint64 곱셈이 넘치지 않음
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 1 << 32, size=self.num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 1 << 32, size=self.num_perm, dtype=np.uint64)
+        # 밴드 안의 행들을 uint64 키 하나로 합칠 때 쓰는 홀수 곱수
+        self._band_mix = rng.randint(1, 1 << 62, size=rows, dtype=np.uint64) | np.uint64(1)
+
+        # 레코드: 문서 해시 8바이트 + 서명 (uint32 x num_perm), 빈 문서는 서명이 모두 0
+        self._record = np.dtype([('h', 'S8'), ('sig', '<u4', (self.num_perm,))])
+        self._term_hashes: Dict[str, int] = {}
+        # 서명 파일을 고칠 수 없으면 (읽기 전용 위치 등) False로 두고 메모리 색인만 사용
+        self.persist = True
+
+        # 불러온 문서: 밴드별 정렬된 (키, 문서 번호) / 이후 추가된 문서: 밴드별 dict
+        self._sorted_keys = [np.empty(0, dtype=np.uint64) for _ in range(bands)]
+        self._sorted_ids = [np.empty(0, dtype=np.int64) for _ in range(bands)]
+        self._recent: List[Dict[int, List[int]]] = [{} for _ in range(bands)]
+        self.num_docs = 0
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """문서의 MinHash 서명 (단어가 없으면 None)"""
+        terms = SimilarityIndex.tokenize(text)
+        if not terms:
+            return None
+        hashes = np.fromiter((self._term_hash(term) for term in terms), dtype=np.uint64, count=len(terms))
+        permuted = (np.outer(hashes, self._a) + self._b) % np.uint64(LSH_PRIME)
+        return (permuted.min(axis=0) & np.uint64(0xFFFFFFFF)).astype(np.uint32)
+
+    def _term_hash(self, term: str) -> int:
+        value = self._term_hashes.get(term)
+        if value is None:
+            value = int.from_bytes(hashlib.blake2b(term.encode('utf-8'), digest_size=4).digest(), 'little')
+            self._term_hashes[term] = value
+        return value
+
+    def _band_keys(self, signatures: np.ndarray) -> np.ndarray:
+        """(문서 수 x 서명) → (문서 수 x 밴드) uint64 버킷 키"""
+        banded = signatures.astype(np.uint64).reshape(len(signatures), self.bands, self.rows)
+        return (banded * self._band_mix).sum(axis=2, dtype=np.uint64)
+
+    def _build_buckets(self, signatures: np.ndarray):
+        """서명 전체로 밴드별 정렬 키 배열을 만듦 (빈 문서 제외)"""
+        doc_ids = np.flatnonzero(signatures.any(axis=1))
+        keys = self._band_keys(signatures[doc_ids])
+        for band in range(self.bands):
+            order = np.argsort(keys[:, band], kind='stable')
+            self._sorted_keys[band] = keys[order, band]
+            self._sorted_ids[band] = doc_ids[order]
+        self._recent = [{} for _ in range(self.bands)]
+        self.num_docs = len(signatures)
+
+    def _header(self) -> bytes:
+        return LSH_HEADER.pack(LSH_MAGIC, self.bands, self.rows, self.seed)
+
+    @staticmethod
+    def _text_hash(text: str) -> bytes:
+        return hashlib.sha1(text.encode('utf-8')).digest()[:8]
+
+    def _empty_signature(self) -> np.ndarray:
+        return np.zeros(self.num_perm, dtype=np.uint32)
+
+    def sync(self, texts: List[str]):
+        """저장된 서명을 불러오고 기록과 어긋나면 다시 만들거나 빠진 문서만 추가"""
+        records = np.empty(0, dtype=self._record)
+        if os.path.exists(self.path):
+            with open(self.path, 'rb') as f:
+                data = f.read()
+            if data[:LSH_HEADER.size] == self._header():
+                # 마지막 레코드가 잘렸으면 버림
+                body = memoryview(data)[LSH_HEADER.size:]
+                usable = len(body) - len(body) % self._record.itemsize
+                records = np.frombuffer(body[:usable], dtype=self._record)
+                if usable < len(body):
+                    try:
+                        with open(self.path, 'r+b') as f:
+                            f.truncate(LSH_HEADER.size + usable)
+                    except OSError:
+                        self.persist = False
+            else:
+                # 설정(밴드 수 등)이 바뀌었거나 손상된 파일은 새로 만듦
+                self._remove_file()
+
+        # 색인이 기록보다 길거나 문서 하나라도 해시가 다르면 기록이 바뀐 것이므로 새로 만듦
+        count = len(records)
+        if count > len(texts) or (count and not np.array_equal(
+                records['h'], np.array([self._text_hash(text) for text in texts[:count]], dtype='S8'))):
+            records = np.empty(0, dtype=self._record)
+            self._remove_file()
+
+        # 빠진 문서 서명을 한 번에 추가 기록
+        missing = texts[len(records):]
+        if missing:
+            added = np.empty(len(missing), dtype=self._record)
+            for row, text in enumerate(missing):
+                signature = self.signature(text)
+                added[row] = (self._text_hash(text), signature if signature is not None else self._empty_signature())
+            self._append_records(added)
+            records = np.concatenate([records, added])
+
+        self._build_buckets(records['sig'])
+
+    def add(self, text: str):
+        """문서 하나 추가 (버킷 갱신 + 서명 레코드 하나 추가 기록)"""
+        doc_id = self.num_docs
+        self.num_docs += 1
+        signature = self.signature(text)
+        if signature is not None:
+            for band, key in enumerate(self._band_keys(signature[np.newaxis])[0].tolist()):
+                self._recent[band].setdefault(key, []).append(doc_id)
+
+        record = np.array([(self._text_hash(text), signature if signature is not None else self._empty_signature())],
+                          dtype=self._record)
+        self._append_records(record)
+
+    def _remove_file(self):
+        """서명 파일 삭제 (지울 수 없으면 이번 실행은 메모리 색인만 사용)"""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        except OSError:
+            self.persist = False
+
+    def _append_records(self, records: np.ndarray):
+        """서명 레코드를 파일 끝에 추가 (실패하면 위치가 어긋나지 않도록 이후 기록 중단)"""
+        if not self.persist:
+            return
+        try:
+            new_file = not os.path.exists(self.path)
+            with open(self.path, 'ab') as f:
+                if new_file:
+                    f.write(self._header())
+                f.write(records.tobytes())
+        except OSError:
+            self.persist = False
+
+    def candidates(self, text: str) -> List[int]:
+        """질의와 버킷이 하나 이상 겹치는 문서 번호"""
+        signature = self.signature(text)
+        if signature is None:
+            return []
+
+        found = []
+        for band, key in enumerate(self._band_keys(signature[np.newaxis])[0].tolist()):
+            keys = self._sorted_keys[band]
+            start = np.searchsorted(keys, key, side='left')
+            end = np.searchsorted(keys, key, side='right')
+            if end > start:
+                found.append(self._sorted_ids[band][start:end])
+            recent = self._recent[band].get(key)
+            if recent:
+                found.append(np.asarray(recent, dtype=np.int64))
+
+        if not found:
+            return []
+        return np.unique(np.concatenate(found)).tolist()
+
+
+class AdPreferenceAnalyzer:
+    def __init__(self, approximate_similar: bool = False,
+                 lsh_bands: int = LSH_DEFAULT_BANDS, lsh_rows: int = LSH_DEFAULT_ROWS):
         # 현재 스크립트 디렉토리 기준으로 경로 설정
         script_dir = os.path.dirname(os.path.abspath(__file__))
-        self.data_file = os.path.join(script_dir, "ad_data.json")
-        self.ads = self.load_data()
+        self.data_file = default_data_file()
+        self.store = self.open_store()
 
         # 광고 카피 데이터베이스 로드
         self.ad_copy_db_file = os.path.join(script_dir, "ad_copy_database.json")
         self.ad_copy_database = self.load_ad_copy_database()
+        self._catalog_index = None
+        self._similarity_index = None
 
-        # 감성 분석기 초기화
-        console.print("[bold cyan]🚀 AI 광고 취향 분석기 초기화 중...[/bold cyan]")
-        self.sentiment_analyzer = AdvancedSentimentAnalyzer()
+        # 유사 광고 찾기에 근사 색인(MinHash LSH) 사용 여부
+        self.approximate_similar = approximate_similar
+        self.lsh_bands = lsh_bands
+        self.lsh_rows = lsh_rows
+        self._lsh_index = None
 
-    def load_data(self):
-        """저장된 데이터 불러오기"""
-        if os.path.exists(self.data_file):
-            try:
-                with open(self.data_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
-                return []
-        return []
+        # 감성 분석기 초기화 (메뉴를 그리는 동안 백그라운드에서 감성사전 로드)
+        console.print("[bold cyan]🚀 AI 광고 취향 분석기 초기화 중...[/bold cyan]")
+        loader = ThreadPoolExecutor(max_workers=1)
+        self._analyzer_future = loader.submit(AdvancedSentimentAnalyzer, quiet=True, cache_size=ANALYSIS_CACHE_SIZE)
+        loader.shutdown(wait=False)
+
+    @property
+    def sentiment_analyzer(self) -> AdvancedSentimentAnalyzer:
+        """감성 분석기 (아직 로드 중이면 끝날 때까지 기다림)"""
+        return self._analyzer_future.result()
+
+    def open_store(self):
+        """평가 저장소 열기 (JSON 스냅샷 + 저널, 또는 SQLite)"""
+        return open_rating_store(self.data_file)
+
+    @property
+    def ads(self) -> List[Dict]:
+        """전체 평가 기록"""
+        return self.store.ads
+
+    def get_catalog_index(self) -> CatalogTfidfIndex:
+        """광고 카피 DB TF-IDF 색인 (처음 추천할 때 디스크에서 불러오거나 학습)"""
+        if self._catalog_index is None:
+            db_texts = [copy['text'] for copy in self.ad_copy_database]
+            self._catalog_index = CatalogTfidfIndex(self.ad_copy_db_file, db_texts)
+        return self._catalog_index
 
     def load_ad_copy_database(self):
         """광고 카피 데이터베이스 로드"""
@@ -279,38 +2827,49 @@ class AdPreferenceAnalyzer:
             console.print("[yellow]⚠️ 광고 카피 데이터베이스를 찾을 수 없습니다.[/yellow]")
             return []
 
+    def add_rating(self, ad_info: Dict):
+        """평가 하나 추가 (저널에 한 줄만 기록, 유사 광고 색인들도 함께 갱신)"""
+        self.store.append(ad_info)
+        if self._similarity_index is not None:
+            self._similarity_index.add(ad_info['ad_text'])
+        if self._lsh_index is not None:
+            self._lsh_index.add(ad_info['ad_text'])
+
     def save_data(self):
-        """데이터 저장하기"""
-        with open(self.data_file, 'w', encoding='utf-8') as f:
-            json.dump(self.ads, f, ensure_ascii=False, indent=2)
+        """전체 기록을 스냅샷으로 저장하기 (저널 압축)"""
+        self.store.compact()
+
+    def get_similarity_index(self) -> SimilarityIndex:
+        """유사 광고 색인 (처음 사용할 때 불러와서 기록과 맞춤)"""
+        if self._similarity_index is None:
+            index_path = os.path.splitext(self.data_file)[0] + SIMILARITY_INDEX_SUFFIX
+            self._similarity_index = SimilarityIndex(index_path)
+            self._similarity_index.sync(self.store.texts())
+        return self._similarity_index
+
+    def get_lsh_index(self) -> MinHashLSHIndex:
+        """근사 유사 광고 색인 (처음 사용할 때 불러와서 기록과 맞춤)"""
+        if self._lsh_index is None:
+            index_path = os.path.splitext(self.data_file)[0] + LSH_INDEX_SUFFIX
+            self._lsh_index = MinHashLSHIndex(index_path, bands=self.lsh_bands, rows=self.lsh_rows)
+            self._lsh_index.sync(self.store.texts())
+        return self._lsh_index
 
     def find_similar_ads(self, target_ad_text: str, top_n: int = 3) -> List[Tuple[Dict, float]]:
-        """현재 광고와 유사한 광고 찾기 (TF-IDF + 코사인 유사도)"""
-        if len(self.ads) < 2:
+        """현재 광고와 유사한 광고 찾기 (누적 TF-IDF 색인 + 코사인 유사도)"""
+        if self.store.count() < 2:
             return []
 
         try:
-            # 모든 광고 텍스트 수집
-            all_texts = [ad['ad_text'] for ad in self.ads]
-            all_texts.append(target_ad_text)
-
-            # TF-IDF 벡터화
-            vectorizer = TfidfVectorizer()
-            tfidf_matrix = vectorizer.fit_transform(all_texts)
-
-            # 마지막 광고(target)와 다른 광고들의 유사도 계산
-            similarities = cosine_similarity(tfidf_matrix[-1:], tfidf_matrix[:-1])[0]
-
-            # 유사도가 0.1 이상인 광고만 필터링
-            valid_indices = [i for i, sim in enumerate(similarities) if sim >= 0.1]
-
-            if not valid_indices:
-                return []
-
-            # 가장 유사한 광고 인덱스 (내림차순)
-            similar_indices = sorted(valid_indices, key=lambda i: similarities[i], reverse=True)[:top_n]
-
-            return [(self.ads[i], similarities[i]) for i in similar_indices]
+            # 유사도가 0.1 이상인 광고 중 가장 유사한 순
+            if self.approximate_similar:
+                # LSH 후보만 정확한 TF-IDF 유사도로 다시 계산 (기록이 아주 많을 때)
+                candidates = self.get_lsh_index().candidates(target_ad_text)
+                similar = self.get_similarity_index().query(target_ad_text, top_n=top_n, threshold=0.1,
+                                                            candidates=candidates)
+            else:
+                similar = self.get_similarity_index().query(target_ad_text, top_n=top_n, threshold=0.1)
+            return [(self.store.get(i), similarity) for i, similarity in similar]
 
         except Exception as e:
             console.print(f"[yellow]⚠️ 유사도 분석 오류: {e}[/yellow]")
@@ -322,61 +2881,34 @@ class AdPreferenceAnalyzer:
             console.print("[yellow]광고 카피 데이터베이스가 비어있습니다.[/yellow]")
             return []
 
-        if len(self.ads) < 3:
+        if self.store.count() < 3:
             console.print("[yellow]추천을 위해서는 최소 3개 이상의 광고를 평가해주세요.[/yellow]")
             return []
 
         # 높은 평가를 받은 광고 (7점 이상)
-        high_rated_ads = [ad for ad in self.ads if ad['overall_rating'] >= 7]
+        user_liked_texts = self.store.texts(min_rating=7)
 
-        if not high_rated_ads:
+        if not user_liked_texts:
             console.print("[yellow]7점 이상의 광고가 없습니다. 더 많은 광고를 평가해주세요.[/yellow]")
             return []
 
         try:
-            # 사용자가 좋아하는 광고 텍스트 수집
-            user_liked_texts = [ad['ad_text'] for ad in high_rated_ads]
-
-            # 광고 카피 DB 텍스트 수집
-            db_texts = [copy['text'] for copy in self.ad_copy_database]
-
-            # 모든 텍스트 합치기 (사용자 선호 + DB)
-            all_texts = user_liked_texts + db_texts
-
-            # TF-IDF 벡터화
-            vectorizer = TfidfVectorizer()
-            tfidf_matrix = vectorizer.fit_transform(all_texts)
-
-            # 사용자가 좋아하는 광고들의 평균 벡터 계산
-            user_vectors = tfidf_matrix[:len(user_liked_texts)]
-            user_profile = np.asarray(user_vectors.mean(axis=0))
+            # 미리 학습된 DB 색인으로 사용자가 좋아하는 광고들의 평균 벡터 (희소) 계산
+            catalog_index = self.get_catalog_index()
+            user_profile = catalog_index.profile(user_liked_texts)
 
-            # DB 광고들과의 유사도 계산
-            db_vectors = tfidf_matrix[len(user_liked_texts):]
-            similarities = cosine_similarity(user_profile, db_vectors)[0]
+            # DB 광고들과의 유사도 중 0.1 이상인 상위 N개
+            top_indices, top_similarities = catalog_index.top_k(user_profile, top_n, threshold=0.1)[0]
 
-            # 유사도가 0.1 이상인 것만 필터링
-            valid_indices = [i for i, sim in enumerate(similarities) if sim >= 0.1]
-
-            if not valid_indices:
+            if len(top_indices) == 0:
                 console.print("[yellow]유사한 광고 카피를 찾을 수 없습니다.[/yellow]")
                 return []
 
-            # 상위 N개 추천
-            top_indices = sorted(valid_indices, key=lambda i: similarities[i], reverse=True)[:top_n]
-
             # 결과 구성: (광고 카피 dict, 유사도, 추천 이유)
-            recommendations = []
-            for idx in top_indices:
-                copy_data = self.ad_copy_database[idx]
-                similarity = similarities[idx]
-
-                # 추천 이유 생성
-                reason = f"{copy_data['category']} 스타일"
-
-                recommendations.append((copy_data, similarity, reason))
-
-            return recommendations
+            return [
+                (self.ad_copy_database[idx], similarity, f"{self.ad_copy_database[idx]['category']} 스타일")
+                for idx, similarity in zip(top_indices.tolist(), top_similarities.tolist())
+            ]
 
         except Exception as e:
             console.print(f"[red]⚠️ 추천 시스템 오류: {e}[/red]")
@@ -474,7 +3006,7 @@ class AdPreferenceAnalyzer:
             return
 
         # 사용자 통계 표시
-        high_rated_count = len([ad for ad in self.ads if ad['overall_rating'] >= 7])
+        high_rated_count = self.store.count(min_rating=7)
         console.print(f"\n[bold]📊 분석 기반:[/bold] 높은 평가 광고 {high_rated_count}개")
         console.print("─"*70)
 
@@ -512,10 +3044,10 @@ class AdPreferenceAnalyzer:
         if len(category_count) > 1:
             console.print(f"\n[dim]카테고리 분포: {', '.join([f'{k}({v})' for k, v in sorted(category_count.items(), key=lambda x: x[1], reverse=True)])}[/dim]")
 
-    def display_analysis_preview(self, analysis: Dict):
+    def display_analysis_preview(self, analysis: SentimentResult):
         """분석 결과 미리보기 출력 (Rich 스타일)"""
         # 감성 점수에 따른 색상
-        score = analysis['score']
+        score = analysis.score
         if score > 1:
             sentiment_color = "green"
         elif score > 0:
@@ -527,18 +3059,19 @@ class AdPreferenceAnalyzer:
         else:
             sentiment_color = "white"
 
-        console.print(f"\n[{sentiment_color}]📊 [{analysis['sentiment_label']}] (감성 점수: {score})[/{sentiment_color}]")
+        console.print(f"\n[{sentiment_color}]📊 [{analysis.sentiment_label}] (감성 점수: {score})[/{sentiment_color}]")
 
         # 형태소 분석 결과
-        if analysis.get('words'):
-            words_str = ', '.join(analysis['words'][:8])
+        words = analysis.words
+        if words:
+            words_str = ', '.join(words[:8])
             console.print(f"[dim]   주요 단어: {words_str}...[/dim]")
 
         # 혼합 감성 상세 정보
-        if analysis.get('sentiment_conflict', {}).get('has_conflict'):
-            conflict = analysis['sentiment_conflict']
-            pos_words = [w[0] for w in analysis['positive_words'][:2]]
-            neg_words = [w[0] for w in analysis['negative_words'][:2]]
+        if analysis.has_conflict:
+            conflict = analysis.sentiment_conflict
+            pos_words = [w[0] for w in analysis.positive_words[:2]]
+            neg_words = [w[0] for w in analysis.negative_words[:2]]
 
             console.print(f"   [yellow]⚡ 감성 충돌 감지![/yellow]")
             console.print(f"      [green]긍정어: {', '.join(pos_words)} (강도: {conflict['positive_strength']:.1f})[/green]")
@@ -549,22 +3082,22 @@ class AdPreferenceAnalyzer:
                 console.print(f"      [cyan]💡 스토리텔링형/역설형 광고로 추정됩니다[/cyan]")
 
         # 광고 스타일
-        if analysis['ad_styles']:
-            styles = ', '.join([f"{s[0]}" for s in analysis['ad_styles'][:2]])
+        if analysis.ad_styles:
+            styles = ', '.join([f"{s[0]}" for s in analysis.ad_styles[:2]])
             console.print(f"[magenta]🎨 광고 스타일:[/magenta] {styles}")
 
         # 산업군
-        if analysis.get('industries'):
-            industries = ', '.join([f"{i[0]}" for i in analysis['industries'][:2]])
+        if analysis.industries:
+            industries = ', '.join([f"{i[0]}" for i in analysis.industries[:2]])
             console.print(f"[blue]🏢 산업군:[/blue] {industries}")
 
         # 핵심 키워드
-        if analysis['keywords']:
-            keywords = ', '.join([f"'{k[0]}'" for k in analysis['keywords'][:3]])
+        if analysis.keywords:
+            keywords = ', '.join([f"'{k[0]}'" for k in analysis.keywords[:3]])
             console.print(f"[yellow]🔑 핵심 키워드:[/yellow] {keywords}")
 
         # 언어 패턴
-        pattern = analysis['language_pattern']
+        pattern = analysis.language_pattern
         features = []
         if pattern['has_exclamation']:
             features.append("강조형")
@@ -583,8 +3116,7 @@ class AdPreferenceAnalyzer:
         ad_info = self.input_and_rate_ad()
 
         # 데이터 저장
-        self.ads.append(ad_info)
-        self.save_data()
+        self.add_rating(ad_info)
 
         console.print(Panel.fit(
             "[bold green]✅ 광고 평가가 완료되었습니다![/bold green]",
@@ -599,98 +3131,67 @@ class AdPreferenceAnalyzer:
             border_style="cyan"
         ))
 
-        if not self.ads:
+        num_ads = self.store.count()
+        if not num_ads:
             console.print("\n[yellow]아직 평가한 광고가 없습니다.[/yellow]")
             console.print("[yellow]광고를 평가하고 나만의 취향 프로필을 만들어보세요![/yellow]")
             return
 
-        num_ads = len(self.ads)
-        avg_rating = sum(ad["overall_rating"] for ad in self.ads) / num_ads
+        avg_rating = self.store.average_rating()
 
         console.print(f"\n[bold]📈 평가 데이터:[/bold] {num_ads}개 광고 | [bold]평균 만족도:[/bold] {avg_rating:.1f}/10점")
         console.print("─"*70)
 
-        # 감성 분석이 있는 광고만 추출
-        ads_with_sentiment = [ad for ad in self.ads if ad.get("sentiment_analysis")]
+        # 감성 분석이 있는 광고만 집계
+        sentiment_stats = self.store.group_stats('sentiment_label')
 
-        if ads_with_sentiment:
-            self.show_sentiment_preference(ads_with_sentiment)
-            self.show_style_preference(ads_with_sentiment)
+        if sentiment_stats:
+            self.show_sentiment_preference(sentiment_stats)
+            self.show_style_preference(self.store.group_stats('main_style'))
 
         self.show_top_and_bottom_ads()
 
-    def show_sentiment_preference(self, ads: List[Dict]):
+    def show_sentiment_preference(self, sentiment_stats: List[Tuple[str, float, int]]):
         """감성 톤 선호도 분석 (테이블 스타일)"""
         console.print("\n[bold magenta]🎭 감성 톤 선호도[/bold magenta]")
 
-        # 감성 라벨별 평균 점수
-        sentiment_ratings = {}
-
-        for ad in ads:
-            label = ad["sentiment_analysis"]["sentiment_label"]
-            rating = ad["overall_rating"]
-
-            if label not in sentiment_ratings:
-                sentiment_ratings[label] = []
-            sentiment_ratings[label].append(rating)
-
-        sorted_sentiments = sorted(
-            sentiment_ratings.items(),
-            key=lambda x: sum(x[1])/len(x[1]),
-            reverse=True
-        )
-
         # Rich Table 생성
         table = Table(show_header=True, header_style="bold cyan", box=box.ROUNDED)
         table.add_column("감성 톤", style="cyan", width=15)
         table.add_column("평균 점수", justify="right", style="yellow")
         table.add_column("평가 수", justify="right", style="dim")
+        table.add_column("편차", justify="right", style="dim")
 
-        for label, ratings in sorted_sentiments[:5]:
-            avg = sum(ratings) / len(ratings)
-            table.add_row(label, f"{avg:.1f}점", f"{len(ratings)}개")
+        # 감성 라벨별 평균 점수 (평균 높은 순), 편차는 유지 중인 제곱합으로 계산
+        for label, avg, count in sentiment_stats[:5]:
+            stddev = self.store.aggregates.group_stddev('sentiment_label', label)
+            table.add_row(label, f"{avg:.1f}점", f"{count}개", f"±{stddev:.1f}")
 
         console.print(table)
 
-        if sorted_sentiments:
-            best_sentiment = sorted_sentiments[0][0]
+        if sentiment_stats:
+            best_sentiment = sentiment_stats[0][0]
             console.print(f"\n[bold green]💡 당신은 '{best_sentiment}' 톤의 광고를 선호합니다.[/bold green]")
 
-    def show_style_preference(self, ads: List[Dict]):
-        """광고 스타일 선호도 분석"""
+    def show_style_preference(self, style_stats: List[Tuple[str, float, int]]):
+        """광고 스타일 선호도 분석 (주 스타일 기준)"""
         console.print("\n[bold blue]🎨 광고 스타일 선호도[/bold blue]")
 
-        style_ratings = {}
-        for ad in ads:
-            if ad["sentiment_analysis"].get("ad_styles"):
-                # 첫 번째 스타일만 (주 스타일)
-                main_style = ad["sentiment_analysis"]["ad_styles"][0][0]
-                rating = ad["overall_rating"]
-
-                if main_style not in style_ratings:
-                    style_ratings[main_style] = []
-                style_ratings[main_style].append(rating)
-
-        if style_ratings:
-            sorted_styles = sorted(
-                style_ratings.items(),
-                key=lambda x: sum(x[1])/len(x[1]),
-                reverse=True
-            )
-
+        if style_stats:
             # Rich Table 생성
             table = Table(show_header=True, header_style="bold blue", box=box.ROUNDED)
             table.add_column("광고 스타일", style="blue", width=15)
             table.add_column("평균 점수", justify="right", style="yellow")
             table.add_column("평가 수", justify="right", style="dim")
+            table.add_column("편차", justify="right", style="dim")
 
-            for style, ratings in sorted_styles[:5]:
-                avg = sum(ratings) / len(ratings)
-                table.add_row(style, f"{avg:.1f}점", f"{len(ratings)}개")
+            for style, avg, count in style_stats[:5]:
+                stddev = self.store.aggregates.group_stddev('main_style', style)
+                table.add_row(style, f"{avg:.1f}점", f"{count}개", f"±{stddev:.1f}")
 
             console.print(table)
 
-            best_style = sorted_styles[0][0]
+            best_style = style_stats[0][0]
             console.print(f"\n[bold green]💡 당신은 '{best_style}' 광고를 가장 좋아합니다.[/bold green]")
 
     def show_top_and_bottom_ads(self):
@@ -698,50 +3199,60 @@ class AdPreferenceAnalyzer:
         console.print("\n[bold yellow]⭐ 베스트 & 워스트[/bold yellow]")
         console.print("─"*70)
 
-        sorted_ads = sorted(self.ads, key=lambda x: x["overall_rating"], reverse=True)
+        best_ad, worst_ad = self.store.best_and_worst()
 
         # 최고 광고
-        best_ad = sorted_ads[0]
         console.print(f"\n[green]🏆 가장 마음에 든 광고 ({best_ad['overall_rating']}점):[/green]")
         console.print(f"   [bold]\"{best_ad['ad_text'][:50]}{'...' if len(best_ad['ad_text']) > 50 else ''}\"[/bold]")
 
         # 최저 광고
-        if len(sorted_ads) >= 3:
-            worst_ad = sorted_ads[-1]
+        if self.store.count() >= 3:
             console.print(f"\n[red]👎 아쉬웠던 광고 ({worst_ad['overall_rating']}점):[/red]")
             console.print(f"   [dim]\"{worst_ad['ad_text'][:50]}{'...' if len(worst_ad['ad_text']) > 50 else ''}\"[/dim]")
 
     def show_history(self):
-        """평가 기록 보기 (테이블 스타일)"""
-        console.clear()
-        console.print(Panel.fit(
-            "[bold cyan]📋 평가 기록[/bold cyan]",
-            border_style="cyan"
-        ))
-
-        if not self.ads:
-            console.print("\n[yellow]아직 평가한 광고가 없습니다.[/yellow]")
-            return
+        """평가 기록 보기 (테이블 스타일, 한 페이지씩 저장소에서 읽음)"""
+        total = self.store.count()
+        pages = max(1, (total + HISTORY_PAGE_SIZE - 1) // HISTORY_PAGE_SIZE)
+        page = 0
+        while True:
+            console.clear()
+            console.print(Panel.fit(
+                "[bold cyan]📋 평가 기록[/bold cyan]",
+                border_style="cyan"
+            ))
 
-        # Rich Table 생성
-        table = Table(show_header=True, header_style="bold cyan", box=box.ROUNDED)
-        table.add_column("No.", style="dim", width=4)
-        table.add_column("광고 문구", style="white", width=40)
-        table.add_column("평점", justify="center", style="yellow", width=6)
-        table.add_column("감성", justify="center", style="cyan", width=12)
+            if not total:
+                console.print("\n[yellow]아직 평가한 광고가 없습니다.[/yellow]")
+                Prompt.ask("\n[dim]계속하려면 Enter를 누르세요[/dim]", default="")
+                return
 
-        for i, ad in enumerate(self.ads, 1):
-            ad_text = ad['ad_text'][:37] + "..." if len(ad['ad_text']) > 40 else ad['ad_text']
-            rating = f"{ad['overall_rating']}/10"
+            # Rich Table 생성
+            table = Table(show_header=True, header_style="bold cyan", box=box.ROUNDED)
+            table.add_column("No.", style="dim", width=4)
+            table.add_column("광고 문구", style="white", width=40)
+            table.add_column("평점", justify="center", style="yellow", width=6)
+            table.add_column("감성", justify="center", style="cyan", width=12)
 
-            # 감성 분석 결과
-            sentiment = "N/A"
-            if ad.get("sentiment_analysis"):
-                sentiment = ad["sentiment_analysis"]["sentiment_label"]
+            rows = self.store.history_rows(page * HISTORY_PAGE_SIZE, HISTORY_PAGE_SIZE)
+            for number, ad_text, rating, sentiment in rows:
+                ad_text = ad_text[:37] + "..." if len(ad_text) > 40 else ad_text
+                table.add_row(str(number), ad_text, f"{rating}/10", sentiment or "N/A")
 
-            table.add_row(str(i), ad_text, rating, sentiment)
+            console.print(table)
+            console.print(f"[dim]{page + 1} / {pages} 페이지 (총 {total}개)[/dim]")
 
-        console.print(table)
+            if pages == 1:
+                Prompt.ask("\n[dim]계속하려면 Enter를 누르세요[/dim]", default="")
+                return
+            move = Prompt.ask("\n[dim]n: 다음 페이지, p: 이전 페이지, Enter: 메뉴로[/dim]",
+                              choices=["n", "p", ""], default="", show_choices=False)
+            if move == "n":
+                page = min(page + 1, pages - 1)
+            elif move == "p":
+                page = max(page - 1, 0)
+            else:
+                return
 
     def main_menu(self):
         """메인 메뉴 (Rich 스타일)"""
@@ -753,10 +3264,11 @@ class AdPreferenceAnalyzer:
                 border_style="cyan"
             ))
 
-            console.print(f"\n[bold]📊 현재까지 평가한 광고:[/bold] [yellow]{len(self.ads)}개[/yellow]")
+            num_ads = self.store.count()
+            console.print(f"\n[bold]📊 현재까지 평가한 광고:[/bold] [yellow]{num_ads}개[/yellow]")
 
-            if len(self.ads) >= 3:
-                avg_rating = sum(ad["overall_rating"] for ad in self.ads) / len(self.ads)
+            if num_ads >= 3:
+                avg_rating = self.store.average_rating()
                 console.print(f"[bold]⭐ 평균 만족도:[/bold] [yellow]{avg_rating:.1f}/10점[/yellow]")
 
             console.print("\n[bold cyan][메뉴][/bold cyan]")
@@ -776,7 +3288,6 @@ class AdPreferenceAnalyzer:
                 Prompt.ask("\n[dim]계속하려면 Enter를 누르세요[/dim]", default="")
             elif choice == 3:
                 self.show_history()
-                Prompt.ask("\n[dim]계속하려면 Enter를 누르세요[/dim]", default="")
             elif choice == 4:
                 self.display_recommended_copies()
                 Prompt.ask("\n[dim]계속하려면 Enter를 누르세요[/dim]", default="")
@@ -787,6 +3298,999 @@ class AdPreferenceAnalyzer:
                 ))
                 break
 
+
+# 파이프라인 단계별 지연 시간 히스토그램 경계 (초, Prometheus 기본값과 비슷한 로그 간격)
+PROFILE_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Prometheus 지표 이름 접두사
+PROFILE_METRIC_PREFIX = "lfair_pipeline"
+
+
+class StageStats:
+    """한 단계의 호출 수, 오류 수, 누적·최대 시간과 구간별 호출 수"""
+
+    __slots__ = ('count', 'errors', 'total', 'max', 'bucket_counts')
+
+    def __init__(self, num_buckets: int):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        # 마지막 칸은 가장 큰 경계를 넘는 호출 (+Inf)
+        self.bucket_counts = [0] * (num_buckets + 1)
+
+
+class PipelineProfiler:
+    """분석·추천 파이프라인 단계별 지연 시간 계측기 (켤 때만 메서드를 감싸므로 꺼져 있으면 비용 없음)
+
+    install()은 PROFILE_STAGES의 메서드·함수를 시간을 재는 래퍼로 바꾸고, uninstall()은
+    원래 함수로 되돌립니다. 계측하지 않을 때 파이프라인 코드에는 분기 하나도 추가되지 않습니다.
+    결과는 JSON 또는 Prometheus 텍스트 형식으로 내보낼 수 있습니다.
+    """
+
+    def __init__(self, buckets: Sequence[float] = PROFILE_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.stages: Dict[str, StageStats] = {}
+        self._originals: List[Tuple[Any, str, Any]] = []
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float, failed: bool = False):
+        """단계 호출 하나의 소요 시간 기록"""
+        with self._lock:
+            stats = self.stages.get(stage)
+            if stats is None:
+                stats = self.stages[stage] = StageStats(len(self.buckets))
+            stats.count += 1
+            stats.errors += failed
+            stats.total += seconds
+            stats.max = max(stats.max, seconds)
+            stats.bucket_counts[bisect.bisect_left(self.buckets, seconds)] += 1
+
+    def timed(self, stage: str, func):
+        """func 호출마다 소요 시간을 stage에 기록하는 래퍼"""
+        record = self.record
+        clock = time.perf_counter
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                result = func(*args, **kwargs)
+            except BaseException:
+                record(stage, clock() - start, failed=True)
+                raise
+            record(stage, clock() - start)
+            return result
+
+        return wrapper
+
+    def install(self, targets: Optional[Iterable[Tuple[Any, str, str]]] = None):
+        """(소유 객체, 속성 이름, 단계 이름) 목록의 함수를 계측 래퍼로 교체"""
+        if self._originals:
+            return
+        for owner, attr, stage in (PROFILE_STAGES if targets is None else targets):
+            original = owner.__dict__[attr] if isinstance(owner, type) else getattr(owner, attr)
+            self._originals.append((owner, attr, original))
+            setattr(owner, attr, self.timed(stage, original))
+
+    def uninstall(self):
+        """원래 함수로 되돌리기 (기록은 유지)"""
+        while self._originals:
+            owner, attr, original = self._originals.pop()
+            setattr(owner, attr, original)
+
+    def quantile(self, stats: StageStats, q: float) -> float:
+        """히스토그램 구간으로 추정한 분위수 (해당 구간의 상한, 마지막 구간이면 최댓값)"""
+        rank = q * stats.count
+        seen = 0
+        for bound, count in zip(self.buckets, stats.bucket_counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, stats.max)
+        return stats.max
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """단계별 통계 (JSON으로 바로 저장 가능한 dict, 단계 이름 순)"""
+        result = {}
+        with self._lock:
+            for stage in sorted(self.stages):
+                stats = self.stages[stage]
+                cumulative = list(itertools.accumulate(stats.bucket_counts))
+                result[stage] = {
+                    'count': stats.count,
+                    'errors': stats.errors,
+                    'total_seconds': stats.total,
+                    'mean_seconds': stats.total / stats.count if stats.count else 0.0,
+                    'max_seconds': stats.max,
+                    'p50_seconds': self.quantile(stats, 0.5),
+                    'p99_seconds': self.quantile(stats, 0.99),
+                    'buckets': dict(zip([str(bound) for bound in self.buckets] + ['+Inf'], cumulative))
+                }
+        return result
+
+    def to_json(self) -> str:
+        return json.dumps({'buckets': list(self.buckets), 'stages': self.snapshot()}, ensure_ascii=False, indent=2)
+
+    def to_prometheus(self) -> str:
+        """Prometheus 텍스트 노출 형식 (단계별 histogram + 오류 counter)"""
+        name = f"{PROFILE_METRIC_PREFIX}_stage_seconds"
+        lines = [f"# HELP {name} Latency of analysis/recommendation pipeline stages.",
+                 f"# TYPE {name} histogram"]
+        snapshot = self.snapshot()
+        for stage, stats in snapshot.items():
+            for bound, count in stats['buckets'].items():
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {count}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {stats["total_seconds"]:.9f}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {stats["count"]}')
+
+        errors = f"{PROFILE_METRIC_PREFIX}_stage_errors_total"
+        lines += [f"# HELP {errors} Pipeline stage calls that raised an exception.",
+                  f"# TYPE {errors} counter"]
+        for stage, stats in snapshot.items():
+            lines.append(f'{errors}{{stage="{stage}"}} {stats["errors"]}')
+        return '\n'.join(lines) + '\n'
+
+    def dump(self, path: str, fmt: Optional[str] = None):
+        """통계를 파일로 저장 (형식을 생략하면 .prom/.txt는 Prometheus, 그 외는 JSON)"""
+        if fmt is None:
+            fmt = 'prometheus' if os.path.splitext(path)[1].lower() in ('.prom', '.txt') else 'json'
+        content = self.to_prometheus() if fmt == 'prometheus' else self.to_json()
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+
+# 계측 대상 (소유 객체, 속성 이름, 단계 이름): 분석은 analyze.*, 추천은 recommend.*, 유사 광고는 similar.*
+PROFILE_STAGES = [
+    (AdvancedSentimentAnalyzer, 'load_sentiment_dict', 'lexicon.load'),
+    (AdvancedSentimentAnalyzer, 'analyze_text', 'analyze.total'),
+    (AdvancedSentimentAnalyzer, 'extract_words', 'analyze.tokenize'),
+    (AdvancedSentimentAnalyzer, 'match_lexicon', 'analyze.lexicon'),
+    (KeywordClassifier, 'classify', 'analyze.classify'),
+    (AdvancedSentimentAnalyzer, 'extract_keywords', 'analyze.keywords'),
+    (AdvancedSentimentAnalyzer, 'analyze_language_pattern', 'analyze.language_pattern'),
+    (AdPreferenceAnalyzer, 'recommend_personalized_copies', 'recommend.total'),
+    (CatalogTfidfIndex, '_load', 'recommend.index_load'),
+    (CatalogTfidfIndex, '_build', 'recommend.fit'),
+    (CatalogTfidfIndex, 'transform', 'recommend.transform'),
+    (sys.modules[__name__], 'cosine_scores', 'recommend.similarity'),
+    (sys.modules[__name__], 'select_top_k', 'recommend.sort'),
+    (AdPreferenceAnalyzer, 'find_similar_ads', 'similar.total'),
+    (SimilarityIndex, 'sync', 'similar.index_sync'),
+    (MinHashLSHIndex, 'candidates', 'similar.lsh_candidates'),
+    (SimilarityIndex, 'query', 'similar.similarity'),
+]
+
+
+def report_profile(profiler: PipelineProfiler, output: Optional[str] = None, fmt: Optional[str] = None):
+    """단계별 지연 시간 요약 표 출력, output이 있으면 통계 파일 저장"""
+    snapshot = profiler.snapshot()
+    table = Table(title="⏱️ 단계별 처리 시간 (ms)", box=box.ROUNDED)
+    table.add_column("단계", style="cyan", no_wrap=True, min_width=24)
+    table.add_column("호출", justify="right")
+    table.add_column("합계", justify="right")
+    table.add_column("평균", justify="right")
+    table.add_column("p50", justify="right")
+    table.add_column("p99", justify="right")
+    table.add_column("최대", justify="right", style="yellow")
+    for stage, stats in snapshot.items():
+        table.add_row(stage, f"{stats['count']:,}", f"{stats['total_seconds'] * 1000:.1f}",
+                      f"{stats['mean_seconds'] * 1000:.3f}", f"{stats['p50_seconds'] * 1000:.3f}",
+                      f"{stats['p99_seconds'] * 1000:.3f}", f"{stats['max_seconds'] * 1000:.3f}")
+    console.print(table)
+
+    if output:
+        profiler.dump(output, fmt)
+        console.print(f"[green]✅ 단계별 통계를 {output}에 저장했습니다.[/green]")
+
+
+def read_stream_records(stream, fmt: str, text_field: str) -> Iterator[Dict]:
+    """입력 스트림에서 레코드를 하나씩 읽기 (jsonl / csv / lines)"""
+    if fmt == 'csv':
+        for row in csv.DictReader(stream):
+            if row.get(text_field):
+                yield row
+        return
+
+    for line_no, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+
+        if fmt == 'lines':
+            yield {text_field: line}
+            continue
+
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            console.print(f"[yellow]⚠️ {line_no}번째 줄 JSON 파싱 실패, 건너뜁니다: {e}[/yellow]")
+            continue
+
+        if isinstance(record, str):
+            record = {text_field: record}
+        if isinstance(record, dict) and record.get(text_field):
+            yield record
+        else:
+            console.print(f"[yellow]⚠️ {line_no}번째 줄에 '{text_field}' 필드가 없어 건너뜁니다.[/yellow]")
+
+
+def detect_stream_format(path: Optional[str]) -> str:
+    """파일 확장자로 입력 형식 추정 (표준 입력은 한 줄에 광고 하나)"""
+    ext = os.path.splitext(path or '')[1].lower()
+    if ext in ('.jsonl', '.ndjson'):
+        return 'jsonl'
+    if ext == '.csv':
+        return 'csv'
+    return 'lines'
+
+
+def run_stream_analysis(args):
+    """비대화형 스트리밍 분석: 레코드마다 분석 결과를 JSON 한 줄로 출력"""
+    # 표준 출력은 결과 전용, 안내 메시지는 표준 에러로
+    console.file = sys.stderr
+    sys.stdout.reconfigure(encoding='utf-8')
+
+    fmt = args.format or detect_stream_format(args.input)
+    if args.input in (None, '-'):
+        sys.stdin.reconfigure(encoding='utf-8')
+        stream = sys.stdin
+    else:
+        stream = open(args.input, 'r', encoding='utf-8-sig', newline='' if fmt == 'csv' else None)
+
+    analyzer = AdvancedSentimentAnalyzer(cache_size=args.cache_size, cache_path=args.cache_file)
+
+    try:
+        # 레코드와 텍스트를 나눠 흘려보냄 (tee 버퍼는 처리 중인 청크 수만큼만 유지)
+        records, texts = itertools.tee(read_stream_records(stream, fmt, args.text_field))
+        texts = (record[args.text_field] for record in texts)
+        results = analyzer.iter_analyze_many(texts, workers=args.workers, chunksize=args.chunksize)
+
+        for record, result in zip(records, results):
+            record['sentiment_analysis'] = result
+            sys.stdout.write(json.dumps(record, ensure_ascii=False, default=json_default) + '\n')
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # `| head` 등으로 출력이 먼저 닫힌 경우
+        sys.stdout = open(os.devnull, 'w')
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+        if analyzer.cache is not None:
+            analyzer.cache.close()
+            stats = analyzer.cache.stats()
+            console.print(f"[dim]분석 캐시: 적중 {stats['hits'] + stats['disk_hits']:,}회"
+                          f" (디스크 {stats['disk_hits']:,}회), 새로 분석 {stats['misses']:,}회,"
+                          f" 적중률 {stats['hit_rate']:.0%}[/dim]")
+
+
+def default_data_file() -> str:
+    """평가 기록 파일 경로 (스크립트와 같은 폴더의 ad_data.json)"""
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), "ad_data.json")
+
+
+def run_compaction(args):
+    """저널을 스냅샷(ad_data.json)으로 합치고 비우기 (SQLite 저장소면 파일 공간 정리)"""
+    store = open_rating_store(default_data_file())
+    store.compact()
+    console.print(f"[green]✅ 평가 기록 {store.count()}개를 정리했습니다.[/green]")
+
+
+def run_sqlite_migration(args):
+    """ad_data.json(+저널)을 SQLite 저장소로 옮기기"""
+    data_file = default_data_file()
+    try:
+        count = migrate_to_sqlite(data_file)
+    except FileExistsError as e:
+        console.print(f"[yellow]⚠️ {e}[/yellow]")
+        return
+    sqlite_path = os.path.splitext(data_file)[0] + SQLITE_SUFFIX
+    console.print(f"[green]✅ 평가 기록 {count}개를 {sqlite_path}로 옮겼습니다.[/green]")
+    console.print("[dim]이제부터는 SQLite 저장소를 사용합니다. 기존 JSON 파일은 백업으로 남겨 둡니다.[/dim]")
+
+
+def find_rating_histories(paths: List[str]) -> List[str]:
+    """평가 기록 파일 목록 (디렉터리는 하위의 *.json 파일을 모두 찾음)"""
+    histories = []
+    for path in paths:
+        if not os.path.isdir(path):
+            histories.append(path)
+            continue
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                # 색인·집계 캐시 파일은 평가 기록이 아니므로 제외
+                if filename.endswith('.json') and not filename.endswith(('.tfidf.json', AGGREGATES_SUFFIX)):
+                    histories.append(os.path.join(dirpath, filename))
+    return histories
+
+
+def iter_batch_recommendations(catalog_index: CatalogTfidfIndex, histories: Iterable[Tuple[str, List[str]]],
+                               top_n: int = 10, chunk_size: int = 1000) -> Iterator[Tuple[str, np.ndarray, np.ndarray]]:
+    """(사용자, 좋아한 문구 목록)마다 추천 상위 top_n개 (사용자, 카탈로그 행 번호 배열, 유사도 배열)
+
+    chunk_size명씩 프로필 행렬 하나로 묶어 카탈로그와 희소 행렬 곱 한 번으로 점수를 구하므로,
+    메모리는 청크 크기만큼만 쓰고 사용자마다 벡터라이저를 다시 학습하지 않습니다.
+    """
+    for chunk in _chunked(histories, chunk_size):
+        users = [user for user, _ in chunk]
+        profiles = catalog_index.profiles([texts for _, texts in chunk])
+        for user, (indices, similarities) in zip(users, catalog_index.top_k(profiles, top_n, threshold=0.1)):
+            yield user, indices, similarities
+
+
+def run_batch_recommendation(args):
+    """여러 평가 기록 파일에 대해 사용자별 추천 목록을 JSON Lines로 출력"""
+    console.file = sys.stderr
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    catalog_file = args.catalog or os.path.join(script_dir, "ad_copy_database.json")
+    with open(catalog_file, 'r', encoding='utf-8') as f:
+        ad_copy_database = json.load(f)
+    catalog_index = CatalogTfidfIndex(catalog_file, [copy['text'] for copy in ad_copy_database])
+
+    histories = find_rating_histories(args.inputs)
+    skipped = []
+    unreadable = []
+
+    def liked_texts():
+        # 대화형 추천과 같은 기준: 평가 3개 이상, 7점 이상인 광고
+        # 입력 파일은 읽기만 함 (형식 변환·집계 파일 저장 없음)
+        for path in histories:
+            try:
+                ratings = read_rating_history(path)
+            except (OSError, ValueError, KeyError, TypeError, IndexError, sqlite3.Error) as e:
+                console.print(f"[yellow]⚠️ 평가 기록을 읽지 못했습니다: {path} ({e})[/yellow]")
+                unreadable.append(path)
+                continue
+            texts = [text for text, rating in ratings if rating >= 7] if len(ratings) >= 3 else []
+            if texts:
+                yield path, texts
+            else:
+                skipped.append(path)
+
+    if args.output:
+        out = open(args.output, 'w', encoding='utf-8')
+    else:
+        sys.stdout.reconfigure(encoding='utf-8')
+        out = sys.stdout
+
+    written = 0
+    try:
+        for user, indices, similarities in iter_batch_recommendations(
+                catalog_index, liked_texts(), top_n=args.top_n, chunk_size=args.chunk_size):
+            recommendations = [
+                {'text': ad_copy_database[idx]['text'],
+                 'category': ad_copy_database[idx].get('category', '기타'),
+                 'similarity': round(similarity, 6)}
+                for idx, similarity in zip(indices.tolist(), similarities.tolist())
+            ]
+            out.write(json.dumps({'user': user, 'recommendations': recommendations}, ensure_ascii=False) + '\n')
+            written += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    console.print(f"[green]✅ 사용자 {written}명의 추천 목록을 만들었습니다.[/green]")
+    if skipped:
+        console.print(f"[dim]평가가 부족하거나 7점 이상 광고가 없어 건너뛴 기록: {len(skipped)}개[/dim]")
+    if unreadable:
+        console.print(f"[yellow]평가 기록 형식이 아니어서 건너뛴 파일: {len(unreadable)}개[/yellow]")
+
+
+# 로컬 HTTP 분석 서비스 기본값
+SERVE_DEFAULT_HOST = "127.0.0.1"
+SERVE_DEFAULT_PORT = 8765
+
+# 마이크로 배치: 한 번에 처리하는 최대 요청 수, 첫 요청 뒤 더 모으는 시간(ms)
+SERVE_MAX_BATCH = 64
+SERVE_BATCH_WAIT_MS = 2.0
+
+# 엔드포인트별 대기열 길이 (가득 차면 503으로 바로 거절), 요청 본문 최대 크기
+SERVE_MAX_PENDING = 1024
+SERVE_MAX_BODY = 1 << 20
+
+# 유사 광고·추천 요청의 최대 top_n, p50/p99 계산에 쓰는 엔드포인트별 최근 표본 수
+SERVE_MAX_TOP_N = 100
+LATENCY_WINDOW = 10_000
+
+HTTP_REASONS = {
+    200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    413: "Payload Too Large", 500: "Internal Server Error", 501: "Not Implemented",
+    503: "Service Unavailable",
+}
+
+
+class ServiceError(Exception):
+    """HTTP 상태 코드와 함께 클라이언트에 돌려줄 오류"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class LatencyStats:
+    """엔드포인트별 요청·오류 수와 최근 LATENCY_WINDOW개 요청의 지연 시간 분위수"""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.window = window
+        self.samples: Dict[str, deque] = {}
+        self.requests: Counter = Counter()
+        self.errors: Counter = Counter()
+
+    def record(self, endpoint: str, seconds: float, failed: bool = False):
+        """요청 하나의 처리 시간 기록 (대기열에서 기다린 시간 포함)"""
+        samples = self.samples.get(endpoint)
+        if samples is None:
+            samples = self.samples[endpoint] = deque(maxlen=self.window)
+        samples.append(seconds)
+        self.requests[endpoint] += 1
+        self.errors[endpoint] += failed
+
+    @staticmethod
+    def percentile(ordered: List[float], q: float) -> float:
+        """정렬된 표본의 분위수 (최근접 순위)"""
+        return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """{엔드포인트: 요청 수, 오류 수, p50/p99/최대 지연 시간(ms)}"""
+        stats = {}
+        for endpoint, samples in self.samples.items():
+            ordered = sorted(samples)
+            stats[endpoint] = {
+                'requests': self.requests[endpoint],
+                'errors': self.errors[endpoint],
+                'p50_ms': round(self.percentile(ordered, 0.5) * 1000, 3),
+                'p99_ms': round(self.percentile(ordered, 0.99) * 1000, 3),
+                'max_ms': round(ordered[-1] * 1000, 3),
+                'window': len(ordered),
+            }
+        return stats
+
+
+class MicroBatcher:
+    """동시에 들어온 요청을 모아 한 번에 처리하는 대기열
+
+    요청 항목은 크기가 제한된 asyncio 대기열에 넣고, 소비 태스크가 첫 항목이 온 뒤 max_wait초 동안
+    (또는 max_batch개가 찰 때까지) 더 모아 process(항목 목록) 코루틴에 넘깁니다.
+    동시에 처리하는 배치 수를 concurrency로 제한하므로 처리가 밀리면 대기열이 차고,
+    자리가 모자란 요청은 기다리지 않고 ServiceError(503)로 거절됩니다.
+    """
+
+    def __init__(self, name: str, process, max_batch: int = SERVE_MAX_BATCH,
+                 max_wait: float = SERVE_BATCH_WAIT_MS / 1000, max_pending: int = SERVE_MAX_PENDING,
+                 concurrency: int = 1):
+        self.name = name
+        self.process = process
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.queue = asyncio.Queue(max_pending)
+        self.slots = asyncio.Semaphore(concurrency)
+        self.batches = 0
+        self.items = 0
+        self.rejected = 0
+        self._consumer = None
+        self._inflight = set()
+
+    def start(self):
+        self._consumer = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        """소비 태스크를 멈추고 처리 중인 배치가 끝나기를 기다림"""
+        if self._consumer is not None:
+            self._consumer.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._consumer
+        await asyncio.gather(*self._inflight, return_exceptions=True)
+
+    async def submit_many(self, items: List[Any]) -> List[Any]:
+        """항목들을 대기열에 넣고 결과를 입력 순서대로 기다림 (자리가 모자라면 503)"""
+        if self.queue.maxsize - self.queue.qsize() < len(items):
+            self.rejected += 1
+            raise ServiceError(503, f"{self.name} 요청이 밀려 있습니다. 잠시 후 다시 시도하세요.")
+        loop = asyncio.get_running_loop()
+        futures = []
+        for item in items:
+            future = loop.create_future()
+            self.queue.put_nowait((item, future))
+            futures.append(future)
+        return list(await asyncio.gather(*futures))
+
+    async def submit(self, item: Any) -> Any:
+        return (await self.submit_many([item]))[0]
+
+    async def _run(self):
+        while True:
+            await self.slots.acquire()
+            batch = [await self.queue.get()]
+            # 배치가 차지 않았으면 잠깐 더 모음 (동시에 들어온 요청이 한 배치로 묶이도록)
+            if self.queue.qsize() < self.max_batch - 1 and self.max_wait > 0:
+                await asyncio.sleep(self.max_wait)
+            while len(batch) < self.max_batch and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+
+            task = asyncio.ensure_future(self._dispatch(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _dispatch(self, batch: List[Tuple[Any, Any]]):
+        try:
+            results = await self.process([item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for (_, future), result in zip(batch, results):
+                if not future.done():  # 클라이언트가 먼저 끊은 요청은 건너뜀
+                    future.set_result(result)
+        finally:
+            self.slots.release()
+            self.batches += 1
+            self.items += len(batch)
+
+    def stats(self) -> Dict[str, Any]:
+        """대기 중인 요청 수, 처리한 배치 수와 평균 배치 크기, 거절한 요청 수"""
+        return {
+            'pending': self.queue.qsize(),
+            'batches': self.batches,
+            'mean_batch_size': round(self.items / self.batches, 2) if self.batches else 0.0,
+            'rejected': self.rejected,
+        }
+
+
+async def read_http_request(reader) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+    """HTTP/1.1 요청 하나 읽기: (메서드, 경로, 헤더, 본문), 연결이 닫혔으면 None"""
+    try:
+        head = await reader.readuntil(b'\r\n\r\n')
+    except asyncio.IncompleteReadError as e:
+        if not e.partial.strip():
+            return None
+        raise ServiceError(400, "요청 헤더가 끝나기 전에 연결이 닫혔습니다.")
+    except asyncio.LimitOverrunError:
+        raise ServiceError(400, "요청 헤더가 너무 깁니다.")
+
+    lines = head.decode('latin-1').split('\r\n')
+    parts = lines[0].split(' ')
+    if len(parts) != 3 or not parts[2].startswith('HTTP/'):
+        raise ServiceError(400, "잘못된 요청 줄입니다.")
+    method, target, _ = parts
+
+    headers = {}
+    for line in lines[1:]:
+        name, sep, value = line.partition(':')
+        if sep:
+            headers[name.strip().lower()] = value.strip()
+
+    if headers.get('transfer-encoding', 'identity').lower() != 'identity':
+        raise ServiceError(501, "Transfer-Encoding은 지원하지 않습니다. Content-Length를 사용하세요.")
+    try:
+        length = int(headers.get('content-length') or 0)
+    except ValueError:
+        raise ServiceError(400, "Content-Length가 올바르지 않습니다.")
+    if length < 0:
+        raise ServiceError(400, "Content-Length가 올바르지 않습니다.")
+    if length > SERVE_MAX_BODY:
+        raise ServiceError(413, f"요청 본문은 {SERVE_MAX_BODY:,}바이트까지 보낼 수 있습니다.")
+
+    try:
+        body = await reader.readexactly(length) if length else b''
+    except asyncio.IncompleteReadError:
+        raise ServiceError(400, "요청 본문이 끝나기 전에 연결이 닫혔습니다.")
+    return method.upper(), target.split('?', 1)[0], headers, body
+
+
+def http_response(status: int, payload: Any, keep_alive: bool = True) -> bytes:
+    """JSON 본문을 담은 HTTP/1.1 응답 바이트"""
+    body = json.dumps(payload, ensure_ascii=False, default=json_default).encode('utf-8')
+    head = [
+        f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}",
+        "Content-Type: application/json; charset=utf-8",
+        f"Content-Length: {len(body)}",
+        f"Connection: {'keep-alive' if keep_alive else 'close'}",
+    ]
+    if status == 503:
+        head.append("Retry-After: 1")
+    return ('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + body
+
+
+def _request_top_n(payload: Dict, default: int) -> int:
+    """요청의 top_n (1 ~ SERVE_MAX_TOP_N 정수, 없으면 default)"""
+    top_n = payload.get('top_n', default)
+    if isinstance(top_n, bool) or not isinstance(top_n, int) or not 1 <= top_n <= SERVE_MAX_TOP_N:
+        raise ServiceError(400, f"top_n은 1부터 {SERVE_MAX_TOP_N} 사이의 정수여야 합니다.")
+    return top_n
+
+
+def _request_text(payload: Dict, field: str = 'text') -> str:
+    """요청의 문자열 필드 (없거나 문자열이 아니면 400)"""
+    text = payload.get(field)
+    if not isinstance(text, str):
+        raise ServiceError(400, f"'{field}' 필드(문자열)가 필요합니다.")
+    return text
+
+
+class AnalysisService:
+    """analyze_text·find_similar_ads·recommend_personalized_copies를 HTTP/JSON으로 제공하는 로컬 서비스
+
+    감성사전과 유사 광고·광고 카피 DB 색인은 시작할 때 한 번 준비해 두고 계속 재사용합니다.
+    분석 요청은 마이크로 배치로 묶어 analyze_batch로 처리합니다 (workers가 2 이상이면 공유 감성사전을
+    매핑한 프로세스 풀, 아니면 분석 스레드 하나). 유사 광고·추천은 평가 기록을 다루는 스레드 하나에서
+    배치 단위로 처리하며, 추천은 배치 안의 요청이 같은 취향 프로필을 쓰므로 한 번만 계산합니다.
+
+        POST /analyze    {"text": "..."} 또는 {"texts": ["...", ...]}
+        POST /similar    {"text": "...", "top_n": 3}
+        POST /recommend  {"top_n": 10}
+        GET  /stats      엔드포인트별 요청 수와 p50/p99 지연 시간, 대기열 상태
+        GET  /health
+    """
+
+    def __init__(self, app_factory, workers: int = 1, max_batch: int = SERVE_MAX_BATCH,
+                 batch_wait_ms: float = SERVE_BATCH_WAIT_MS, max_pending: int = SERVE_MAX_PENDING):
+        # app_factory: AdPreferenceAnalyzer를 만드는 함수 (SQLite 연결은 만든 스레드에서만 쓸 수 있으므로
+        # 평가 기록을 다루는 스레드 안에서 호출)
+        self.app_factory = app_factory
+        self.app: Optional[AdPreferenceAnalyzer] = None
+        self.workers = max(1, workers)
+        self.max_batch = max_batch
+        self.batch_wait = batch_wait_ms / 1000
+        self.max_pending = max_pending
+        self.stats = LatencyStats()
+        self.analyzer = None
+        self.app_thread = None
+        self.pool = None
+        self.batchers: Dict[str, MicroBatcher] = {}
+        self.started = None
+        self.routes = {
+            '/analyze': ('POST', self.handle_analyze),
+            '/similar': ('POST', self.handle_similar),
+            '/recommend': ('POST', self.handle_recommend),
+            '/stats': ('GET', self.handle_stats),
+            '/health': ('GET', self.handle_health),
+        }
+
+    def warm_up(self) -> AdvancedSentimentAnalyzer:
+        """앱을 만들고 감성사전, 구 매처, 유사 광고 색인, 광고 카피 DB 색인을 미리 준비 (첫 요청이 느려지지 않도록)"""
+        self.app = self.app_factory()
+        analyzer = self.app.sentiment_analyzer
+        analyzer.analyze_batch([""])
+        self.app.get_similarity_index()
+        if self.app.approximate_similar:
+            self.app.get_lsh_index()
+        if self.app.ad_copy_database:
+            self.app.get_catalog_index()
+        return analyzer
+
+    async def start(self):
+        """색인을 준비하고 워커 풀과 배치 대기열 시작"""
+        loop = asyncio.get_running_loop()
+        # 평가 기록·색인은 이 스레드에서만 만들고 다룸
+        self.app_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="lfair-app")
+        self.analyzer = await loop.run_in_executor(self.app_thread, self.warm_up)
+
+        if self.workers > 1:
+            self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_analysis_worker,
+                                            initargs=self.analyzer.worker_initargs())
+            await asyncio.gather(*(loop.run_in_executor(self.pool, _analyze_chunk, [""])
+                                   for _ in range(self.workers)))
+        else:
+            self.pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="lfair-analysis")
+
+        options = dict(max_batch=self.max_batch, max_wait=self.batch_wait, max_pending=self.max_pending)
+        self.batchers = {
+            'analyze': MicroBatcher('analyze', self.process_analyze, concurrency=self.workers, **options),
+            'similar': MicroBatcher('similar', self.process_similar, **options),
+            'recommend': MicroBatcher('recommend', self.process_recommend, **options),
+        }
+        for batcher in self.batchers.values():
+            batcher.start()
+        self.started = time.monotonic()
+
+    async def close(self):
+        for batcher in self.batchers.values():
+            await batcher.stop()
+        if self.pool is not None:
+            self.pool.shutdown()
+        if self.app_thread is not None:
+            self.app_thread.shutdown()
+
+    async def process_analyze(self, texts: List[str]) -> List[Optional[SentimentResult]]:
+        """분석 배치: 프로세스 풀이면 캐시에 없는 문구만 워커에 보냄"""
+        if self.workers == 1:
+            return await asyncio.get_running_loop().run_in_executor(self.pool, self.analyzer.analyze_batch, texts)
+        results, missing, future = self.analyzer._submit_chunk(self.pool, texts)
+        if future is not None:
+            await asyncio.wrap_future(future)
+        return self.analyzer._collect_chunk(results, missing, future)
+
+    async def process_similar(self, queries: List[Tuple[str, int]]) -> List[List[Tuple[Dict, float]]]:
+        def run():
+            return [self.app.find_similar_ads(text, top_n=top_n) for text, top_n in queries]
+        return await asyncio.get_running_loop().run_in_executor(self.app_thread, run)
+
+    async def process_recommend(self, top_ns: List[int]) -> List[List[Tuple[Dict, float, str]]]:
+        recommendations = await asyncio.get_running_loop().run_in_executor(
+            self.app_thread, self.app.recommend_personalized_copies, max(top_ns))
+        return [recommendations[:top_n] for top_n in top_ns]
+
+    async def handle_analyze(self, payload: Dict) -> Dict:
+        if 'texts' in payload:
+            texts = payload['texts']
+            if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+                raise ServiceError(400, "'texts' 필드는 문자열 목록이어야 합니다.")
+            if len(texts) > self.max_pending:
+                raise ServiceError(400, f"'texts'는 한 번에 {self.max_pending}개까지 보낼 수 있습니다.")
+            return {'results': await self.batchers['analyze'].submit_many(texts)}
+        return {'result': await self.batchers['analyze'].submit(_request_text(payload))}
+
+    async def handle_similar(self, payload: Dict) -> Dict:
+        query = (_request_text(payload), _request_top_n(payload, 3))
+        similar = await self.batchers['similar'].submit(query)
+        return {'similar_ads': [{'ad': ad, 'similarity': round(similarity, 6)} for ad, similarity in similar]}
+
+    async def handle_recommend(self, payload: Dict) -> Dict:
+        recommendations = await self.batchers['recommend'].submit(_request_top_n(payload, 10))
+        return {'recommendations': [dict(copy, similarity=round(similarity, 6), reason=reason)
+                                    for copy, similarity, reason in recommendations]}
+
+    async def handle_stats(self, payload: Dict) -> Dict:
+        return {
+            'uptime_seconds': round(time.monotonic() - self.started, 3),
+            'workers': self.workers,
+            'endpoints': self.stats.snapshot(),
+            'queues': {name: batcher.stats() for name, batcher in self.batchers.items()},
+        }
+
+    async def handle_health(self, payload: Dict) -> Dict:
+        return {'status': 'ok'}
+
+    async def dispatch(self, method: str, path: str, body: bytes) -> Tuple[int, Dict]:
+        """요청 하나 처리: (상태 코드, 응답 JSON)"""
+        route = self.routes.get(path)
+        if route is None:
+            return 404, {'error': f"알 수 없는 경로입니다: {path}"}
+        if method != route[0]:
+            return 405, {'error': f"{path}는 {route[0]} 요청만 받습니다."}
+
+        start = time.perf_counter()
+        status = 200
+        try:
+            payload = json.loads(body) if body.strip() else {}
+            if not isinstance(payload, dict):
+                raise ServiceError(400, "요청 본문은 JSON 객체여야 합니다.")
+            response = await route[1](payload)
+        except ServiceError as e:
+            status, response = e.status, {'error': str(e)}
+        except ValueError as e:
+            status, response = 400, {'error': f"JSON 파싱 실패: {e}"}
+        except Exception as e:
+            console.print(f"[red]⚠️ {path} 처리 오류: {e}[/red]")
+            status, response = 500, {'error': str(e)}
+        self.stats.record(path, time.perf_counter() - start, failed=status >= 500)
+        return status, response
+
+    async def handle_connection(self, reader, writer):
+        """연결 하나에서 요청을 차례로 처리 (HTTP/1.1 keep-alive)"""
+        try:
+            while True:
+                try:
+                    request = await read_http_request(reader)
+                except ServiceError as e:
+                    writer.write(http_response(e.status, {'error': str(e)}, keep_alive=False))
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+
+                method, path, headers, body = request
+                status, response = await self.dispatch(method, path, body)
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                writer.write(http_response(status, response, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = SERVE_DEFAULT_HOST, port: int = SERVE_DEFAULT_PORT):
+        """서비스를 시작하고 취소될 때까지 요청 처리"""
+        await self.start()
+        try:
+            server = await asyncio.start_server(self.handle_connection, host, port)
+            address = server.sockets[0].getsockname()
+            console.print(f"[green]✅ 분석 서비스 시작: http://{address[0]}:{address[1]}"
+                          f" (워커 {self.workers}개, Ctrl+C로 종료)[/green]")
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.close()
+
+
+def run_service(args):
+    """로컬 HTTP 분석 서비스 실행"""
+    console.file = sys.stderr
+    app_factory = functools.partial(AdPreferenceAnalyzer, approximate_similar=args.approximate_similar,
+                                    lsh_bands=args.lsh_bands, lsh_rows=args.lsh_rows)
+    service = AnalysisService(app_factory, workers=args.workers, max_batch=args.max_batch,
+                              batch_wait_ms=args.batch_wait_ms, max_pending=args.max_pending)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        console.print("[dim]분석 서비스를 종료합니다.[/dim]")
+
+
+# 대화형 메뉴의 첫 프롬프트까지 목표 시간 (ms), 시작할 때 가져오면 안 되는 무거운 라이브러리
+STARTUP_TARGET_MS = 500
+HEAVY_MODULES = ('numpy', 'scipy', 'sklearn')
+
+# 새 인터프리터에서 main2를 가져와 메뉴 직전까지 초기화하는 측정 스크립트
+# (평가 기록은 인자로 받은 임시 복사본을 읽으므로 측정 중에 실제 기록이 변환·정리되지 않음)
+STARTUP_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import main2
+main2.console.quiet = True
+main2.default_data_file = lambda: sys.argv[1]
+app = main2.AdPreferenceAnalyzer()
+ready = time.perf_counter() - start
+heavy = [name for name in main2.HEAVY_MODULES if name in sys.modules]
+app.sentiment_analyzer
+print(json.dumps({'first_prompt': ready, 'lexicon_ready': time.perf_counter() - start, 'heavy': heavy}))
+"""
+
+
+def parse_import_times(report: str) -> List[Tuple[str, int, int, int]]:
+    """`-X importtime` 출력에서 (모듈, 중첩 깊이, 자체 시간 µs, 누적 시간 µs) 목록"""
+    rows = []
+    for line in report.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return rows
+
+
+def run_startup_report(args):
+    """새 프로세스로 시작 시간을 재서 모듈별 import 시간과 첫 프롬프트까지 걸린 시간 출력"""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    data_file = default_data_file()
+    base = os.path.splitext(data_file)[0]
+    with tempfile.TemporaryDirectory() as workdir:
+        # 평가 기록 파일(스냅샷, 저널, SQLite, 집계)을 임시 폴더에 복사해 측정
+        probe_data_file = os.path.join(workdir, os.path.basename(data_file))
+        for path in (data_file, base + JOURNAL_SUFFIX, base + SQLITE_SUFFIX, base + AGGREGATES_SUFFIX):
+            if os.path.exists(path):
+                shutil.copy2(path, os.path.join(workdir, os.path.basename(path)))
+        proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', STARTUP_PROBE, probe_data_file],
+                              cwd=script_dir, capture_output=True, text=True, encoding='utf-8')
+    if proc.returncode != 0:
+        console.print(f"[red]⚠️ 시작 시간 측정 실패:[/red]\n{proc.stderr[-2000:]}")
+        sys.exit(1)
+    timings = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    # 최상위 패키지별 자체 시간 합 (rich, json, main2 ...)
+    packages: Dict[str, List[int]] = {}
+    for name, _, self_us, _ in parse_import_times(proc.stderr):
+        totals = packages.setdefault(name.split('.')[0], [0, 0])
+        totals[0] += self_us
+        totals[1] += 1
+    total_us = sum(self_us for self_us, _ in packages.values())
+
+    table = Table(title="📦 패키지별 import 시간", box=box.ROUNDED)
+    table.add_column("패키지", style="cyan", no_wrap=True)
+    table.add_column("시간(ms)", justify="right", style="yellow")
+    table.add_column("모듈 수", justify="right")
+    table.add_column("비율", justify="right")
+    for package, (self_us, modules) in sorted(packages.items(), key=lambda x: x[1][0], reverse=True)[:args.top]:
+        table.add_row(package, f"{self_us / 1000:.1f}", str(modules), f"{self_us / total_us:.0%}" if total_us else "-")
+    console.print(table)
+
+    first_prompt_ms = timings['first_prompt'] * 1000
+    console.print(f"[bold]전체 import:[/bold] {total_us / 1000:.1f}ms")
+    console.print(f"[bold]첫 프롬프트까지:[/bold] {first_prompt_ms:.1f}ms (목표 {args.target_ms}ms)")
+    console.print(f"[bold]감성사전 준비까지:[/bold] {timings['lexicon_ready'] * 1000:.1f}ms (백그라운드 로드)")
+    if timings['heavy']:
+        console.print(f"[yellow]⚠️ 시작할 때 무거운 라이브러리를 가져왔습니다: {', '.join(timings['heavy'])}[/yellow]")
+
+    if first_prompt_ms > args.target_ms:
+        console.print("[red]❌ 첫 프롬프트까지 걸린 시간이 목표를 넘었습니다.[/red]")
+        sys.exit(1)
+    console.print("[green]✅ 목표 시간 안에 시작합니다.[/green]")
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    """명령행 인자 정의 (인자가 없으면 대화형 메뉴 실행)"""
+    parser = argparse.ArgumentParser(description="AI 광고 취향 분석기 (CLI)")
+    parser.add_argument('--approximate-similar', action='store_true',
+                        help="유사 광고 찾기에 근사 색인(MinHash LSH) 사용 (평가 기록이 아주 많을 때)")
+    parser.add_argument('--lsh-bands', type=int, default=LSH_DEFAULT_BANDS,
+                        help=f"LSH 밴드 수, 늘리면 재현율과 질의 시간이 함께 증가 (기본값: {LSH_DEFAULT_BANDS})")
+    parser.add_argument('--lsh-rows', type=int, default=LSH_DEFAULT_ROWS,
+                        help=f"LSH 밴드당 해시 수, 늘리면 후보가 줄고 재현율도 감소 (기본값: {LSH_DEFAULT_ROWS})")
+    parser.add_argument('--profile', action='store_true',
+                        help="분석·추천 단계별 처리 시간을 재서 끝날 때 요약 표 출력 (병렬 워커 안의 단계는 제외)")
+    parser.add_argument('--profile-output', metavar='FILE',
+                        help="단계별 통계 저장 파일 (--profile 포함, .prom/.txt는 Prometheus 형식, 그 외는 JSON)")
+    parser.add_argument('--profile-format', choices=['json', 'prometheus'],
+                        help="통계 파일 형식 (기본값: 확장자로 추정)")
+    subparsers = parser.add_subparsers(dest='command')
+
+    analyze_parser = subparsers.add_parser('analyze', help="광고 문구를 스트리밍으로 일괄 분석 (JSON Lines 출력)")
+    analyze_parser.add_argument('input', nargs='?', help="입력 파일 경로 (생략하거나 '-'이면 표준 입력)")
+    analyze_parser.add_argument('--format', choices=['jsonl', 'csv', 'lines'],
+                                help="입력 형식 (기본값: 확장자로 추정, 표준 입력은 lines)")
+    analyze_parser.add_argument('--text-field', default='text', help="jsonl/csv에서 광고 문구가 담긴 필드 (기본값: text)")
+    analyze_parser.add_argument('--workers', type=int, default=1, help="병렬 워커 프로세스 수 (기본값: 1)")
+    analyze_parser.add_argument('--chunksize', type=int, default=64, help="워커에 한 번에 넘기는 문구 수 (기본값: 64)")
+    analyze_parser.add_argument('--cache-size', type=int, default=4096,
+                                help="같은 문구 분석 결과를 기억할 개수, 0이면 메모리 캐시 끔 (기본값: 4096)")
+    analyze_parser.add_argument('--cache-file', help="분석 결과를 SQLite 파일에도 저장해 다음 실행에서 재사용")
+
+    subparsers.add_parser('compact', help="평가 저널을 ad_data.json 스냅샷으로 합치기")
+    subparsers.add_parser('migrate-sqlite', help="ad_data.json 평가 기록을 SQLite 저장소(ad_data.sqlite3)로 옮기기")
+
+    batch_parser = subparsers.add_parser('recommend-batch', help="여러 평가 기록 파일의 사용자별 추천 목록을 한 번에 계산 (JSON Lines 출력)")
+    batch_parser.add_argument('inputs', nargs='+', help="평가 기록 파일(ad_data.json 형식) 또는 그런 파일이 담긴 디렉터리")
+    batch_parser.add_argument('--output', '-o', help="결과 파일 경로 (생략하면 표준 출력)")
+    batch_parser.add_argument('--top-n', type=int, default=10, help="사용자당 추천 수 (기본값: 10)")
+    batch_parser.add_argument('--chunk-size', type=int, default=1000, help="한 번의 행렬 곱으로 처리할 사용자 수 (기본값: 1000)")
+    batch_parser.add_argument('--catalog', help="광고 카피 DB 경로 (기본값: 스크립트 폴더의 ad_copy_database.json)")
+
+    serve_parser = subparsers.add_parser('serve', help="분석·유사 광고·추천을 로컬 HTTP/JSON 서비스로 제공")
+    serve_parser.add_argument('--host', default=SERVE_DEFAULT_HOST, help=f"바인딩 주소 (기본값: {SERVE_DEFAULT_HOST})")
+    serve_parser.add_argument('--port', type=int, default=SERVE_DEFAULT_PORT,
+                              help=f"포트, 0이면 빈 포트 자동 선택 (기본값: {SERVE_DEFAULT_PORT})")
+    serve_parser.add_argument('--workers', type=int, default=1, help="분석 워커 프로세스 수 (기본값: 1, 서비스 프로세스에서 분석)")
+    serve_parser.add_argument('--max-batch', type=int, default=SERVE_MAX_BATCH,
+                              help=f"한 배치로 묶는 최대 요청 수 (기본값: {SERVE_MAX_BATCH})")
+    serve_parser.add_argument('--batch-wait-ms', type=float, default=SERVE_BATCH_WAIT_MS,
+                              help=f"첫 요청 뒤 배치를 더 모으는 시간 (기본값: {SERVE_BATCH_WAIT_MS}ms)")
+    serve_parser.add_argument('--max-pending', type=int, default=SERVE_MAX_PENDING,
+                              help=f"엔드포인트별 대기 요청 수 한도, 넘으면 503 응답 (기본값: {SERVE_MAX_PENDING})")
+
+    startup_parser = subparsers.add_parser('startup-report', help="시작 시간 진단 (모듈별 import 시간, 첫 프롬프트까지 걸린 시간)")
+    startup_parser.add_argument('--target-ms', type=int, default=STARTUP_TARGET_MS,
+                                help=f"첫 프롬프트까지 목표 시간, 넘으면 종료 코드 1 (기본값: {STARTUP_TARGET_MS})")
+    startup_parser.add_argument('--top', type=int, default=15, help="표시할 패키지 수 (기본값: 15)")
+
+    return parser
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+
+    # 계측은 요청했을 때만 설치 (꺼져 있으면 파이프라인 함수가 그대로 호출됨)
+    profiler = None
+    if args.profile or args.profile_output:
+        profiler = PipelineProfiler()
+        profiler.install()
+
+    try:
+        if args.command == 'analyze':
+            run_stream_analysis(args)
+        elif args.command == 'compact':
+            run_compaction(args)
+        elif args.command == 'migrate-sqlite':
+            run_sqlite_migration(args)
+        elif args.command == 'recommend-batch':
+            run_batch_recommendation(args)
+        elif args.command == 'serve':
+            run_service(args)
+        elif args.command == 'startup-report':
+            run_startup_report(args)
+        else:
+            analyzer = AdPreferenceAnalyzer(approximate_similar=args.approximate_similar,
+                                            lsh_bands=args.lsh_bands, lsh_rows=args.lsh_rows)
+            analyzer.main_menu()
+    finally:
+        if profiler is not None:
+            profiler.uninstall()
+            report_profile(profiler, args.profile_output, args.profile_format)
+
+
 if __name__ == "__main__":
-    analyzer = AdPreferenceAnalyzer()
-    analyzer.main_menu()
+    main()
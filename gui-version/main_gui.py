@@ -1,22 +1,593 @@
+from __future__ import annotations
+
+import bisect
+import functools
 import json
 import os
+import shutil
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox
 from datetime import datetime
 import re
-from typing import List, Dict, Tuple
+import sqlite3
+import sys
+import struct
+import subprocess
+import hashlib
+import importlib
+from array import array
+import itertools
+import queue
+import threading
+import time
+import unicodedata
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterable, Iterator, List, Dict, Sequence, Tuple, Optional
+
+
+class LazyModule:
+    """처음 속성에 접근할 때 실제로 import하는 모듈 자리표시자
+
+    가져온 뒤에는 namespace의 같은 이름을 실제 모듈로 바꿔 두므로 이후 접근에는 추가 비용이 없습니다.
+    """
+
+    def __init__(self, namespace: Dict[str, Any], alias: str, name: str):
+        self._namespace = namespace
+        self._alias = alias
+        self._name = name
+
+    def __getattr__(self, attr):
+        module = importlib.import_module(self._name)
+        self._namespace[self._alias] = module
+        return getattr(module, attr)
+
+
+# 텍스트 유사도 분석 및 머신러닝 (시작 시간을 줄이기 위해 처음 사용할 때 가져옴)
+np = LazyModule(globals(), 'np', 'numpy')
+sparse = LazyModule(globals(), 'sparse', 'scipy.sparse')
+sklearn_text = LazyModule(globals(), 'sklearn_text', 'sklearn.feature_extraction.text')
+
+
+# 컴파일된 감성사전 캐시 포맷
+# 헤더: 매직, 포맷 버전, 원본 크기, 원본 mtime(ns), 원본 SHA-1,
+#       단어 수, 단어 블롭 길이, 어근 블롭 길이, 어근 색인 크기, 어근 색인 블롭 길이
+# 본문: 극성 배열(int8 × 단어 수) + '\n'으로 이어 붙인 UTF-8 단어 블롭 + 같은 순서의 어근 블롭
+#       + 어근 색인 극성 배열 + 어근 색인 키 블롭
+LEXICON_CACHE_SUFFIX = ".lexcache"
+LEXICON_CACHE_MAGIC = b"KNUL"
+LEXICON_CACHE_VERSION = 3
+LEXICON_CACHE_HEADER = struct.Struct("<4sIQQ20sIIIII")
+
+# 단어 토큰 패턴 (한글, 영어)
+WORD_PATTERN = re.compile(r'[가-힣]+|[a-zA-Z]+')
+
+# 어근 색인에 넣을 최소 어근 길이 (한 글자 어근은 접두사로 쓰면 오탐이 많음)
+MIN_STEM_LENGTH = 2
+
+# 표제어가 아닌 (용언) 어근의 최소 길이: "바르"+"는", "놀라"+"운"처럼 두 글자 용언 어근은
+# 다른 낱말의 활용형과 겹치는 경우가 많아 정확히 일치하는 표제어로만 찾음
+MIN_PREDICATE_STEM_LENGTH = 3
+
+# 어근 뒤에 붙을 수 있는 어미·조사 (나머지가 이 중 하나일 때만 어근 색인으로 인정)
+STEM_ENDINGS = frozenset([
+    '',
+    # 조사
+    '이', '가', '은', '는', '을', '를', '의', '에', '에서', '에게', '께', '으로', '로', '와', '과',
+    '도', '만', '까지', '부터', '보다', '처럼', '이나', '나', '이며', '이고', '이다', '이라', '이에요',
+    '입니다', '들', '들이', '들은', '들을', '들의', '들도',
+    # 어미
+    '다', '고', '게', '게도', '지', '며', '면', '서', '니', '네', '요', '죠', '기', '기에', '음', '던',
+    '어', '아', '여', '어서', '아서', '어야', '아야', '었', '았', '었다', '았다', '었던', '았던',
+    '어요', '아요', '습니다', '거나', '라', '으니', '으면', '으며', '은데', '는데',
+    # -하다/-되다/-스럽다/-롭다/-적 파생
+    '하다', '한', '할', '함', '함을', '함이', '하는', '하고', '하게', '하며', '하면', '하여', '하지',
+    '하기', '해', '해서', '해요', '했', '했다', '했던', '합니다', '되다', '된', '되는', '되어', '돼',
+    '스럽다', '스러운', '스럽게', '스러움', '롭다', '로운', '롭게', '로움', '적', '적인', '적으로'
+])
+
+
+def _file_sha1(filepath: str) -> bytes:
+    """파일 내용의 SHA-1 다이제스트"""
+    with open(filepath, 'rb') as f:
+        return hashlib.sha1(f.read()).digest()
+
+
+def read_lexicon_cache(cache_path: str, source_path: str) -> Optional[Tuple[Dict[str, int], Dict[str, str], Dict[str, int]]]:
+    """컴파일된 감성사전 캐시 읽기: (단어→극성, 단어→어근, 어근 색인), 없거나 오래되었으면 None"""
+    if not os.path.exists(cache_path):
+        return None
+
+    try:
+        with open(cache_path, 'rb') as f:
+            raw = f.read()
+
+        (magic, version, size, mtime_ns, digest,
+         count, words_len, roots_len, stem_count, stems_len) = LEXICON_CACHE_HEADER.unpack_from(raw)
+        if magic != LEXICON_CACHE_MAGIC or version != LEXICON_CACHE_VERSION:
+            return None
+
+        # 크기/mtime이 다르면 내용 해시로 한 번 더 확인 (git checkout 등으로 mtime만 바뀐 경우)
+        stat = os.stat(source_path)
+        if (size, mtime_ns) != (stat.st_size, stat.st_mtime_ns):
+            if size != stat.st_size or digest != _file_sha1(source_path):
+                return None
+
+        offset = LEXICON_CACHE_HEADER.size
+        polarities = array('b')
+        polarities.frombytes(raw[offset:offset + count])
+        offset += count
+        words = raw[offset:offset + words_len].decode('utf-8').split('\n') if count else []
+        offset += words_len
+        roots = raw[offset:offset + roots_len].decode('utf-8').split('\n') if count else []
+        offset += roots_len
+        stem_polarities = array('b')
+        stem_polarities.frombytes(raw[offset:offset + stem_count])
+        offset += stem_count
+        stems = raw[offset:offset + stems_len].decode('utf-8').split('\n') if stem_count else []
+
+        if len(words) != count or len(roots) != count or len(stems) != stem_count:
+            return None
+        return dict(zip(words, polarities)), dict(zip(words, roots)), dict(zip(stems, stem_polarities))
+    except (OSError, struct.error, UnicodeDecodeError):
+        return None
+
+
+def write_lexicon_cache(cache_path: str, source_path: str, sentiment_dict: Dict[str, int],
+                        word_roots: Dict[str, str], stem_index: Dict[str, int]):
+    """감성사전을 컴파일된 캐시로 저장 (임시 파일에 쓴 뒤 교체)"""
+    try:
+        stat = os.stat(source_path)
+        words_blob = '\n'.join(sentiment_dict).encode('utf-8')
+        roots_blob = '\n'.join(word_roots[word] for word in sentiment_dict).encode('utf-8')
+        stems_blob = '\n'.join(stem_index).encode('utf-8')
+        header = LEXICON_CACHE_HEADER.pack(
+            LEXICON_CACHE_MAGIC, LEXICON_CACHE_VERSION,
+            stat.st_size, stat.st_mtime_ns, _file_sha1(source_path),
+            len(sentiment_dict), len(words_blob), len(roots_blob),
+            len(stem_index), len(stems_blob)
+        )
+
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(header)
+            f.write(array('b', sentiment_dict.values()).tobytes())
+            f.write(words_blob)
+            f.write(roots_blob)
+            f.write(array('b', stem_index.values()).tobytes())
+            f.write(stems_blob)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        # 읽기 전용 디렉토리 등: 캐시 없이 계속 진행
+        pass
+
+
+def build_stem_index(sentiment_dict: Dict[str, int], word_roots: Dict[str, str]) -> Dict[str, int]:
+    """어근 → 극성 색인 구성 (한 단어짜리 한글 어근 중 극성 부호가 일관된 것만, 짧은 용언 어근 제외)"""
+    root_polarities = {}
+    for word, root in word_roots.items():
+        if len(root) < MIN_STEM_LENGTH or WORD_PATTERN.fullmatch(root) is None or ' ' in word:
+            continue
+        if len(root) < MIN_PREDICATE_STEM_LENGTH and root not in sentiment_dict:
+            continue
+        root_polarities.setdefault(root, []).append(sentiment_dict[word])
+
+    stem_index = {}
+    for root, polarities in root_polarities.items():
+        signs = {(p > 0) - (p < 0) for p in polarities}
+        if len(signs) == 1:
+            # 가장 흔한 극성 (동률이면 먼저 나온 값)
+            stem_index[root] = max(polarities, key=polarities.count)
+    return stem_index
+
+
+def lexicon_phrases(sentiment_dict: Dict[str, int]) -> Dict[Tuple[str, ...], Tuple[str, int]]:
+    """감성사전 표제어를 단어 토큰열 → (표제어, 극성)으로 (구 매처 구성용)"""
+    phrases = {}
+    for word, polarity in sentiment_dict.items():
+        tokens = tuple(WORD_PATTERN.findall(word))
+        if not tokens:
+            continue
+        # 같은 토큰열이면 문장부호 없이 정확히 일치하는 표제어를 우선
+        if ' '.join(tokens) == word or tokens not in phrases:
+            phrases[tokens] = (word, polarity)
+    return phrases
+
+
+class PhraseMatcher:
+    """Aho-Corasick 매처 (토큰열이면 단어·구, 문자열이면 부분 문자열을 한 번의 스캔으로 탐색)"""
+
+    def __init__(self, phrases: Dict[Sequence[str], Any]):
+        # 노드별 전이, 실패 링크, 출력(페이로드, 길이), 다음 출력 노드 링크
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[Optional[Tuple[Any, int]]] = [None]
+        self.output_link: List[int] = [0]
+
+        for tokens, payload in phrases.items():
+            node = 0
+            for token in tokens:
+                child = self.goto[node].get(token)
+                if child is None:
+                    child = len(self.goto)
+                    self.goto[node][token] = child
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append(None)
+                    self.output_link.append(0)
+                node = child
+            self.output[node] = (payload, len(tokens))
+
+        # 너비 우선으로 실패 링크 구성
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for token, child in self.goto[node].items():
+                queue.append(child)
+
+                state = self.fail[node]
+                while state and token not in self.goto[state]:
+                    state = self.fail[state]
+                fallback = self.goto[state].get(token, 0)
+
+                self.fail[child] = fallback
+                self.output_link[child] = fallback if self.output[fallback] else self.output_link[fallback]
+
+    def find_all(self, tokens: Sequence[str]) -> List[Tuple[int, int, Any]]:
+        """모든 매칭 (시작 위치, 끝 위치, 페이로드) 반환"""
+        hits = []
+        node = 0
+
+        for end, token in enumerate(tokens, 1):
+            while node and token not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(token, 0)
+
+            match = node if self.output[node] else self.output_link[node]
+            while match:
+                payload, length = self.output[match]
+                hits.append((end - length, end, payload))
+                match = self.output_link[match]
+
+        return hits
+
+    @staticmethod
+    def select_longest(hits: List[Tuple[int, int, Any]]) -> List[Tuple[int, int, Any]]:
+        """겹치는 매칭 중 왼쪽부터 가장 긴 것만 남기기"""
+        selected = []
+        covered_end = 0
+
+        for hit in sorted(hits, key=lambda h: (h[0], h[0] - h[1])):
+            if hit[0] >= covered_end:
+                selected.append(hit)
+                covered_end = hit[1]
+
+        return selected
+
+
+class KeywordClassifier:
+    """스타일·산업군 키워드 표를 하나의 문자 단위 매처로 컴파일한 분류기"""
+
+    def __init__(self, tables: Dict[str, Dict[str, List[str]]]):
+        self.tables = tables
+
+        # 키워드 → 해당 키워드를 포함하는 (표, 분류) 목록
+        targets = {}
+        for table, categories in tables.items():
+            for category, keywords in categories.items():
+                for keyword in keywords:
+                    if keyword:
+                        targets.setdefault(keyword, []).append((table, category))
+
+        self.matcher = PhraseMatcher({keyword: (keyword, tuple(pairs)) for keyword, pairs in targets.items()})
+
+    def classify(self, text: str) -> Dict[str, List[Tuple[str, int]]]:
+        """한 번의 스캔으로 모든 표의 분류 점수 계산 (분류마다 포함된 키워드 수)"""
+        scores = {table: dict.fromkeys(categories, 0) for table, categories in self.tables.items()}
+        seen = set()
+
+        for _, _, (keyword, pairs) in self.matcher.find_all(text):
+            if keyword in seen:
+                continue
+            seen.add(keyword)
+            for table, category in pairs:
+                scores[table][category] += 1
+
+        # 점수 순으로 정렬 (동점이면 표에 적힌 순서)
+        results = {}
+        for table, category_scores in scores.items():
+            matched = [(category, score) for category, score in category_scores.items() if score > 0]
+            results[table] = sorted(matched, key=lambda x: x[1], reverse=True) or [('기타', 0)]
+        return results
+
+
+# 분석 결과 캐시: 대화형 앱의 메모리 캐시 크기, analyze_text 규칙이 바뀌면 올려서 예전 결과 무효화
+ANALYSIS_CACHE_SIZE = 1024
+ANALYSIS_VERSION = 2
+
+# 디스크 캐시는 이만큼 쓸 때마다 커밋
+ANALYSIS_CACHE_COMMIT_EVERY = 256
+
+# 언어 패턴 필드 (SentimentResult에는 이 순서의 값 튜플로 보관)
+LANGUAGE_PATTERN_FIELDS = ('length', 'word_count', 'has_question', 'has_exclamation', 'has_emoji', 'sentence_count')
+
+# 분석 결과에 남기는 앞쪽 단어 수
+ANALYSIS_WORD_COUNT = 10
+
+# 모든 분석 결과가 함께 쓰는 (이름, 값) 튜플 (같은 표현·분류는 객체 하나만 유지)
+_interned_pairs: Dict[Tuple[str, Any], Tuple[str, Any]] = {}
+
+
+def intern_pair(pair: Sequence) -> Tuple[str, Any]:
+    """(이름, 값)을 공유 튜플로"""
+    pair = tuple(pair)
+    return _interned_pairs.setdefault(pair, pair)
+
+
+def intern_pairs(pairs: Iterable[Sequence]) -> Tuple[Tuple[str, Any], ...]:
+    """(이름, 값) 목록을 공유 튜플의 튜플로"""
+    return tuple(map(intern_pair, pairs))
+
+
+def text_language_pattern(text: str) -> Dict[str, Any]:
+    """언어 패턴 (길이, 한글 단어 수, 질문·감탄·이모티콘 여부, 문장 수)"""
+    return {
+        'length': len(text),
+        'word_count': len(re.findall(r'[가-힣]+', text)),
+        'has_question': '?' in text,
+        'has_exclamation': '!' in text,
+        'has_emoji': bool(re.search(r'[ㅋㅎ😀-🙏]+', text)),
+        'sentence_count': len(re.split(r'[.!?]', text.strip()))
+    }
+
+
+class SentimentResult:
+    """analyze_text 결과 (평가마다 하나씩 보관하므로 dict 대신 슬롯 객체로 압축)
+
+    (표현, 극성)·(분류, 점수) 목록은 공유 튜플로, 언어 패턴은 값 튜플로, 단어 목록은
+    공백으로 이은 문자열 하나로 보관합니다. 감성 단어 수와 충돌 강도처럼 다른 필드에서
+    계산되는 값은 저장하지 않고, 예전 dict 형식은 저장·출력할 때 to_dict()로 만듭니다.
+    언어 패턴과 단어 목록을 주지 않으면 text(평가한 광고 문구)에서 필요할 때 계산합니다.
+    캐시와 평가 기록이 같은 객체를 함께 쓰므로 읽기 전용으로 다룹니다.
+    """
+
+    __slots__ = ('score', 'sentiment_label', 'positive_words', 'negative_words', 'neutral_count',
+                 'ad_styles', 'industries', 'keywords', 'conflict_type', '_pattern', '_words', '_text')
+
+    def __init__(self, score: float, sentiment_label: str, positive_words: Iterable[Sequence],
+                 negative_words: Iterable[Sequence], neutral_count: int, ad_styles: Iterable[Sequence],
+                 industries: Iterable[Sequence], keywords: Iterable[Sequence], conflict_type: Optional[str],
+                 language_pattern: Optional[Dict[str, Any]] = None, words: Optional[List[str]] = None,
+                 text: Optional[str] = None):
+        self.score = score
+        self.sentiment_label = sentiment_label
+        self.positive_words = intern_pairs(positive_words)
+        self.negative_words = intern_pairs(negative_words)
+        self.neutral_count = neutral_count
+        self.ad_styles = intern_pairs(ad_styles)
+        self.industries = intern_pairs(industries)
+        self.keywords = intern_pairs(keywords)
+        self.conflict_type = conflict_type
+        self._pattern = None
+        if language_pattern is not None:
+            self._pattern = tuple(language_pattern.get(field) for field in LANGUAGE_PATTERN_FIELDS)
+        self._words = None if words is None else ' '.join(words)
+        self._text = text
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], text: Optional[str] = None) -> SentimentResult:
+        """예전 dict 형식(JSON에서 읽은 것 포함)에서 만들기
+
+        언어 패턴이나 단어 목록이 없는 예전 기록은 text(평가한 광고 문구)가 있으면 거기서 다시 계산합니다.
+        """
+        conflict_type = (data.get('sentiment_conflict') or {}).get('conflict_type')
+        language_pattern, words = data.get('language_pattern'), data.get('words')
+        if text is None:
+            language_pattern, words = language_pattern or {}, words or ()
+        return cls(
+            data['score'], sys.intern(data['sentiment_label']),
+            data.get('positive_words', ()), data.get('negative_words', ()), data.get('neutral_count', 0),
+            data.get('ad_styles', ()), data.get('industries', ()), data.get('keywords', ()),
+            sys.intern(conflict_type) if conflict_type else None,
+            language_pattern, words, text=text
+        )
+
+    @property
+    def words(self) -> List[str]:
+        """처음 10개 단어"""
+        if self._words is None:
+            return WORD_PATTERN.findall(self._text)[:ANALYSIS_WORD_COUNT]
+        return self._words.split(' ') if self._words else []
+
+    @property
+    def total_sentiment_words(self) -> int:
+        return len(self.positive_words) + len(self.negative_words) + self.neutral_count
+
+    @property
+    def language_pattern(self) -> Dict[str, Any]:
+        if self._pattern is None:
+            return text_language_pattern(self._text)
+        return dict(zip(LANGUAGE_PATTERN_FIELDS, self._pattern))
+
+    @property
+    def has_conflict(self) -> bool:
+        return bool(self.positive_words) and bool(self.negative_words)
+
+    @property
+    def sentiment_conflict(self) -> Dict[str, Any]:
+        """detect_sentiment_conflict와 같은 형식"""
+        return {
+            'has_conflict': self.has_conflict,
+            'conflict_type': self.conflict_type,
+            'positive_strength': sum(abs(score) for _, score in self.positive_words),
+            'negative_strength': sum(abs(score) for _, score in self.negative_words)
+        }
+
+    def overrides(self, text: str) -> Tuple[Optional[List[str]], Optional[Dict[str, Any]]]:
+        """(단어 목록, 언어 패턴) 중 text에서 다시 계산한 값과 다른 것 (같으면 None, 저장 생략용)"""
+        same_text = self._text == text
+        words = None if self._words is None and same_text else self.words
+        pattern = None if self._pattern is None and same_text else self.language_pattern
+        if words is not None and words == WORD_PATTERN.findall(text)[:ANALYSIS_WORD_COUNT]:
+            words = None
+        if pattern is not None and pattern == text_language_pattern(text):
+            pattern = None
+        return words, pattern
+
+    def to_dict(self) -> Dict[str, Any]:
+        """예전 analyze_text dict 형식 (JSON 저장·출력용)"""
+        return {
+            'score': self.score,
+            'sentiment_label': self.sentiment_label,
+            'positive_words': list(self.positive_words),
+            'negative_words': list(self.negative_words),
+            'neutral_count': self.neutral_count,
+            'total_sentiment_words': self.total_sentiment_words,
+            'ad_styles': list(self.ad_styles),
+            'industries': list(self.industries),
+            'keywords': list(self.keywords),
+            'language_pattern': self.language_pattern,
+            'sentiment_conflict': self.sentiment_conflict,
+            'words': self.words
+        }
+
+    def _values(self) -> Tuple:
+        return (self.score, self.sentiment_label, self.positive_words, self.negative_words, self.neutral_count,
+                self.ad_styles, self.industries, self.keywords, self.conflict_type, self.language_pattern, self.words)
+
+    def __eq__(self, other):
+        if not isinstance(other, SentimentResult):
+            return NotImplemented
+        return self._values() == other._values()
+
+    def __repr__(self):
+        return f"SentimentResult(score={self.score!r}, sentiment_label={self.sentiment_label!r})"
+
+
+def json_default(obj):
+    """json.dump(default=...)용: SentimentResult는 예전 dict 형식으로 저장"""
+    if isinstance(obj, SentimentResult):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def compact_rating(ad: Dict) -> Dict:
+    """불러온 평가의 감성 분석 dict를 SentimentResult로 바꾸기 (제자리에서 바꾸고 그대로 반환)"""
+    analysis = ad.get('sentiment_analysis')
+    if isinstance(analysis, dict):
+        text = ad.get('ad_text')
+        ad['sentiment_analysis'] = SentimentResult.from_dict(analysis, text if isinstance(text, str) else None)
+    return ad
+
+
+class AnalysisCache:
+    """analyze_text 결과 LRU 캐시 (키: 감성사전 버전 + NFC 정규화한 문구)
+
+    메모리에는 최근 maxsize개만 두고, path를 주면 SQLite 파일에도 저장해 다음 실행에서
+    같은 문구를 다시 분석하지 않습니다. 감성사전이나 키워드 표가 바뀌면 버전이 달라지므로
+    예전 결과는 쓰이지 않습니다. 여러 스레드에서 함께 써도 됩니다.
+    """
+
+    def __init__(self, maxsize: int = ANALYSIS_CACHE_SIZE, path: Optional[str] = None):
+        self.maxsize = maxsize
+        self.path = path
+        self.entries: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._db = None
+        self._unsaved = 0
+
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS analysis_cache (
+                    version TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    result TEXT NOT NULL,
+                    PRIMARY KEY (version, text)
+                ) WITHOUT ROWID
+            """)
+
+    def _remember(self, key: Tuple[str, str], result: SentimentResult):
+        self.entries[key] = result
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, version: str, text: str) -> Optional[SentimentResult]:
+        """캐시된 결과 (메모리 → 디스크 순으로 찾고, 없으면 None)"""
+        key = (version, text)
+        with self._lock:
+            result = self.entries.get(key)
+            if result is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return result
+
+            if self._db is not None:
+                row = self._db.execute("SELECT result FROM analysis_cache WHERE version = ? AND text = ?", key).fetchone()
+                if row is not None:
+                    result = SentimentResult.from_dict(json.loads(row[0]), text)
+                    if self.maxsize > 0:
+                        self._remember(key, result)
+                    self.disk_hits += 1
+                    return result
+
+            self.misses += 1
+            return None
 
-# 텍스트 유사도 분석 및 머신러닝
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-import numpy as np
+    def put(self, version: str, text: str, result: SentimentResult):
+        """분석 결과 저장 (디스크 캐시는 모아서 커밋)"""
+        key = (version, text)
+        with self._lock:
+            if self.maxsize > 0:
+                self._remember(key, result)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO analysis_cache (version, text, result) VALUES (?, ?, ?)",
+                                 (version, text, json.dumps(result.to_dict(), ensure_ascii=False)))
+                self._unsaved += 1
+                if self._unsaved >= ANALYSIS_CACHE_COMMIT_EVERY:
+                    self._db.commit()
+                    self._unsaved = 0
+
+    def close(self):
+        """디스크 캐시에 남은 결과 커밋 후 닫기"""
+        with self._lock:
+            if self._db is not None:
+                self._db.commit()
+                self._db.close()
+                self._db = None
+
+    def stats(self) -> Dict[str, Any]:
+        """적중·실패·제거 횟수와 적중률"""
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            'size': len(self.entries),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': (self.hits + self.disk_hits) / lookups if lookups else 0.0
+        }
 
 
 class AdvancedSentimentAnalyzer:
     """KNU 한국어 감성사전 기반 감성 분석기"""
 
-    def __init__(self, senti_dict_path="SentiWord_info.json"):
+    def __init__(self, senti_dict_path="SentiWord_info.json", keywords_path="ad_keywords.json",
+                 cache_size: int = 0, cache_path: Optional[str] = None):
         self.sentiment_dict = {}
+        self.word_roots = {}
+        self.stem_index = {}
+        self._max_stem_length = 0
+        self._phrase_matcher = None
+        self._lexicon_version = None
 
         # 감성사전 파일 경로 찾기 (유연한 경로 탐색)
         script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -37,95 +608,147 @@ class AdvancedSentimentAnalyzer:
         if full_path is None:
             full_path = possible_paths[0]  # 기본값
 
+        self.senti_dict_file = full_path
         self.load_sentiment_dict(full_path)
 
-        # 광고 스타일 키워드 사전 (확장)
-        self.style_keywords = {
-            '유머형': ['ㅋ', 'ㅎ', '웃', '재미', '유머', '우습', '깔깔', '하하'],
-            '감성형': ['마음', '사랑', '행복', '따뜻', '소중', '감동', '추억', '함께', '가족', '일상', '순간'],
-            '정보형': ['새로운', '최초', '기술', '혁신', '특허', '개발', '성분', '효과', '과학'],
-            '긴급형': ['지금', '오늘', '한정', '마지막', '서둘', '빨리', '곧', '즉시', '바로'],
-            '프리미엄형': ['프리미엄', '럭셔리', '고급', '명품', '최고급', '특별', '한정판', '격'],
-            '실용형': ['편리', '간편', '실용', '유용', '효율', '절약', '알뜸', '가성비', '쉽', '빠른'],
-            '도전형': ['도전', '극복', '성취', '꿈', '목표', '열정', '성공', '이루', '시작', '변화'],
-            '언어유희형': ['친구', '팀', '국룰', '케미', '통역'],
-            '건강웰빙형': ['건강', '피로', '상처', '통증', '영양', '케어'],
-            '라이프형': ['스타일', '삶', '생활', '디자인', '취향', '나답', '매일'],
-            '혁신기술형': ['AI', '혁신', '미래', '성장', '발전', '진화', '스마트']
-        }
+        # 스타일·산업군 키워드 사전 (외부 설정 파일, 감성사전과 같은 방식으로 경로 탐색)
+        keyword_paths = [
+            os.path.join(script_dir, keywords_path),
+            os.path.join(os.path.dirname(script_dir), "script", keywords_path)
+        ]
+        keywords_full_path = next((path for path in keyword_paths if os.path.exists(path)), keyword_paths[0])
 
-        # 산업군 키워드 사전
-        self.industry_keywords = {
-            '기술IT': ['AI', '기술', '혁신', '앱', '데이터', '전자', '스마트', '디지털'],
-            '패션뷰티': ['스타일', '패션', '옷', '뷰티', '화장', '피부'],
-            '식품음료': ['맛', '먹', '음식', '커피', '술', '음료', '식품'],
-            '건강의료': ['건강', '의료', '치료', '약', '병원', '운동', '다이어트'],
-            '금융서비스': ['은행', '카드', '보험', '금융', '투자', '적립'],
-            '여행레저': ['여행', '휴가', '레저', '관광', '호텔', '항공'],
-            '자동차': ['차', '자동차', '운전', '엔진', '주행'],
-            '가전홈': ['가전', '집', '홈', '가구', '생활', '청소']
-        }
+        self.style_keywords = {}
+        self.industry_keywords = {}
+        self.keywords_file = keywords_full_path
+        self.load_keyword_tables(keywords_full_path)
+
+        # 분석 결과 캐시 (cache_size나 cache_path를 주었을 때만)
+        self.cache = None
+        if cache_size or cache_path:
+            self.enable_cache(cache_size, cache_path)
+
+    def load_keyword_tables(self, filepath):
+        """스타일·산업군 키워드 사전 로드 후 분류기 컴파일"""
+        if not os.path.exists(filepath):
+            print(f"⚠️  키워드 사전 파일({filepath})을 찾을 수 없습니다.")
+            print("광고 스타일/산업군 분류가 비활성화됩니다.")
+        else:
+            try:
+                with open(filepath, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.style_keywords = data.get('style_keywords', {})
+                self.industry_keywords = data.get('industry_keywords', {})
+            except Exception as e:
+                print(f"⚠️  키워드 사전 로드 실패: {e}")
+
+        self.rebuild_classifier()
+
+    def rebuild_classifier(self):
+        """키워드 표를 바꾼 뒤 분류기 다시 컴파일"""
+        self._lexicon_version = None
+        self.classifier = KeywordClassifier({
+            'ad_styles': self.style_keywords,
+            'industries': self.industry_keywords
+        })
 
     def load_sentiment_dict(self, filepath):
-        """감성사전 로드"""
+        """감성사전 로드 (컴파일된 캐시가 있으면 우선 사용)"""
         if not os.path.exists(filepath):
             print(f"⚠️  감성사전 파일({filepath})을 찾을 수 없습니다.")
             print("감성 분석 기능이 비활성화됩니다.")
             return
 
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            cache_path = os.path.splitext(filepath)[0] + LEXICON_CACHE_SUFFIX
+            cached = read_lexicon_cache(cache_path, filepath)
+
+            if cached is not None:
+                self.sentiment_dict, self.word_roots, self.stem_index = cached
+            else:
+                with open(filepath, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+
+                # 단어: 극성 매핑, 단어: 어근 매핑
+                for item in data:
+                    word = item['word']
+                    polarity = int(item['polarity'])
+                    self.sentiment_dict[word] = polarity
+                    self.word_roots[word] = item.get('word_root', word)
+
+                # 활용형 조회를 위한 어근 색인
+                self.stem_index = build_stem_index(self.sentiment_dict, self.word_roots)
+
+                write_lexicon_cache(cache_path, filepath, self.sentiment_dict, self.word_roots, self.stem_index)
 
-            # 단어: 극성 매핑
-            for item in data:
-                word = item['word']
-                polarity = int(item['polarity'])
-                self.sentiment_dict[word] = polarity
+            self._max_stem_length = max(map(len, self.stem_index), default=0)
 
             print(f"✅ 감성사전 로드 완료: {len(self.sentiment_dict):,}개 단어")
         except Exception as e:
             print(f"⚠️  감성사전 로드 실패: {e}")
 
+    def enable_cache(self, maxsize: int = ANALYSIS_CACHE_SIZE, path: Optional[str] = None) -> AnalysisCache:
+        """analyze_text 앞에 LRU 캐시 두기 (path를 주면 SQLite 디스크 캐시도 사용)"""
+        self.cache = AnalysisCache(maxsize, path)
+        return self.cache
+
+    @property
+    def lexicon_version(self) -> str:
+        """분석 결과를 좌우하는 입력(감성사전 파일, 키워드 표, 분석 규칙 버전)의 해시"""
+        if self._lexicon_version is None:
+            digest = hashlib.sha1(f"v{ANALYSIS_VERSION}".encode('utf-8'))
+            if os.path.exists(self.senti_dict_file):
+                digest.update(_file_sha1(self.senti_dict_file))
+            digest.update(json.dumps([self.style_keywords, self.industry_keywords], ensure_ascii=False).encode('utf-8'))
+            self._lexicon_version = digest.hexdigest()[:16]
+        return self._lexicon_version
+
     def extract_words(self, text: str) -> List[str]:
         """텍스트에서 단어 추출 (한글, 영어)"""
-        return re.findall(r'[가-힣]+|[a-zA-Z]+', text)
+        return WORD_PATTERN.findall(text)
+
+    def lookup_stem(self, word: str) -> Optional[int]:
+        """활용형 단어의 극성을 가장 긴 어근 접두사로 조회 (나머지가 STEM_ENDINGS일 때만, 단어 길이에 비례)"""
+        for length in range(min(len(word), self._max_stem_length), MIN_STEM_LENGTH - 1, -1):
+            if word[length:] not in STEM_ENDINGS:
+                continue
+            polarity = self.stem_index.get(word[:length])
+            if polarity is not None:
+                return polarity
+        return None
+
+    def lookup_polarity(self, word: str) -> Optional[int]:
+        """단어 극성 조회 (정확히 일치하는 표제어 우선, 없으면 어근 색인)"""
+        polarity = self.sentiment_dict.get(word)
+        if polarity is None:
+            polarity = self.lookup_stem(word)
+        return polarity
+
+    @property
+    def phrase_matcher(self) -> PhraseMatcher:
+        """감성사전 전체(단어 + 다어절 구)로 만든 매처 (처음 사용할 때 구성)"""
+        if self._phrase_matcher is None:
+            self._phrase_matcher = PhraseMatcher(lexicon_phrases(self.sentiment_dict))
+        return self._phrase_matcher
 
     def classify_ad_style(self, text: str) -> List[Tuple[str, int]]:
         """광고 스타일 자동 분류"""
-        style_scores = {}
-
-        for style, keywords in self.style_keywords.items():
-            score = sum(1 for keyword in keywords if keyword in text)
-            if score > 0:
-                style_scores[style] = score
-
-        # 점수 순으로 정렬
-        sorted_styles = sorted(style_scores.items(), key=lambda x: x[1], reverse=True)
-        return sorted_styles if sorted_styles else [('기타', 0)]
+        return self.classifier.classify(text)['ad_styles']
 
     def classify_industry(self, text: str) -> List[Tuple[str, int]]:
         """산업군 자동 분류"""
-        industry_scores = {}
-
-        for industry, keywords in self.industry_keywords.items():
-            score = sum(1 for keyword in keywords if keyword in text)
-            if score > 0:
-                industry_scores[industry] = score
-
-        # 점수 순으로 정렬
-        sorted_industries = sorted(industry_scores.items(), key=lambda x: x[1], reverse=True)
-        return sorted_industries if sorted_industries else [('기타', 0)]
+        return self.classifier.classify(text)['industries']
 
     def extract_keywords(self, words: List[str], top_n: int = 5) -> List[Tuple[str, int]]:
         """감성 키워드 추출"""
         keyword_scores = {}
 
         for word in words:
-            if word in self.sentiment_dict and len(word) >= 2:
-                score = abs(self.sentiment_dict[word])
+            polarity = self.lookup_polarity(word) if len(word) >= 2 else None
+            if polarity is not None:
+                score = abs(polarity)
                 if score >= 1:  # 극성이 강한 단어만
-                    keyword_scores[word] = self.sentiment_dict[word]
+                    keyword_scores[word] = polarity
 
         # 극성 강도 순으로 정렬
         sorted_keywords = sorted(keyword_scores.items(), key=lambda x: abs(x[1]), reverse=True)
@@ -133,14 +756,7 @@ class AdvancedSentimentAnalyzer:
 
     def analyze_language_pattern(self, text: str) -> Dict:
         """언어 패턴 분석"""
-        return {
-            'length': len(text),
-            'word_count': len(re.findall(r'[가-힣]+', text)),
-            'has_question': '?' in text,
-            'has_exclamation': '!' in text,
-            'has_emoji': bool(re.search(r'[ㅋㅎ😀-🙏]+', text)),
-            'sentence_count': len(re.split(r'[.!?]', text.strip()))
-        }
+        return text_language_pattern(text)
 
     def detect_sentiment_conflict(self, positive_words: List[Tuple], negative_words: List[Tuple]) -> Dict:
         """감성 충돌 감지 및 분석"""
@@ -172,36 +788,76 @@ class AdvancedSentimentAnalyzer:
             'negative_strength': neg_strength
         }
 
-    def analyze_text(self, text: str) -> Dict:
+    def match_lexicon(self, words: List[str]) -> List[Tuple[int, int, Tuple[str, int]]]:
+        """단어 목록에서 감성 단어·구 찾기 (시작, 끝, (표현, 극성)), 위치 순"""
+        # 단어·구 매칭 (겹치면 가장 긴 구 우선)
+        hits = PhraseMatcher.select_longest(self.phrase_matcher.find_all(words))
+
+        # 사전에 없는 활용형은 어근 색인으로 보완 ("행복했던" → "행복")
+        covered = set()
+        for start, end, _ in hits:
+            covered.update(range(start, end))
+        for i, word in enumerate(words):
+            if i not in covered:
+                polarity = self.lookup_stem(word)
+                if polarity is not None:
+                    hits.append((i, i + 1, (word, polarity)))
+        hits.sort()
+        return hits
+
+    def analyze_text(self, text: str) -> Optional[SentimentResult]:
         """
-        종합 텍스트 감성 분석
+        종합 텍스트 감성 분석 (캐시가 있으면 같은 문구는 다시 분석하지 않음)
         """
         if not self.sentiment_dict:
             return None
+        if self.cache is None:
+            # 캐시가 없어도 캐시 경로와 같은 결과가 되도록 NFC 정규화
+            return self._analyze_uncached(unicodedata.normalize('NFC', text))
+
+        text, result = self._cache_lookup(text)
+        if result is None:
+            result = self._analyze_uncached(text)
+            self.cache.put(self.lexicon_version, text, result)
+        return result
 
+    def _cache_lookup(self, text: str) -> Tuple[str, Optional[SentimentResult]]:
+        """(NFC 정규화한 문구, 캐시된 결과 또는 None)"""
+        text = unicodedata.normalize('NFC', text)
+        return text, self.cache.get(self.lexicon_version, text)
+
+    def _analyze_uncached(self, text: str) -> SentimentResult:
+        """캐시를 거치지 않는 분석 본체"""
         # 단어 추출
         words = self.extract_words(text)
 
+        # 감성사전 매칭
+        hits = self.match_lexicon(words)
+
+        matched_terms = [term for _, _, (term, _) in hits]
+
         scores = []
         positive_words = []
         negative_words = []
         neutral_count = 0
 
-        for word in words:
-            if word in self.sentiment_dict:
-                score = self.sentiment_dict[word]
-                scores.append(score)
+        for _, _, pair in hits:
+            score = pair[1]
+            scores.append(score)
 
-                if score >= 1:
-                    positive_words.append((word, score))
-                elif score <= -1:
-                    negative_words.append((word, score))
-                else:
-                    neutral_count += 1
+            if score >= 1:
+                positive_words.append(pair)
+            elif score <= -1:
+                negative_words.append(pair)
+            else:
+                neutral_count += 1
 
         # 평균 점수 계산
         avg_score = sum(scores) / len(scores) if scores else 0
 
+        # 스타일·산업군 분류 (한 번의 스캔)
+        classification = self.classifier.classify(text)
+
         # 감성 충돌 감지
         conflict_info = self.detect_sentiment_conflict(positive_words, negative_words)
 
@@ -230,24 +886,985 @@ class AdvancedSentimentAnalyzer:
             else:
                 label = "중립"
 
-        return {
-            'score': round(avg_score, 2),
-            'sentiment_label': label,
-            'positive_words': positive_words,
-            'negative_words': negative_words,
-            'neutral_count': neutral_count,
-            'total_sentiment_words': len(scores),
-            'ad_styles': self.classify_ad_style(text),
-            'industries': self.classify_industry(text),
-            'keywords': self.extract_keywords(words),
-            'language_pattern': self.analyze_language_pattern(text),
-            'sentiment_conflict': conflict_info,
-            'words': words[:10]  # 처음 10개 단어만 저장
+        return SentimentResult(
+            score=round(avg_score, 2),
+            sentiment_label=label,
+            positive_words=positive_words,
+            negative_words=negative_words,
+            neutral_count=neutral_count,
+            ad_styles=classification['ad_styles'],
+            industries=classification['industries'],
+            keywords=self.extract_keywords(matched_terms),
+            conflict_type=conflict_info['conflict_type'],
+            language_pattern=self.analyze_language_pattern(text),
+            words=words[:ANALYSIS_WORD_COUNT]  # 처음 10개 단어만 저장
+        )
+
+
+# 평가 기록 저널 (ad_data.json 옆에 추가 전용으로 기록)
+JOURNAL_SUFFIX = ".journal.jsonl"
+
+# 저장소가 기억하는 기록 보기 (필터·정렬 조합) 수
+HISTORY_VIEW_CACHE_SIZE = 8
+
+# SQLite 평가 저장소 (이 파일이 있으면 JSON 대신 사용)
+SQLITE_SUFFIX = ".sqlite3"
+
+# 평가 기록 스냅샷(ad_data.json) 형식
+# v1: 평가 dict의 JSON 배열 (들여쓰기, 불러올 때 원본을 .v1.bak으로 남기고 v2로 자동 변환)
+# v2: JSON Lines (머리글 줄 + 심볼 정의 줄 + 평가 줄)
+SNAPSHOT_FORMAT = "ad_ratings"
+SNAPSHOT_VERSION = 2
+SNAPSHOT_V1_BACKUP_SUFFIX = ".v1.bak"
+
+# v2 평가 줄에 담는 평가 dict의 키 (다른 키가 있는 평가는 dict 그대로 한 줄로 저장)
+SNAPSHOT_RECORD_KEYS = ('ad_text', 'overall_rating', 'sentiment_analysis', 'timestamp')
+
+# v2 분석 필드 수: 점수, 라벨, 충돌 유형, 긍정, 부정, 중립 수, 스타일, 산업군, 키워드, 단어 목록, 언어 패턴
+SNAPSHOT_ANALYSIS_FIELDS = 11
+
+
+def rating_group_key(ad: Dict, field: str) -> Optional[str]:
+    """취향 리포트 집계 기준 값 (감성 라벨 또는 주 스타일), 감성 분석이 없으면 None"""
+    analysis = ad.get("sentiment_analysis")
+    if not analysis:
+        return None
+    if field == 'sentiment_label':
+        return analysis.sentiment_label
+    if analysis.ad_styles:
+        return analysis.ad_styles[0][0]
+    return None
+
+
+# 평가 집계 캐시 (ad_data.json 옆에 저장, 시작할 때 전체 기록을 다시 훑지 않도록)
+AGGREGATES_SUFFIX = ".aggregates.json"
+AGGREGATES_VERSION = 1
+
+
+class RatingAggregates:
+    """평가 집계: 평점 분포, 감성 라벨/주 스타일별 (개수, 합, 제곱합), 최고·최저 평점 위치
+
+    평가 하나가 추가될 때마다 O(1)로 갱신되며, 취향 리포트는 이 값만 읽습니다.
+    파일에는 반영한 평가 수와 마지막 평가의 지문이 함께 저장되어, 기록과 어긋나면
+    (다른 프로그램이 기록을 바꾼 경우 등) 전체 기록으로 한 번 다시 계산합니다.
+    """
+
+    GROUP_FIELDS = ('sentiment_label', 'main_style')
+
+    def __init__(self, path: str):
+        self.path = path
+        self.count = 0
+        self.total = 0
+        self.total_sq = 0
+        self.histogram: Dict[int, int] = {}
+        # 값별 [개수, 평점 합, 평점 제곱합] (처음 나온 순서 유지)
+        self.groups: Dict[str, Dict[str, List[int]]] = {field: {} for field in self.GROUP_FIELDS}
+        # 최고 평점 중 먼저 평가한 것, 최저 평점 중 나중에 평가한 것의 위치
+        self.best: Optional[Tuple[int, int]] = None
+        self.worst: Optional[Tuple[int, int]] = None
+        self.last_fingerprint = ""
+
+    @staticmethod
+    def fingerprint(ad: Dict) -> str:
+        """평가 하나의 지문 (집계 파일이 기록과 맞는지 확인용)"""
+        key = f"{ad.get('ad_text', '')}\0{ad.get('overall_rating')}\0{ad.get('timestamp', '')}"
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+
+    def add(self, ad: Dict):
+        """평가 하나 반영 (O(1))"""
+        self.add_values(ad['overall_rating'], rating_group_key(ad, 'sentiment_label'),
+                        rating_group_key(ad, 'main_style'), self.fingerprint(ad))
+
+    def add_values(self, rating: int, sentiment_label: Optional[str], main_style: Optional[str], fingerprint: str):
+        index = self.count
+        self.count += 1
+        self.total += rating
+        self.total_sq += rating * rating
+        self.histogram[rating] = self.histogram.get(rating, 0) + 1
+
+        for field, key in (('sentiment_label', sentiment_label), ('main_style', main_style)):
+            if key is not None:
+                stats = self.groups[field].setdefault(key, [0, 0, 0])
+                stats[0] += 1
+                stats[1] += rating
+                stats[2] += rating * rating
+
+        if self.best is None or rating > self.best[0]:
+            self.best = (rating, index)
+        if self.worst is None or rating <= self.worst[0]:
+            self.worst = (rating, index)
+        self.last_fingerprint = fingerprint
+
+    def matches(self, count: int, last_fingerprint: str) -> bool:
+        """저장된 집계가 현재 기록(평가 수, 마지막 평가 지문)과 맞는지"""
+        return self.count == count and self.last_fingerprint == (last_fingerprint if count else "")
+
+    def count_at_least(self, min_rating: int) -> int:
+        return sum(n for rating, n in self.histogram.items() if rating >= min_rating)
+
+    def average(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def group_stats(self, field: str) -> List[Tuple[str, float, int]]:
+        """값별 (값, 평균 평점, 평가 수), 평균 높은 순 (동점이면 먼저 나온 값)"""
+        stats = [(key, total / n, n) for key, (n, total, _) in self.groups[field].items()]
+        return sorted(stats, key=lambda x: x[1], reverse=True)
+
+    def load(self) -> bool:
+        """집계 파일 읽기 (없거나 형식이 다르면 False)"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != AGGREGATES_VERSION:
+                return False
+            self.count, self.total, self.total_sq = data['count'], data['total'], data['total_sq']
+            self.histogram = {int(rating): n for rating, n in data['histogram'].items()}
+            self.groups = {field: {key: list(stats) for key, stats in data['groups'][field]}
+                           for field in self.GROUP_FIELDS}
+            self.best = tuple(data['best']) if data['best'] else None
+            self.worst = tuple(data['worst']) if data['worst'] else None
+            self.last_fingerprint = data['last_fingerprint']
+            return True
+        except (OSError, ValueError, KeyError, TypeError):
+            self.__init__(self.path)
+            return False
+
+    def save(self):
+        """집계 파일 저장 (임시 파일에 쓴 뒤 교체, 실패해도 다음 시작 때 다시 계산하면 됨)"""
+        data = {
+            'version': AGGREGATES_VERSION,
+            'count': self.count,
+            'total': self.total,
+            'total_sq': self.total_sq,
+            'histogram': self.histogram,
+            # 처음 나온 순서를 보존하도록 목록으로 저장
+            'groups': {field: list(groups.items()) for field, groups in self.groups.items()},
+            'best': self.best,
+            'worst': self.worst,
+            'last_fingerprint': self.last_fingerprint
         }
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass
+
+
+def iter_json_array(f, chunk_size: int = 1 << 16) -> Iterator[Any]:
+    """JSON 배열 파일을 원소 하나씩 읽기 (문서 전체를 한 번에 파싱하지 않음)"""
+    decoder = json.JSONDecoder()
+    buffer, pos, eof = '', 0, False
+
+    def fill():
+        nonlocal buffer, pos, eof
+        chunk = f.read(chunk_size)
+        buffer, pos, eof = buffer[pos:] + chunk, 0, not chunk
+
+    fill()
+    buffer = buffer.lstrip()
+    if not buffer.startswith('['):
+        raise ValueError("목록 형식이 아닙니다")
+    pos = 1
+    while True:
+        # 원소 사이의 공백과 쉼표 건너뛰기
+        while True:
+            while pos < len(buffer) and (buffer[pos] == ',' or buffer[pos].isspace()):
+                pos += 1
+            if pos < len(buffer) or eof:
+                break
+            fill()
+        if pos >= len(buffer):
+            raise ValueError("배열이 닫히지 않았습니다")
+        if buffer[pos] == ']':
+            return
+
+        try:
+            value, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            fill()
+            continue
+        # 값 바로 뒤가 구분자가 아니면 (버퍼 끝에서 숫자 등이 잘린 경우) 더 읽고 다시 해석
+        if not eof and (end == len(buffer) or buffer[end] not in ', \t\r\n]'):
+            fill()
+            continue
+        pos = end
+        yield value
+
+
+class RatingSnapshotCodec:
+    """평가 기록 v2 줄 인코더/디코더 (읽기와 쓰기에 각각 새 인스턴스 사용)
+
+    감성 라벨·충돌 유형 문자열과 (표현, 극성)·(분류, 점수) 쌍은 파일에서 처음 나올 때
+    {"symbols": [...]} 줄로 한 번만 정의하고, 평가 줄에서는 정의된 순서의 번호로 가리킵니다.
+    평가 줄은 [문구, 평점, 시각, 분석]이며 분석은 SNAPSHOT_ANALYSIS_FIELDS 순서의 목록입니다.
+    단어 목록과 언어 패턴은 문구에서 다시 계산한 값과 다를 때만, 감성 단어 수와 충돌 강도는
+    저장하지 않습니다. 한 줄씩 읽고 쓰므로 파일 전체를 한 번에 메모리에 올리지 않습니다.
+    """
+
+    def __init__(self):
+        self.symbols: List[Any] = []
+        self.ids: Dict[Any, int] = {}
+        self._new_symbols: List[Any] = []
+
+    @staticmethod
+    def header() -> str:
+        return json.dumps({'format': SNAPSHOT_FORMAT, 'version': SNAPSHOT_VERSION}) + '\n'
+
+    def _symbol(self, value) -> int:
+        symbol_id = self.ids.get(value)
+        if symbol_id is None:
+            symbol_id = self.ids[value] = len(self.symbols)
+            self.symbols.append(value)
+            self._new_symbols.append(value)
+        return symbol_id
+
+    def _encode_analysis(self, text: str, analysis: SentimentResult) -> List[Any]:
+        symbol = self._symbol
+        words, pattern = analysis.overrides(text)
+        fields = [
+            analysis.score,
+            symbol(analysis.sentiment_label),
+            None if analysis.conflict_type is None else symbol(analysis.conflict_type),
+            [symbol(pair) for pair in analysis.positive_words],
+            [symbol(pair) for pair in analysis.negative_words],
+            analysis.neutral_count,
+            [symbol(pair) for pair in analysis.ad_styles],
+            [symbol(pair) for pair in analysis.industries],
+            [symbol(pair) for pair in analysis.keywords],
+            words,
+            None if pattern is None else [pattern[field] for field in LANGUAGE_PATTERN_FIELDS]
+        ]
+        # 다시 계산하는 끝 필드는 생략
+        while fields[-1] is None:
+            fields.pop()
+        return fields
+
+    def encode(self, ad: Dict) -> str:
+        """평가 하나를 v2 줄로 (새 심볼이 있으면 정의 줄이 앞에 붙음)"""
+        analysis = ad.get('sentiment_analysis')
+        if len(ad) == len(SNAPSHOT_RECORD_KEYS) and all(key in ad for key in SNAPSHOT_RECORD_KEYS) \
+                and (analysis is None or isinstance(analysis, SentimentResult)):
+            text = ad['ad_text']
+            encoded = None if analysis is None else self._encode_analysis(text, analysis)
+            entry = [text, ad['overall_rating'], ad['timestamp'], encoded]
+        else:
+            entry = {'ad': ad}
+
+        line = json.dumps(entry, ensure_ascii=False, separators=(',', ':'), default=json_default) + '\n'
+        if self._new_symbols:
+            line = json.dumps({'symbols': self._new_symbols}, ensure_ascii=False, separators=(',', ':')) + '\n' + line
+            self._new_symbols = []
+        return line
+
+    def decode(self, entry: Any) -> Optional[Dict]:
+        """v2 줄 하나를 평가 dict로 (심볼 정의 줄이면 표에 추가하고 None)"""
+        if isinstance(entry, dict):
+            if 'symbols' in entry:
+                self.symbols.extend(intern_pair(value) if isinstance(value, list) else sys.intern(value)
+                                    for value in entry['symbols'])
+                return None
+            return compact_rating(entry['ad'])
+
+        text, rating, timestamp, fields = entry
+        analysis = None
+        if fields is not None:
+            symbols = self.symbols
+            fields = fields + [None] * (SNAPSHOT_ANALYSIS_FIELDS - len(fields))
+            score, label, conflict, positive, negative, neutral, styles, industries, keywords, words, pattern = fields
+            analysis = SentimentResult(
+                score, symbols[label],
+                [symbols[i] for i in positive], [symbols[i] for i in negative], neutral,
+                [symbols[i] for i in styles], [symbols[i] for i in industries], [symbols[i] for i in keywords],
+                None if conflict is None else symbols[conflict],
+                None if pattern is None else dict(zip(LANGUAGE_PATTERN_FIELDS, pattern)), words,
+                text=text
+            )
+        return {'ad_text': text, 'overall_rating': rating, 'sentiment_analysis': analysis, 'timestamp': timestamp}
+
+    @classmethod
+    def read(cls, f) -> Iterator[Dict]:
+        """v2 파일에서 평가를 하나씩 읽기"""
+        header = json.loads(f.readline())
+        if not isinstance(header, dict) or header.get('format') != SNAPSHOT_FORMAT:
+            raise ValueError("평가 기록 형식이 아닙니다")
+        if header.get('version') != SNAPSHOT_VERSION:
+            raise ValueError(f"지원하지 않는 평가 기록 버전입니다: {header.get('version')}")
+
+        codec = cls()
+        for line in f:
+            if line.strip():
+                ad = codec.decode(json.loads(line))
+                if ad is not None:
+                    yield ad
+
+    @classmethod
+    def write(cls, f, ads: Iterable[Dict]):
+        """평가를 하나씩 v2로 쓰기"""
+        codec = cls()
+        f.write(cls.header())
+        for ad in ads:
+            f.write(codec.encode(ad))
+
+
+class RatingJournal:
+    """평가 기록 저장소: 스냅샷(ad_data.json) + 추가 전용 저널(JSON Lines)
+
+    평가 하나는 저널에 한 줄로 추가(fsync)되고, 시작할 때 스냅샷 뒤에 재생됩니다.
+    저널 항목에는 전체 기록에서의 위치(index)가 함께 기록되므로, 압축 도중 중단되어
+    이미 스냅샷에 들어간 항목이 저널에 남아 있어도 두 번 적용되지 않습니다.
+    """
+
+    def __init__(self, snapshot_path: str):
+        self.snapshot_path = snapshot_path
+        self.journal_path = os.path.splitext(snapshot_path)[0] + JOURNAL_SUFFIX
+        self.ads: List[Dict] = []
+        # history_rows 조회 캐시: ((필터, 정렬) 조건 -> (반영한 기록 수, 조건에 맞는 위치 목록)), 최근 것부터 유지
+        self._view_cache: OrderedDict[Tuple, Tuple[int, List[int]]] = OrderedDict()
+        self.aggregates = RatingAggregates(os.path.splitext(snapshot_path)[0] + AGGREGATES_SUFFIX)
+
+    def load(self) -> List[Dict]:
+        """스냅샷을 읽고 저널을 재생해 전체 기록 복원"""
+        ads = self._load_snapshot()
+        self._replay_journal(ads)
+        self.ads = ads
+        self._view_cache.clear()
+        self._load_aggregates()
+        return ads
+
+    def _load_aggregates(self):
+        """저장된 집계를 읽고, 기록과 맞지 않으면 메모리의 기록으로 다시 계산"""
+        last = RatingAggregates.fingerprint(self.ads[-1]) if self.ads else ""
+        if self.aggregates.load() and self.aggregates.matches(len(self.ads), last):
+            return
+        self.aggregates = RatingAggregates(self.aggregates.path)
+        for ad in self.ads:
+            self.aggregates.add(ad)
+        self.aggregates.save()
+
+    def _load_snapshot(self) -> List[Dict]:
+        """스냅샷 읽기 (손상된 파일은 덮어쓰지 않도록 옆으로 옮겨 둠)"""
+        if not os.path.exists(self.snapshot_path):
+            return []
 
+        try:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                # 비어 있거나 공백뿐이면 빈 기록, v1(JSON 배열)이면 v2로 변환
+                first = f.read(1)
+                while first.isspace():
+                    first = f.read(1)
+                if not first:
+                    return []
+                if first != '[':
+                    f.seek(0)
+                    return list(RatingSnapshotCodec.read(f))
+            return self._migrate_snapshot()
+        except (OSError, ValueError, TypeError, KeyError, IndexError) as e:
+            error = e
+
+        backup_path = f"{self.snapshot_path}.corrupt-{datetime.now():%Y%m%d%H%M%S}"
+        try:
+            os.replace(self.snapshot_path, backup_path)
+        except OSError:
+            backup_path = self.snapshot_path
+        print(f"⚠️ 평가 기록 파일을 읽을 수 없습니다: {error}")
+        print(f"   원본은 {backup_path}에 보존했습니다. 저널에 남은 평가만 복원합니다.")
+        return []
+
+    def _migrate_snapshot(self) -> List[Dict]:
+        """v1 스냅샷을 원소 하나씩 읽어 v2로 다시 쓰기 (원본은 .v1.bak으로 복사, 쓸 수 없는 위치면 읽기만)"""
+        old_size = os.path.getsize(self.snapshot_path)
+        ads = []
+        with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+            for ad in iter_json_array(f):
+                if not isinstance(ad, dict):
+                    raise ValueError("평가 항목이 객체가 아닙니다")
+                ads.append(compact_rating(ad))
+
+        # 변환은 되돌릴 수 없으므로 (파생 필드는 다시 계산) 원본을 먼저 복사해 둠
+        backup_path = self.snapshot_path + SNAPSHOT_V1_BACKUP_SUFFIX
+        try:
+            shutil.copy2(self.snapshot_path, backup_path)
+            self._write_snapshot(ads)
+        except OSError:
+            return ads
+        print(f"평가 기록을 새 형식(v{SNAPSHOT_VERSION})으로 변환했습니다: "
+              f"{old_size:,} → {os.path.getsize(self.snapshot_path):,} bytes (원본: {backup_path})")
+        return ads
+
+    def _write_snapshot(self, ads: Iterable[Dict]):
+        """스냅샷을 v2로 원자적으로 저장 (임시 파일에 쓴 뒤 교체)"""
+        tmp_path = f"{self.snapshot_path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                RatingSnapshotCodec.write(f, ads)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _replay_journal(self, ads: List[Dict]):
+        """저널 재생 (스냅샷에 이미 있는 항목은 건너뛰고, 끊긴 마지막 줄은 잘라냄)"""
+        if not os.path.exists(self.journal_path):
+            return
+
+        offset = 0
+        good_end = 0
+        skipped = 0
+        with open(self.journal_path, 'rb') as f:
+            for line in f:
+                offset += len(line)
+                try:
+                    entry = json.loads(line)
+                    index, ad = entry['index'], entry['ad']
+                except (ValueError, KeyError, TypeError):
+                    skipped += 1
+                    continue
+
+                good_end = offset
+                if index >= len(ads):
+                    ads.append(compact_rating(ad))
+
+        # 기록 도중 중단되어 끝에 남은 불완전한 줄 제거 (다음 추가가 이어 붙지 않도록)
+        if good_end < offset:
+            with open(self.journal_path, 'r+b') as f:
+                f.truncate(good_end)
+        if skipped:
+            print(f"⚠️ 평가 저널에서 읽을 수 없는 줄 {skipped}개를 건너뛰었습니다.")
+
+    def append(self, ad: Dict):
+        """평가 하나를 저널에 추가 (O(1), fsync로 디스크 기록 보장)"""
+        line = json.dumps({'index': len(self.ads), 'ad': ad}, ensure_ascii=False, default=json_default) + '\n'
+        with open(self.journal_path, 'a', encoding='utf-8') as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+        self.ads.append(ad)
+        self.aggregates.add(ad)
+        self.aggregates.save()
+
+    def compact(self):
+        """전체 기록을 스냅샷으로 원자적으로 저장하고 저널 비우기"""
+        self._write_snapshot(self.ads)
+
+        # 여기서 중단되어도 저널 항목은 index로 걸러지므로 중복 적용되지 않음
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+
+    def get(self, index: int) -> Dict:
+        """index번째 평가"""
+        return self.ads[index]
+
+    def count(self, min_rating: Optional[int] = None) -> int:
+        """평가 수 (min_rating 이상만 셀 수 있음)"""
+        if min_rating is None:
+            return len(self.ads)
+        return self.aggregates.count_at_least(min_rating)
+
+    def average_rating(self) -> float:
+        """전체 평균 평점"""
+        return self.aggregates.average()
+
+    def texts(self, min_rating: Optional[int] = None) -> List[str]:
+        """광고 문구 목록 (기록 순서, min_rating 이상만 고를 수 있음)"""
+        return [ad['ad_text'] for ad in self.ads if min_rating is None or ad['overall_rating'] >= min_rating]
+
+    def group_stats(self, field: str) -> List[Tuple[str, float, int]]:
+        """감성 라벨/주 스타일별 (값, 평균 평점, 평가 수), 평균 높은 순"""
+        return self.aggregates.group_stats(field)
+
+    def _view(self, min_rating: Optional[int], sentiment_label: Optional[str], sort: str, descending: bool) -> List[int]:
+        """조건에 맞는 기록 위치 목록 (같은 조건이면 캐시, 기록 순 보기는 새 평가만 이어 붙임)"""
+        key = ((min_rating, sentiment_label), (sort, descending))
+
+        def matches(ad):
+            return ((min_rating is None or ad['overall_rating'] >= min_rating)
+                    and (sentiment_label is None or rating_group_key(ad, 'sentiment_label') == sentiment_label))
+
+        cached = self._view_cache.get(key)
+        if cached is not None:
+            seen, positions = cached
+            self._view_cache.move_to_end(key)
+            if seen == len(self.ads):
+                return positions
+            if sort == 'index' and not descending:
+                positions.extend(i for i in range(seen, len(self.ads)) if matches(self.ads[i]))
+                self._view_cache[key] = (len(self.ads), positions)
+                return positions
+
+        positions = [i for i, ad in enumerate(self.ads) if matches(ad)]
+        if sort == 'rating':
+            # 평점이 같으면 기록 순
+            positions.sort(key=lambda i: (-self.ads[i]['overall_rating'] if descending else self.ads[i]['overall_rating'], i))
+        elif descending:
+            positions.reverse()
+        self._view_cache[key] = (len(self.ads), positions)
+        self._view_cache.move_to_end(key)
+        while len(self._view_cache) > HISTORY_VIEW_CACHE_SIZE:
+            self._view_cache.popitem(last=False)
+        return positions
+
+    def count_matching(self, min_rating: Optional[int] = None, sentiment_label: Optional[str] = None) -> int:
+        """평점·감성 라벨 조건에 맞는 평가 수 (같은 필터로 만든 보기가 있으면 정렬과 관계없이 그 길이)"""
+        filters = (min_rating, sentiment_label)
+        for (view_filters, _), (seen, positions) in self._view_cache.items():
+            if view_filters == filters and seen == len(self.ads):
+                return len(positions)
+        return len(self._view(min_rating, sentiment_label, 'index', False))
+
+    def history_rows(self, offset: int, limit: int, min_rating: Optional[int] = None,
+                     sentiment_label: Optional[str] = None, sort: str = 'index',
+                     descending: bool = False) -> List[Tuple[int, str, int, Optional[str]]]:
+        """기록 한 페이지 (번호, 광고 문구, 평점, 감성 라벨), sort는 'index'(기록 순) 또는 'rating'"""
+        positions = self._view(min_rating, sentiment_label, sort, descending)[offset:offset + limit]
+        return [
+            (i + 1, self.ads[i]['ad_text'], self.ads[i]['overall_rating'], rating_group_key(self.ads[i], 'sentiment_label'))
+            for i in positions
+        ]
+
+    def best_and_worst(self) -> Tuple[Optional[Dict], Optional[Dict]]:
+        """최고 평점 광고(먼저 평가한 것)와 최저 평점 광고(나중에 평가한 것)"""
+        if not self.ads:
+            return None, None
+        return self.ads[self.aggregates.best[1]], self.ads[self.aggregates.worst[1]]
+
+
+class SQLiteRatingStore:
+    """SQLite 평가 저장소: 평점·감성 라벨·주 스타일·시각 인덱스로 리포트를 집계 쿼리로 계산
+
+    전체 기록(ads)은 유사 광고 검색처럼 실제로 필요할 때 처음 한 번만 불러옵니다.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS ratings (
+            id INTEGER PRIMARY KEY,
+            ad_text TEXT NOT NULL,
+            overall_rating INTEGER NOT NULL,
+            sentiment_label TEXT,
+            main_style TEXT,
+            timestamp TEXT,
+            record TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_ratings_rating ON ratings(overall_rating);
+        CREATE INDEX IF NOT EXISTS idx_ratings_sentiment ON ratings(sentiment_label, overall_rating);
+        CREATE INDEX IF NOT EXISTS idx_ratings_style ON ratings(main_style, overall_rating);
+        CREATE INDEX IF NOT EXISTS idx_ratings_timestamp ON ratings(timestamp);
+    """
+
+    # group_stats에서 허용하는 집계 기준 컬럼
+    GROUP_FIELDS = ('sentiment_label', 'main_style')
+
+    def __init__(self, db_path: str, aggregates_path: Optional[str] = None):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript(self.SCHEMA)
+        self._ads: Optional[List[Dict]] = None
+        self.aggregates = RatingAggregates(aggregates_path or os.path.splitext(db_path)[0] + AGGREGATES_SUFFIX)
+        self._load_aggregates()
+
+    def _load_aggregates(self):
+        """저장된 집계를 읽고, 기록과 맞지 않으면 평점·라벨 컬럼만 읽어 다시 계산"""
+        # id는 1부터 빠짐없이 늘어나므로 MAX(id)가 평가 수 (COUNT(*)와 달리 전체를 훑지 않음)
+        count = self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM ratings").fetchone()[0]
+        last = self.conn.execute("SELECT record FROM ratings ORDER BY id DESC LIMIT 1").fetchone()
+        last_fingerprint = RatingAggregates.fingerprint(json.loads(last[0])) if last else ""
+        if self.aggregates.load() and self.aggregates.matches(count, last_fingerprint):
+            return
+
+        self.aggregates = RatingAggregates(self.aggregates.path)
+        rows = self.conn.execute("SELECT overall_rating, sentiment_label, main_style FROM ratings ORDER BY id")
+        for rating, sentiment_label, main_style in rows:
+            self.aggregates.add_values(rating, sentiment_label, main_style, "")
+        self.aggregates.last_fingerprint = last_fingerprint
+        self.aggregates.save()
+
+    @staticmethod
+    def _row(ad: Dict) -> Tuple:
+        return (
+            ad['ad_text'], ad['overall_rating'],
+            rating_group_key(ad, 'sentiment_label'), rating_group_key(ad, 'main_style'),
+            ad.get('timestamp'), json.dumps(ad, ensure_ascii=False, default=json_default)
+        )
+
+    def import_ads(self, ads: Iterable[Dict]):
+        """여러 평가를 한 트랜잭션으로 추가 (마이그레이션용)"""
+        def rows():
+            for ad in ads:
+                self.aggregates.add(ad)
+                yield self._row(ad)
+
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO ratings (ad_text, overall_rating, sentiment_label, main_style, timestamp, record) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows()
+            )
+        self.aggregates.save()
+
+    @property
+    def ads(self) -> List[Dict]:
+        """전체 기록 (처음 접근할 때 불러와서 캐시)"""
+        if self._ads is None:
+            rows = self.conn.execute("SELECT record FROM ratings ORDER BY id")
+            self._ads = [compact_rating(json.loads(record)) for record, in rows]
+        return self._ads
+
+    def append(self, ad: Dict):
+        """평가 하나 추가 (행 하나 INSERT)"""
+        self.import_ads([ad])
+        if self._ads is not None:
+            self._ads.append(ad)
+
+    def compact(self):
+        """SQLite는 매 평가가 바로 커밋되므로 파일 공간만 정리"""
+        self.conn.execute("VACUUM")
+
+    def get(self, index: int) -> Dict:
+        """index번째 평가 (전체 기록을 불러오지 않고 한 행만 읽음, id는 1부터 빠짐없이 증가)"""
+        if self._ads is not None:
+            return self._ads[index]
+        row = self.conn.execute("SELECT record FROM ratings WHERE id = ?", (index + 1,)).fetchone()
+        if row is None:
+            raise IndexError(index)
+        return compact_rating(json.loads(row[0]))
+
+    def count(self, min_rating: Optional[int] = None) -> int:
+        """평가 수 (min_rating 이상만 셀 수 있음)"""
+        if min_rating is None:
+            return self.aggregates.count
+        return self.aggregates.count_at_least(min_rating)
+
+    def average_rating(self) -> float:
+        """전체 평균 평점"""
+        return self.aggregates.average()
+
+    def texts(self, min_rating: Optional[int] = None) -> List[str]:
+        """광고 문구 목록 (기록 순서, min_rating 이상만 고를 수 있음)"""
+        rows = self.conn.execute(
+            "SELECT ad_text FROM ratings WHERE overall_rating >= ? ORDER BY id",
+            (min_rating if min_rating is not None else -1,)
+        )
+        return [text for text, in rows]
+
+    def group_stats(self, field: str) -> List[Tuple[str, float, int]]:
+        """감성 라벨/주 스타일별 (값, 평균 평점, 평가 수), 평균 높은 순 (동점이면 먼저 나온 값)"""
+        if field not in self.GROUP_FIELDS:
+            raise ValueError(f"지원하지 않는 집계 기준: {field}")
+        return self.aggregates.group_stats(field)
+
+    @staticmethod
+    def _history_filter(min_rating: Optional[int], sentiment_label: Optional[str]) -> Tuple[str, List]:
+        clauses, params = [], []
+        if min_rating is not None:
+            clauses.append("overall_rating >= ?")
+            params.append(min_rating)
+        if sentiment_label is not None:
+            clauses.append("sentiment_label = ?")
+            params.append(sentiment_label)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def count_matching(self, min_rating: Optional[int] = None, sentiment_label: Optional[str] = None) -> int:
+        """평점·감성 라벨 조건에 맞는 평가 수"""
+        where, params = self._history_filter(min_rating, sentiment_label)
+        return self.conn.execute(f"SELECT COUNT(*) FROM ratings{where}", params).fetchone()[0]
+
+    def history_rows(self, offset: int, limit: int, min_rating: Optional[int] = None,
+                     sentiment_label: Optional[str] = None, sort: str = 'index',
+                     descending: bool = False) -> List[Tuple[int, str, int, Optional[str]]]:
+        """기록 한 페이지 (번호, 광고 문구, 평점, 감성 라벨), 필터·정렬·페이지 나누기를 쿼리에서 처리"""
+        where, params = self._history_filter(min_rating, sentiment_label)
+        direction = "DESC" if descending else ""
+        order = f"overall_rating {direction}, id" if sort == 'rating' else f"id {direction}"
+        rows = self.conn.execute(
+            f"SELECT id, ad_text, overall_rating, sentiment_label FROM ratings{where} "
+            f"ORDER BY {order} LIMIT ? OFFSET ?",
+            params + [limit, offset]
+        )
+        return rows.fetchall()
+
+    def best_and_worst(self) -> Tuple[Optional[Dict], Optional[Dict]]:
+        """최고 평점 광고(먼저 평가한 것)와 최저 평점 광고(나중에 평가한 것)"""
+        if not self.aggregates.count:
+            return None, None
+        return self.get(self.aggregates.best[1]), self.get(self.aggregates.worst[1])
+
+
+def open_rating_store(data_file: str):
+    """평가 저장소 열기 (ad_data.sqlite3가 있으면 SQLite, 없으면 JSON 스냅샷 + 저널)"""
+    sqlite_path = os.path.splitext(data_file)[0] + SQLITE_SUFFIX
+    if os.path.exists(sqlite_path):
+        return SQLiteRatingStore(sqlite_path)
+
+    store = RatingJournal(data_file)
+    store.load()
+    return store
+
+
+def migrate_to_sqlite(data_file: str) -> int:
+    """ad_data.json(+저널)을 SQLite 저장소로 옮기기, 옮긴 평가 수 반환
+
+    원본 JSON 파일은 그대로 두며, 이후에는 SQLite 파일이 우선 사용됩니다.
+    """
+    sqlite_path = os.path.splitext(data_file)[0] + SQLITE_SUFFIX
+    if os.path.exists(sqlite_path):
+        raise FileExistsError(f"이미 SQLite 저장소가 있습니다: {sqlite_path}")
+
+    journal = RatingJournal(data_file)
+    ads = journal.load()
+
+    # 임시 파일에 만든 뒤 교체 (중간에 실패해도 반쯤 만들어진 DB가 남지 않도록)
+    tmp_path = f"{sqlite_path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    store = SQLiteRatingStore(tmp_path, aggregates_path=os.path.splitext(sqlite_path)[0] + AGGREGATES_SUFFIX)
+    store.import_ads(ads)
+    store.conn.close()
+    os.replace(tmp_path, sqlite_path)
+    return len(ads)
+
+
+# 광고 카피 DB TF-IDF 색인 포맷 버전 (학습 방식이 바뀌면 올려서 기존 색인 무효화)
+CATALOG_INDEX_VERSION = 1
+
+
+def cosine_scores(profiles, matrix, matrix_norms: Optional[np.ndarray] = None):
+    """희소 프로필 행마다 matrix 행과의 코사인 유사도 (프로필 수 x 행 수 CSR, 공통 단어가 있는 항목만 값이 있음)"""
+    profiles = sparse.csr_matrix(profiles)
+    if matrix_norms is None:
+        matrix_norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    profile_norms = np.sqrt(np.asarray(profiles.multiply(profiles).sum(axis=1)).ravel())
+
+    # 카탈로그 CSR 행렬을 왼쪽에 두어야 큰 행렬의 전치 변환이 일어나지 않음
+    scores = (matrix @ profiles.T).T.tocsr()
+
+    # 0으로 나누는 항목(빈 벡터)은 유사도 0
+    row_norms = np.repeat(profile_norms, np.diff(scores.indptr))
+    denominators = matrix_norms[scores.indices] * row_norms
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scores.data = np.where(denominators > 0, scores.data / denominators, 0.0)
+    return scores
+
+
+def select_top_k(scores, top_n: int, threshold: float = 0.1) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """점수 행렬의 행마다 threshold 이상인 상위 top_n개 (열 번호 배열, 점수 배열)
+
+    argpartition으로 상위 후보만 추린 뒤 정렬하며, 점수가 같으면 열 번호가 작은 쪽이 앞에 옵니다.
+    """
+    results = []
+    for row in range(scores.shape[0]):
+        start, end = scores.indptr[row], scores.indptr[row + 1]
+        indices = scores.indices[start:end]
+        values = scores.data[start:end]
+
+        keep = values >= threshold
+        indices, values = indices[keep], values[keep]
+        if len(values) > top_n:
+            # argpartition으로 상위 top_n개만 추림 (경계 점수와 같은 동점은 함께 남김)
+            cutoff = values[np.argpartition(-values, top_n - 1)[:top_n]].min()
+            keep = values >= cutoff
+            indices, values = indices[keep], values[keep]
+
+        order = np.lexsort((indices, -values))[:top_n]
+        results.append((indices[order], values[order]))
+    return results
+
+
+def top_k_cosine(profiles, matrix, top_n: int, threshold: float = 0.1,
+                 matrix_norms: Optional[np.ndarray] = None) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """희소 프로필 행마다 matrix 행과의 코사인 유사도 상위 top_n개 (행 번호 배열, 유사도 배열)
+
+    프로필과 행렬을 밀집 배열로 바꾸지 않고 희소 곱 한 번으로 점수를 구한 뒤,
+    threshold 이상인 점수만 남겨 argpartition으로 상위 후보를 고릅니다.
+    """
+    return select_top_k(cosine_scores(profiles, matrix, matrix_norms), top_n, threshold)
+
+
+class CatalogTfidfIndex:
+    """광고 카피 DB의 TF-IDF 행렬과 어휘를 한 번만 학습해 디스크에 저장해 두는 색인
+
+    행렬은 희소 .npz, 어휘와 IDF는 .json으로 ad_copy_database.json 옆에 저장하며,
+    DB 문구의 해시가 바뀌면 자동으로 다시 학습합니다. 추천할 때는 사용자가 좋아한
+    문구만 transform하면 되므로 카탈로그가 커져도 응답 시간이 늘지 않습니다.
+    """
+
+    def __init__(self, db_path: str, texts: List[str]):
+        base = os.path.splitext(db_path)[0]
+        self.matrix_path = base + ".tfidf.npz"
+        self.vocab_path = base + ".tfidf.json"
+
+        digest = hashlib.sha1(f"v{CATALOG_INDEX_VERSION}".encode('utf-8'))
+        for text in texts:
+            digest.update(text.encode('utf-8'))
+            digest.update(b'\0')
+        self.source_hash = digest.hexdigest()
+
+        loaded = self._load(len(texts))
+        if loaded is None:
+            loaded = self._build(texts)
+        self.vectorizer, self.matrix = loaded
+        self.row_norms = np.sqrt(np.asarray(self.matrix.multiply(self.matrix).sum(axis=1)).ravel())
+
+    def _load(self, num_texts: int):
+        """저장된 색인 읽기 (없거나 DB가 바뀌었으면 None)"""
+        if not (os.path.exists(self.vocab_path) and os.path.exists(self.matrix_path)):
+            return None
+
+        try:
+            with open(self.vocab_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get('source_hash') != self.source_hash:
+                return None
+
+            vectorizer = sklearn_text.TfidfVectorizer(vocabulary=meta['vocabulary'])
+            vectorizer.idf_ = np.asarray(meta['idf'])
+            matrix = sparse.load_npz(self.matrix_path).tocsr()
+            if matrix.shape != (num_texts, len(meta['vocabulary'])):
+                return None
+            return vectorizer, matrix
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _build(self, texts: List[str]):
+        """DB 전체로 TF-IDF 학습 후 저장 (저장 실패 시 메모리에서만 사용)"""
+        vectorizer = sklearn_text.TfidfVectorizer()
+        matrix = vectorizer.fit_transform(texts).tocsr()
+
+        meta = {
+            'source_hash': self.source_hash,
+            'vocabulary': {term: int(col) for term, col in vectorizer.vocabulary_.items()},
+            'idf': vectorizer.idf_.tolist()
+        }
+        try:
+            # 행렬 먼저, 해시가 담긴 어휘 파일을 나중에 교체 (중간에 멈추면 다음에 다시 학습)
+            tmp_matrix = f"{os.path.splitext(self.matrix_path)[0]}.tmp.npz"
+            sparse.save_npz(tmp_matrix, matrix)
+            os.replace(tmp_matrix, self.matrix_path)
+
+            tmp_vocab = f"{self.vocab_path}.tmp"
+            with open(tmp_vocab, 'w', encoding='utf-8') as f:
+                json.dump(meta, f, ensure_ascii=False)
+            os.replace(tmp_vocab, self.vocab_path)
+        except OSError:
+            pass
+
+        return vectorizer, matrix
+
+    def transform(self, texts: List[str]):
+        """질의 문구를 카탈로그와 같은 TF-IDF 공간으로 변환"""
+        return self.vectorizer.transform(texts)
+
+    def profile(self, texts: List[str]):
+        """문구들의 평균 TF-IDF 벡터 (희소 1행 행렬)"""
+        vectors = self.transform(texts)
+        weights = sparse.csr_matrix(np.full((1, vectors.shape[0]), 1.0 / vectors.shape[0]))
+        return weights @ vectors
+
+    def top_k(self, profiles, top_n: int, threshold: float = 0.1) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """프로필 행마다 카탈로그에서 가장 유사한 top_n개"""
+        return top_k_cosine(profiles, self.matrix, top_n, threshold, matrix_norms=self.row_norms)
+
+
+# 평가 기록 탭 한 페이지의 행 수
+HISTORY_PAGE_SIZE = 100
+
+# 기록 탭 감성 필터 선택지 (AdvancedSentimentAnalyzer.analyze_text의 라벨)
+SENTIMENT_LABELS = ("매우 긍정", "긍정", "중립", "부정", "매우 부정",
+                    "혼합(긍정우세)", "혼합(부정우세)", "혼합(양립)", "혼합(균형)")
+
+
+class BackgroundJobRunner:
+    """오래 걸리는 작업(분석·추천)을 작업 스레드에서 실행하고 결과를 root.after 폴링으로 메인 스레드에 전달
+
+    작업은 종류(kind)별로 최신 요청 하나만 유효합니다. 같은 종류의 새 요청이 들어오면
+    아직 시작하지 않은 이전 요청은 건너뛰고, 실행 중이던 요청의 결과는 버립니다.
+    Tk 위젯은 메인 스레드에서만 건드리므로 콜백은 항상 메인 스레드에서 호출됩니다.
+    """
+
+    POLL_INTERVAL_MS = 50
 
-class AdPreferenceGUI:
     def __init__(self, root):
+        self.root = root
+        self._jobs: "queue.Queue" = queue.Queue()
+        self._results: "queue.Queue" = queue.Queue()
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._polling = False
+        self._outstanding = 0
+        self._worker = threading.Thread(target=self._run, name="gui-worker", daemon=True)
+        self._worker.start()
+
+    def submit(self, kind: str, func, on_done, on_error=None):
+        """kind 작업 요청 (같은 kind의 이전 요청은 취소)"""
+        with self._lock:
+            generation = self._generations.get(kind, 0) + 1
+            self._generations[kind] = generation
+            self._outstanding += 1
+        self._jobs.put((kind, generation, func, on_done, on_error))
+        self._schedule_poll()
+
+    def cancel(self, kind: str):
+        """kind 작업 취소 (실행 중이면 결과만 버림)"""
+        with self._lock:
+            self._generations[kind] = self._generations.get(kind, 0) + 1
+
+    def is_current(self, kind: str, generation: int) -> bool:
+        with self._lock:
+            return self._generations.get(kind) == generation
+
+    def _run(self):
+        while True:
+            kind, generation, func, on_done, on_error = self._jobs.get()
+            if not self.is_current(kind, generation):
+                self._finish_job()
+                continue
+            try:
+                result, error = func(), None
+            except Exception as e:
+                result, error = None, e
+            self._results.put((kind, generation, result, error, on_done, on_error))
+            self._finish_job()
+
+    def _finish_job(self):
+        with self._lock:
+            self._outstanding -= 1
+
+    def _schedule_poll(self):
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.POLL_INTERVAL_MS, self._poll)
+
+    def _poll(self):
+        """메인 스레드에서 완료된 작업의 콜백 실행"""
+        self._polling = False
+        # 결과를 꺼내기 전에 남은 작업 수를 읽어야 그 사이 끝난 작업의 결과를 놓치지 않음
+        with self._lock:
+            outstanding = self._outstanding
+        while True:
+            try:
+                kind, generation, result, error, on_done, on_error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if not self.is_current(kind, generation):
+                continue
+            if error is None:
+                on_done(result)
+            elif on_error is not None:
+                on_error(error)
+            else:
+                print(f"⚠️ 작업 오류 ({kind}): {error}")
+
+        if outstanding:
+            self._schedule_poll()
+
+
+class AdPreferenceGUI:
+    def __init__(self, root, migrate_sqlite=False):
         self.root = root
         self.root.title("🎯 AI 광고 취향 분석기 v4.0 GUI")
         self.root.geometry("1000x700")
@@ -271,25 +1888,48 @@ class AdPreferenceGUI:
         self.ad_copy_db_file = db_paths[0] if os.path.exists(db_paths[0]) else db_paths[1]
 
         # 데이터 로드
-        self.ads = self.load_data()
+        self.store = self.open_store(migrate_sqlite)
         self.ad_copy_database = self.load_ad_copy_database()
+        self._catalog_index = None
+
+        # 분석·추천은 작업 스레드에서 실행 (창이 멈추지 않도록)
+        self.jobs = BackgroundJobRunner(self.root)
 
-        # 감성 분석기 초기화
+        # 감성 분석기 초기화 (창을 구성하는 동안 백그라운드에서 감성사전 로드)
         print("🚀 AI 광고 취향 분석기 초기화 중...")
-        self.sentiment_analyzer = AdvancedSentimentAnalyzer()
+        loader = ThreadPoolExecutor(max_workers=1)
+        self._analyzer_future = loader.submit(AdvancedSentimentAnalyzer, cache_size=ANALYSIS_CACHE_SIZE)
+        loader.shutdown(wait=False)
 
         # UI 구성
         self.setup_ui()
 
-    def load_data(self):
-        """저장된 데이터 불러오기"""
-        if os.path.exists(self.data_file):
+    @property
+    def sentiment_analyzer(self) -> AdvancedSentimentAnalyzer:
+        """감성 분석기 (아직 로드 중이면 끝날 때까지 기다림)"""
+        return self._analyzer_future.result()
+
+    def open_store(self, migrate_sqlite=False):
+        """평가 저장소 열기 (JSON 스냅샷 + 저널, 또는 SQLite)"""
+        if migrate_sqlite:
             try:
-                with open(self.data_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
-                return []
-        return []
+                count = migrate_to_sqlite(self.data_file)
+                print(f"✅ 평가 기록 {count}개를 SQLite 저장소로 옮겼습니다.")
+            except FileExistsError as e:
+                print(f"⚠️ {e}")
+        return open_rating_store(self.data_file)
+
+    @property
+    def ads(self) -> List[Dict]:
+        """전체 평가 기록"""
+        return self.store.ads
+
+    def get_catalog_index(self) -> CatalogTfidfIndex:
+        """광고 카피 DB TF-IDF 색인 (처음 추천할 때 디스크에서 불러오거나 학습)"""
+        if self._catalog_index is None:
+            db_texts = [copy['text'] for copy in self.ad_copy_database]
+            self._catalog_index = CatalogTfidfIndex(self.ad_copy_db_file, db_texts)
+        return self._catalog_index
 
     def load_ad_copy_database(self):
         """광고 카피 데이터베이스 로드"""
@@ -306,10 +1946,13 @@ class AdPreferenceGUI:
             print("⚠️ 광고 카피 데이터베이스를 찾을 수 없습니다.")
             return []
 
+    def add_rating(self, ad_info: Dict):
+        """평가 하나 추가 (저널에 한 줄만 기록)"""
+        self.store.append(ad_info)
+
     def save_data(self):
-        """데이터 저장하기"""
-        with open(self.data_file, 'w', encoding='utf-8') as f:
-            json.dump(self.ads, f, ensure_ascii=False, indent=2)
+        """전체 기록을 스냅샷으로 저장하기 (저널 압축)"""
+        self.store.compact()
 
     def setup_ui(self):
         """UI 구성"""
@@ -325,7 +1968,7 @@ class AdPreferenceGUI:
         info_frame = ttk.LabelFrame(main_frame, text="📊 통계", padding="10")
         info_frame.grid(row=0, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=5)
 
-        self.stats_label = ttk.Label(info_frame, text=f"평가한 광고: {len(self.ads)}개", font=('Arial', 10, 'bold'))
+        self.stats_label = ttk.Label(info_frame, text=f"평가한 광고: {self.store.count()}개", font=('Arial', 10, 'bold'))
         self.stats_label.pack()
 
         # 탭 컨트롤
@@ -385,8 +2028,8 @@ class AdPreferenceGUI:
         rating_scale.config(command=lambda v: self.rating_label.config(text=str(int(float(v)))))
 
         # 저장 버튼
-        save_btn = ttk.Button(rating_frame, text="💾 평가 저장하기", command=self.save_rating)
-        save_btn.grid(row=1, column=0, columnspan=3, pady=10)
+        self.save_button = ttk.Button(rating_frame, text="💾 평가 저장하기", command=self.save_rating)
+        self.save_button.grid(row=1, column=0, columnspan=3, pady=10)
 
         # 그리드 가중치
         tab.columnconfigure(0, weight=1)
@@ -412,21 +2055,42 @@ class AdPreferenceGUI:
         tab.rowconfigure(1, weight=1)
 
     def create_history_tab(self):
-        """평가 기록 탭"""
+        """평가 기록 탭 (한 페이지씩만 표시, 필터·정렬은 저장소에서 처리)"""
         tab = ttk.Frame(self.notebook, padding="10")
         self.notebook.add(tab, text="📋 평가 기록")
 
-        # 새로고침 버튼
-        refresh_btn = ttk.Button(tab, text="🔄 기록 새로고침", command=self.show_history)
-        refresh_btn.grid(row=0, column=0, pady=10)
+        # 새로고침 / 압축 버튼
+        button_frame = ttk.Frame(tab)
+        button_frame.grid(row=0, column=0, pady=10)
+
+        refresh_btn = ttk.Button(button_frame, text="🔄 기록 새로고침", command=self.show_history)
+        refresh_btn.pack(side=tk.LEFT, padx=5)
+
+        compact_btn = ttk.Button(button_frame, text="🗜️ 기록 파일 정리", command=self.compact_history)
+        compact_btn.pack(side=tk.LEFT, padx=5)
+
+        # 필터 (평점 하한, 감성 라벨)
+        ttk.Label(button_frame, text="최소 평점:").pack(side=tk.LEFT, padx=(20, 2))
+        self.history_min_rating = ttk.Combobox(button_frame, values=["전체"] + [str(r) for r in range(1, 11)],
+                                               width=5, state="readonly")
+        self.history_min_rating.set("전체")
+        self.history_min_rating.pack(side=tk.LEFT)
+        self.history_min_rating.bind("<<ComboboxSelected>>", lambda e: self.show_history(0))
 
-        # 트리뷰로 기록 표시
+        ttk.Label(button_frame, text="감성:").pack(side=tk.LEFT, padx=(10, 2))
+        self.history_sentiment = ttk.Combobox(button_frame, values=["전체"] + list(SENTIMENT_LABELS),
+                                              width=14, state="readonly")
+        self.history_sentiment.set("전체")
+        self.history_sentiment.pack(side=tk.LEFT)
+        self.history_sentiment.bind("<<ComboboxSelected>>", lambda e: self.show_history(0))
+
+        # 트리뷰로 기록 표시 (No./평점 머리글을 누르면 정렬)
         columns = ('No.', '광고 문구', '평점', '감성')
         self.history_tree = ttk.Treeview(tab, columns=columns, show='headings', height=25)
 
-        self.history_tree.heading('No.', text='No.')
+        self.history_tree.heading('No.', text='No.', command=lambda: self.sort_history('index'))
         self.history_tree.heading('광고 문구', text='광고 문구')
-        self.history_tree.heading('평점', text='평점')
+        self.history_tree.heading('평점', text='평점', command=lambda: self.sort_history('rating'))
         self.history_tree.heading('감성', text='감성')
 
         self.history_tree.column('No.', width=50, anchor=tk.CENTER)
@@ -441,10 +2105,28 @@ class AdPreferenceGUI:
         scrollbar.grid(row=1, column=1, sticky=(tk.N, tk.S))
         self.history_tree.configure(yscrollcommand=scrollbar.set)
 
+        # 페이지 이동
+        pager_frame = ttk.Frame(tab)
+        pager_frame.grid(row=2, column=0, pady=5)
+
+        ttk.Button(pager_frame, text="◀ 이전", command=lambda: self.move_history_page(-1)).pack(side=tk.LEFT, padx=5)
+        self.history_page_label = ttk.Label(pager_frame, text="")
+        self.history_page_label.pack(side=tk.LEFT, padx=10)
+        ttk.Button(pager_frame, text="다음 ▶", command=lambda: self.move_history_page(1)).pack(side=tk.LEFT, padx=5)
+
+        # 현재 보기 상태
+        self.history_page = 0
+        self.history_sort = 'index'
+        self.history_descending = False
+        self.history_total = 0
+
         # 그리드 가중치
         tab.columnconfigure(0, weight=1)
         tab.rowconfigure(1, weight=1)
 
+        # 첫 페이지 표시 (이후 새 평가는 append_history_row로 이어 붙임)
+        self.show_history(0)
+
     def create_recommend_tab(self):
         """광고 카피 추천 탭"""
         tab = ttk.Frame(self.notebook, padding="10")
@@ -470,13 +2152,20 @@ class AdPreferenceGUI:
             messagebox.showwarning("입력 오류", "광고 문구를 입력해주세요!")
             return
 
-        # 분석 실행
+        # 분석 실행 (작업 스레드, 이전 분석 요청은 취소)
         self.analysis_result.delete("1.0", tk.END)
         self.analysis_result.insert(tk.END, "🤖 AI 자동 분석 중...\n\n")
-        self.root.update()
+        self.current_sentiment = None
 
-        sentiment_result = self.sentiment_analyzer.analyze_text(ad_text)
+        self.jobs.submit(
+            'analyze',
+            lambda: self.sentiment_analyzer.analyze_text(ad_text),
+            self.show_analysis_result,
+            on_error=lambda e: self.show_analysis_result(None)
+        )
 
+    def show_analysis_result(self, sentiment_result: Optional[Dict]):
+        """분석 결과 표시 (작업 완료 후 메인 스레드에서 호출)"""
         if sentiment_result:
             # 분석 결과 표시
             result_text = self.format_analysis_result(sentiment_result)
@@ -489,27 +2178,28 @@ class AdPreferenceGUI:
             self.analysis_result.delete("1.0", tk.END)
             self.analysis_result.insert(tk.END, "⚠️ 감성 분석을 수행할 수 없습니다.")
 
-    def format_analysis_result(self, analysis: Dict) -> str:
+    def format_analysis_result(self, analysis: SentimentResult) -> str:
         """분석 결과를 텍스트로 포맷팅"""
         result = "=" * 70 + "\n"
         result += "📊 AI 감성 분석 결과\n"
         result += "=" * 70 + "\n\n"
 
         # 감성 점수
-        score = analysis['score']
-        result += f"감성 라벨: [{analysis['sentiment_label']}]\n"
+        score = analysis.score
+        result += f"감성 라벨: [{analysis.sentiment_label}]\n"
         result += f"감성 점수: {score}\n\n"
 
         # 주요 단어
-        if analysis.get('words'):
-            words_str = ', '.join(analysis['words'][:8])
+        words = analysis.words
+        if words:
+            words_str = ', '.join(words[:8])
             result += f"주요 단어: {words_str}\n\n"
 
         # 혼합 감성 정보
-        if analysis.get('sentiment_conflict', {}).get('has_conflict'):
-            conflict = analysis['sentiment_conflict']
-            pos_words = [w[0] for w in analysis['positive_words'][:3]]
-            neg_words = [w[0] for w in analysis['negative_words'][:3]]
+        if analysis.has_conflict:
+            conflict = analysis.sentiment_conflict
+            pos_words = [w[0] for w in analysis.positive_words[:3]]
+            neg_words = [w[0] for w in analysis.negative_words[:3]]
 
             result += "⚡ 감성 충돌 감지!\n"
             result += f"  긍정어: {', '.join(pos_words)} (강도: {conflict['positive_strength']:.1f})\n"
@@ -519,22 +2209,22 @@ class AdPreferenceGUI:
                 result += "  💡 스토리텔링형/역설형 광고로 추정됩니다\n\n"
 
         # 광고 스타일
-        if analysis['ad_styles']:
-            styles = ', '.join([f"{s[0]}({s[1]}점)" for s in analysis['ad_styles'][:3]])
+        if analysis.ad_styles:
+            styles = ', '.join([f"{s[0]}({s[1]}점)" for s in analysis.ad_styles[:3]])
             result += f"🎨 광고 스타일: {styles}\n\n"
 
         # 산업군
-        if analysis.get('industries'):
-            industries = ', '.join([f"{i[0]}({i[1]}점)" for i in analysis['industries'][:3]])
+        if analysis.industries:
+            industries = ', '.join([f"{i[0]}({i[1]}점)" for i in analysis.industries[:3]])
             result += f"🏢 산업군: {industries}\n\n"
 
         # 핵심 키워드
-        if analysis['keywords']:
-            keywords = ', '.join([f"'{k[0]}'({k[1]})" for k in analysis['keywords'][:5]])
+        if analysis.keywords:
+            keywords = ', '.join([f"'{k[0]}'({k[1]})" for k in analysis.keywords[:5]])
             result += f"🔑 핵심 키워드: {keywords}\n\n"
 
         # 언어 패턴
-        pattern = analysis['language_pattern']
+        pattern = analysis.language_pattern
         features = []
         if pattern['has_exclamation']:
             features.append("강조형")
@@ -561,23 +2251,48 @@ class AdPreferenceGUI:
             return
 
         rating = self.rating_var.get()
+        timestamp = datetime.now().isoformat()
+
+        # 아직 끝나지 않은 분석은 결과가 입력 초기화 뒤에 표시되지 않도록 취소
+        self.jobs.cancel('analyze')
 
-        # 감성 분석 결과가 있는지 확인
+        # 감성 분석 결과가 있으면 바로 저장
         sentiment_result = getattr(self, 'current_sentiment', None)
-        if not sentiment_result:
-            # 분석이 안 되어 있으면 자동으로 분석
-            sentiment_result = self.sentiment_analyzer.analyze_text(ad_text)
+        if sentiment_result:
+            self.store_rating(ad_text, rating, sentiment_result, timestamp)
+            return
+
+        # 분석이 안 되어 있으면 작업 스레드에서 분석한 뒤 저장 (끝날 때까지 저장 버튼 비활성화)
+        self.save_button.state(['disabled'])
+        self.analysis_result.delete("1.0", tk.END)
+        self.analysis_result.insert(tk.END, "🤖 AI 자동 분석 후 저장 중...\n\n")
+
+        def on_error(e):
+            self.save_button.state(['!disabled'])
+            self.analysis_result.delete("1.0", tk.END)
+            messagebox.showerror("저장 실패", f"⚠️ 감성 분석을 수행할 수 없어 평가를 저장하지 못했습니다.\n{e}")
+
+        self.jobs.submit(
+            'save',
+            lambda: self.sentiment_analyzer.analyze_text(ad_text),
+            lambda result: self.store_rating(ad_text, rating, result, timestamp),
+            on_error=on_error
+        )
+
+    def store_rating(self, ad_text: str, rating: int, sentiment_result: SentimentResult, timestamp: str):
+        """분석이 끝난 평가를 저장하고 화면 갱신 (메인 스레드에서 호출)"""
+        self.save_button.state(['!disabled'])
 
         # 데이터 저장
         ad_info = {
             "ad_text": ad_text,
             "overall_rating": rating,
             "sentiment_analysis": sentiment_result,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": timestamp
         }
 
-        self.ads.append(ad_info)
-        self.save_data()
+        self.add_rating(ad_info)
+        self.append_history_row(self.store.count() - 1, ad_info)
 
         # 통계 업데이트
         self.update_stats()
@@ -585,17 +2300,18 @@ class AdPreferenceGUI:
         # 성공 메시지
         messagebox.showinfo("저장 완료", f"✅ 광고 평가가 저장되었습니다!\n평점: {rating}/10")
 
-        # 입력 초기화
-        self.ad_text_input.delete("1.0", tk.END)
-        self.analysis_result.delete("1.0", tk.END)
-        self.rating_var.set(5)
-        self.current_sentiment = None
+        # 입력 초기화 (분석을 기다리는 동안 다른 문구를 입력했으면 그대로 둠)
+        if self.ad_text_input.get("1.0", tk.END).strip() == ad_text:
+            self.ad_text_input.delete("1.0", tk.END)
+            self.analysis_result.delete("1.0", tk.END)
+            self.rating_var.set(5)
+            self.current_sentiment = None
 
     def update_stats(self):
         """통계 업데이트"""
-        num_ads = len(self.ads)
+        num_ads = self.store.count()
         if num_ads > 0:
-            avg_rating = sum(ad["overall_rating"] for ad in self.ads) / num_ads
+            avg_rating = self.store.average_rating()
             self.stats_label.config(text=f"평가한 광고: {num_ads}개 | 평균 만족도: {avg_rating:.1f}/10점")
         else:
             self.stats_label.config(text=f"평가한 광고: {num_ads}개")
@@ -604,7 +2320,7 @@ class AdPreferenceGUI:
         """취향 분석 표시"""
         self.analysis_text.delete("1.0", tk.END)
 
-        if not self.ads:
+        if not self.store.count():
             self.analysis_text.insert(tk.END, "아직 평가한 광고가 없습니다.\n광고를 평가하고 나만의 취향 프로필을 만들어보세요!")
             return
 
@@ -612,125 +2328,157 @@ class AdPreferenceGUI:
         result += "🧠 AI 기반 광고 취향 분석 리포트\n"
         result += "=" * 80 + "\n\n"
 
-        num_ads = len(self.ads)
-        avg_rating = sum(ad["overall_rating"] for ad in self.ads) / num_ads
+        num_ads = self.store.count()
+        avg_rating = self.store.average_rating()
 
         result += f"📈 평가 데이터: {num_ads}개 광고 | 평균 만족도: {avg_rating:.1f}/10점\n"
         result += "-" * 80 + "\n\n"
 
-        # 감성 분석이 있는 광고만 추출
-        ads_with_sentiment = [ad for ad in self.ads if ad.get("sentiment_analysis")]
+        # 감성 분석이 있는 광고만 집계
+        sentiment_stats = self.store.group_stats('sentiment_label')
 
-        if ads_with_sentiment:
+        if sentiment_stats:
             # 감성 톤 선호도
             result += "🎭 감성 톤 선호도\n"
             result += "-" * 80 + "\n"
 
-            sentiment_ratings = {}
-            for ad in ads_with_sentiment:
-                label = ad["sentiment_analysis"]["sentiment_label"]
-                rating = ad["overall_rating"]
-
-                if label not in sentiment_ratings:
-                    sentiment_ratings[label] = []
-                sentiment_ratings[label].append(rating)
+            for label, avg, count in sentiment_stats[:5]:
+                result += f"  {label:15s} | 평균: {avg:4.1f}점 | 평가 수: {count:3d}개\n"
 
-            sorted_sentiments = sorted(
-                sentiment_ratings.items(),
-                key=lambda x: sum(x[1])/len(x[1]),
-                reverse=True
-            )
+            best_sentiment = sentiment_stats[0][0]
+            result += f"\n💡 당신은 '{best_sentiment}' 톤의 광고를 선호합니다.\n\n"
 
-            for label, ratings in sorted_sentiments[:5]:
-                avg = sum(ratings) / len(ratings)
-                result += f"  {label:15s} | 평균: {avg:4.1f}점 | 평가 수: {len(ratings):3d}개\n"
-
-            if sorted_sentiments:
-                best_sentiment = sorted_sentiments[0][0]
-                result += f"\n💡 당신은 '{best_sentiment}' 톤의 광고를 선호합니다.\n\n"
-
-            # 광고 스타일 선호도
+            # 광고 스타일 선호도 (주 스타일 기준)
             result += "🎨 광고 스타일 선호도\n"
             result += "-" * 80 + "\n"
 
-            style_ratings = {}
-            for ad in ads_with_sentiment:
-                if ad["sentiment_analysis"].get("ad_styles"):
-                    main_style = ad["sentiment_analysis"]["ad_styles"][0][0]
-                    rating = ad["overall_rating"]
-
-                    if main_style not in style_ratings:
-                        style_ratings[main_style] = []
-                    style_ratings[main_style].append(rating)
+            style_stats = self.store.group_stats('main_style')
 
-            if style_ratings:
-                sorted_styles = sorted(
-                    style_ratings.items(),
-                    key=lambda x: sum(x[1])/len(x[1]),
-                    reverse=True
-                )
+            if style_stats:
+                for style, avg, count in style_stats[:5]:
+                    result += f"  {style:15s} | 평균: {avg:4.1f}점 | 평가 수: {count:3d}개\n"
 
-                for style, ratings in sorted_styles[:5]:
-                    avg = sum(ratings) / len(ratings)
-                    result += f"  {style:15s} | 평균: {avg:4.1f}점 | 평가 수: {len(ratings):3d}개\n"
-
-                best_style = sorted_styles[0][0]
+                best_style = style_stats[0][0]
                 result += f"\n💡 당신은 '{best_style}' 광고를 가장 좋아합니다.\n\n"
 
         # 최고/최저 광고
         result += "⭐ 베스트 & 워스트\n"
         result += "-" * 80 + "\n"
 
-        sorted_ads = sorted(self.ads, key=lambda x: x["overall_rating"], reverse=True)
+        best_ad, worst_ad = self.store.best_and_worst()
 
-        best_ad = sorted_ads[0]
         result += f"\n🏆 가장 마음에 든 광고 ({best_ad['overall_rating']}점):\n"
         result += f"   \"{best_ad['ad_text'][:100]}{'...' if len(best_ad['ad_text']) > 100 else ''}\"\n"
 
-        if len(sorted_ads) >= 3:
-            worst_ad = sorted_ads[-1]
+        if num_ads >= 3:
             result += f"\n👎 아쉬웠던 광고 ({worst_ad['overall_rating']}점):\n"
             result += f"   \"{worst_ad['ad_text'][:100]}{'...' if len(worst_ad['ad_text']) > 100 else ''}\"\n"
 
         self.analysis_text.insert(tk.END, result)
 
-    def show_history(self):
-        """평가 기록 표시"""
-        # 기존 항목 제거
-        for item in self.history_tree.get_children():
-            self.history_tree.delete(item)
+    def history_filters(self) -> Dict[str, Any]:
+        """기록 탭의 현재 필터 (저장소 조회 인자)"""
+        min_rating = self.history_min_rating.get()
+        sentiment = self.history_sentiment.get()
+        return {
+            'min_rating': int(min_rating) if min_rating != "전체" else None,
+            'sentiment_label': sentiment if sentiment != "전체" else None
+        }
 
-        if not self.ads:
+    def show_history(self, page: Optional[int] = None):
+        """평가 기록 표시 (현재 페이지의 행만 만듦)"""
+        filters = self.history_filters()
+        self.history_total = self.store.count_matching(**filters)
+        last_page = max(0, (self.history_total - 1) // HISTORY_PAGE_SIZE)
+        self.history_page = min(max(0, self.history_page if page is None else page), last_page)
+
+        rows = self.store.history_rows(
+            self.history_page * HISTORY_PAGE_SIZE, HISTORY_PAGE_SIZE,
+            sort=self.history_sort, descending=self.history_descending, **filters
+        )
+
+        # 기존 항목 제거 (한 페이지 분량만 지우고 다시 만듦)
+        self.history_tree.delete(*self.history_tree.get_children())
+        for row in rows:
+            self.insert_history_row(row)
+        self.update_history_pager()
+
+    def insert_history_row(self, row: Tuple[int, str, int, Optional[str]]):
+        """기록 한 줄을 트리뷰에 추가"""
+        number, ad_text, rating, sentiment = row
+        ad_text = ad_text[:60] + "..." if len(ad_text) > 60 else ad_text
+        self.history_tree.insert('', tk.END, values=(number, ad_text, f"{rating}/10", sentiment or "N/A"))
+
+    def update_history_pager(self):
+        """페이지 표시 갱신"""
+        pages = max(1, (self.history_total + HISTORY_PAGE_SIZE - 1) // HISTORY_PAGE_SIZE)
+        self.history_page_label.config(text=f"{self.history_page + 1} / {pages} 페이지 (총 {self.history_total}개)")
+
+    def move_history_page(self, step: int):
+        """이전/다음 페이지"""
+        self.show_history(self.history_page + step)
+
+    def sort_history(self, sort: str):
+        """머리글 클릭 정렬 (같은 기준을 다시 누르면 순서 반전)"""
+        if self.history_sort == sort:
+            self.history_descending = not self.history_descending
+        else:
+            self.history_sort = sort
+            self.history_descending = sort == 'rating'
+        self.show_history(0)
+
+    def append_history_row(self, index: int, ad: Dict):
+        """새 평가를 기록 탭에 반영 (전체를 다시 그리지 않음)"""
+        filters = self.history_filters()
+        if filters['min_rating'] is not None and ad['overall_rating'] < filters['min_rating']:
+            return
+        if filters['sentiment_label'] is not None and rating_group_key(ad, 'sentiment_label') != filters['sentiment_label']:
             return
 
-        # 데이터 추가
-        for i, ad in enumerate(self.ads, 1):
-            ad_text = ad['ad_text'][:60] + "..." if len(ad['ad_text']) > 60 else ad['ad_text']
-            rating = f"{ad['overall_rating']}/10"
-
-            sentiment = "N/A"
-            if ad.get("sentiment_analysis"):
-                sentiment = ad["sentiment_analysis"]["sentiment_label"]
-
-            self.history_tree.insert('', tk.END, values=(i, ad_text, rating, sentiment))
+        # 기록 순 보기의 마지막 페이지에 자리가 있을 때만 행을 바로 추가하고, 나머지는 개수만 갱신
+        on_last_page = self.history_page == max(0, (self.history_total - 1) // HISTORY_PAGE_SIZE)
+        self.history_total += 1
+        if (self.history_sort == 'index' and not self.history_descending and on_last_page
+                and len(self.history_tree.get_children()) < HISTORY_PAGE_SIZE):
+            self.insert_history_row((index + 1, ad['ad_text'], ad['overall_rating'],
+                                     rating_group_key(ad, 'sentiment_label')))
+        self.update_history_pager()
+
+    def compact_history(self):
+        """저널을 스냅샷으로 합쳐 기록 파일 정리"""
+        try:
+            self.save_data()
+        except OSError as e:
+            messagebox.showerror("정리 실패", f"⚠️ 기록 파일을 정리하지 못했습니다.\n{e}")
+            return
+        messagebox.showinfo("정리 완료", f"✅ 평가 기록 {self.store.count()}개를 정리했습니다.")
 
     def show_recommendations(self):
         """맞춤 광고 추천 표시"""
+        self.jobs.cancel('recommend')
         self.recommend_text.delete("1.0", tk.END)
 
         if not self.ad_copy_database:
             self.recommend_text.insert(tk.END, "광고 카피 데이터베이스가 비어있습니다.")
             return
 
-        if len(self.ads) < 3:
+        if self.store.count() < 3:
             self.recommend_text.insert(tk.END, "추천을 위해서는 최소 3개 이상의 광고를 평가해주세요.")
             return
 
         self.recommend_text.insert(tk.END, "🤖 취향 분석 중...\n\n")
-        self.root.update()
-
-        recommendations = self.recommend_personalized_copies(top_n=10)
 
+        # 저장소 조회는 메인 스레드에서, 색인 로드와 점수 계산만 작업 스레드에서 (이전 추천 요청은 취소)
+        user_liked_texts = self.store.texts(min_rating=7)
+        high_rated_count = len(user_liked_texts)
+        self.jobs.submit(
+            'recommend',
+            lambda: self.compute_recommendations(user_liked_texts, top_n=10),
+            lambda recommendations: self.display_recommendations(recommendations, high_rated_count)
+        )
+
+    def display_recommendations(self, recommendations: List[Tuple[Dict, float, str]], high_rated_count: int):
+        """추천 결과 표시 (작업 완료 후 메인 스레드에서 호출)"""
         if not recommendations:
             self.recommend_text.delete("1.0", tk.END)
             self.recommend_text.insert(tk.END, "추천할 수 있는 광고 카피를 찾을 수 없습니다.")
@@ -741,7 +2489,6 @@ class AdPreferenceGUI:
         result += "✨ AI 맞춤 광고 카피 추천\n"
         result += "=" * 80 + "\n\n"
 
-        high_rated_count = len([ad for ad in self.ads if ad['overall_rating'] >= 7])
         result += f"📊 분석 기반: 높은 평가 광고 {high_rated_count}개\n"
         result += "-" * 80 + "\n\n"
 
@@ -770,65 +2517,286 @@ class AdPreferenceGUI:
         if not self.ad_copy_database:
             return []
 
-        if len(self.ads) < 3:
+        if self.store.count() < 3:
             return []
 
         # 높은 평가를 받은 광고 (7점 이상)
-        high_rated_ads = [ad for ad in self.ads if ad['overall_rating'] >= 7]
+        return self.compute_recommendations(self.store.texts(min_rating=7), top_n)
 
-        if not high_rated_ads:
+    def compute_recommendations(self, user_liked_texts: List[str], top_n: int = 10) -> List[Tuple[Dict, float, str]]:
+        """좋아한 광고 문구로 추천 계산 (저장소를 건드리지 않으므로 작업 스레드에서 실행 가능)"""
+        if not user_liked_texts:
             return []
 
         try:
-            # 사용자가 좋아하는 광고 텍스트 수집
-            user_liked_texts = [ad['ad_text'] for ad in high_rated_ads]
+            # 미리 학습된 DB 색인으로 사용자가 좋아하는 광고들의 평균 벡터 (희소) 계산
+            catalog_index = self.get_catalog_index()
+            user_profile = catalog_index.profile(user_liked_texts)
 
-            # 광고 카피 DB 텍스트 수집
-            db_texts = [copy['text'] for copy in self.ad_copy_database]
+            # DB 광고들과의 유사도 중 0.1 이상인 상위 N개
+            top_indices, top_similarities = catalog_index.top_k(user_profile, top_n, threshold=0.1)[0]
 
-            # 모든 텍스트 합치기
-            all_texts = user_liked_texts + db_texts
+            if len(top_indices) == 0:
+                return []
 
-            # TF-IDF 벡터화
-            vectorizer = TfidfVectorizer()
-            tfidf_matrix = vectorizer.fit_transform(all_texts)
+            # 결과 구성: (광고 카피 dict, 유사도, 추천 이유)
+            return [
+                (self.ad_copy_database[idx], similarity, f"{self.ad_copy_database[idx].get('category', '기타')} 스타일")
+                for idx, similarity in zip(top_indices.tolist(), top_similarities.tolist())
+            ]
 
-            # 사용자가 좋아하는 광고들의 평균 벡터 계산
-            user_vectors = tfidf_matrix[:len(user_liked_texts)]
-            user_profile = np.asarray(user_vectors.mean(axis=0))
+        except Exception as e:
+            print(f"⚠️ 추천 시스템 오류: {e}")
+            return []
 
-            # DB 광고들과의 유사도 계산
-            db_vectors = tfidf_matrix[len(user_liked_texts):]
-            similarities = cosine_similarity(user_profile, db_vectors)[0]
 
-            # 유사도가 0.1 이상인 것만 필터링
-            valid_indices = [i for i, sim in enumerate(similarities) if sim >= 0.1]
+# 파이프라인 단계별 지연 시간 히스토그램 경계 (초, Prometheus 기본값과 비슷한 로그 간격)
+PROFILE_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
 
-            if not valid_indices:
-                return []
+# Prometheus 지표 이름 접두사
+PROFILE_METRIC_PREFIX = "lfair_pipeline"
 
-            # 상위 N개 추천
-            top_indices = sorted(valid_indices, key=lambda i: similarities[i], reverse=True)[:top_n]
 
-            # 결과 구성
-            recommendations = []
-            for idx in top_indices:
-                copy_data = self.ad_copy_database[idx]
-                similarity = similarities[idx]
-                reason = f"{copy_data.get('category', '기타')} 스타일"
-                recommendations.append((copy_data, similarity, reason))
+class StageStats:
+    """한 단계의 호출 수, 오류 수, 누적·최대 시간과 구간별 호출 수"""
 
-            return recommendations
+    __slots__ = ('count', 'errors', 'total', 'max', 'bucket_counts')
 
-        except Exception as e:
-            print(f"⚠️ 추천 시스템 오류: {e}")
-            return []
+    def __init__(self, num_buckets: int):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        # 마지막 칸은 가장 큰 경계를 넘는 호출 (+Inf)
+        self.bucket_counts = [0] * (num_buckets + 1)
+
+
+class PipelineProfiler:
+    """분석·추천 파이프라인 단계별 지연 시간 계측기 (켤 때만 메서드를 감싸므로 꺼져 있으면 비용 없음)
+
+    install()은 PROFILE_STAGES의 메서드·함수를 시간을 재는 래퍼로 바꾸고, uninstall()은
+    원래 함수로 되돌립니다. 계측하지 않을 때 파이프라인 코드에는 분기 하나도 추가되지 않습니다.
+    결과는 JSON 또는 Prometheus 텍스트 형식으로 내보낼 수 있습니다.
+    """
+
+    def __init__(self, buckets: Sequence[float] = PROFILE_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.stages: Dict[str, StageStats] = {}
+        self._originals: List[Tuple[Any, str, Any]] = []
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float, failed: bool = False):
+        """단계 호출 하나의 소요 시간 기록"""
+        with self._lock:
+            stats = self.stages.get(stage)
+            if stats is None:
+                stats = self.stages[stage] = StageStats(len(self.buckets))
+            stats.count += 1
+            stats.errors += failed
+            stats.total += seconds
+            stats.max = max(stats.max, seconds)
+            stats.bucket_counts[bisect.bisect_left(self.buckets, seconds)] += 1
+
+    def timed(self, stage: str, func):
+        """func 호출마다 소요 시간을 stage에 기록하는 래퍼"""
+        record = self.record
+        clock = time.perf_counter
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                result = func(*args, **kwargs)
+            except BaseException:
+                record(stage, clock() - start, failed=True)
+                raise
+            record(stage, clock() - start)
+            return result
+
+        return wrapper
+
+    def install(self, targets: Optional[Iterable[Tuple[Any, str, str]]] = None):
+        """(소유 객체, 속성 이름, 단계 이름) 목록의 함수를 계측 래퍼로 교체"""
+        if self._originals:
+            return
+        for owner, attr, stage in (PROFILE_STAGES if targets is None else targets):
+            original = owner.__dict__[attr] if isinstance(owner, type) else getattr(owner, attr)
+            self._originals.append((owner, attr, original))
+            setattr(owner, attr, self.timed(stage, original))
+
+    def uninstall(self):
+        """원래 함수로 되돌리기 (기록은 유지)"""
+        while self._originals:
+            owner, attr, original = self._originals.pop()
+            setattr(owner, attr, original)
+
+    def quantile(self, stats: StageStats, q: float) -> float:
+        """히스토그램 구간으로 추정한 분위수 (해당 구간의 상한, 마지막 구간이면 최댓값)"""
+        rank = q * stats.count
+        seen = 0
+        for bound, count in zip(self.buckets, stats.bucket_counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, stats.max)
+        return stats.max
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """단계별 통계 (JSON으로 바로 저장 가능한 dict, 단계 이름 순)"""
+        result = {}
+        with self._lock:
+            for stage in sorted(self.stages):
+                stats = self.stages[stage]
+                cumulative = list(itertools.accumulate(stats.bucket_counts))
+                result[stage] = {
+                    'count': stats.count,
+                    'errors': stats.errors,
+                    'total_seconds': stats.total,
+                    'mean_seconds': stats.total / stats.count if stats.count else 0.0,
+                    'max_seconds': stats.max,
+                    'p50_seconds': self.quantile(stats, 0.5),
+                    'p99_seconds': self.quantile(stats, 0.99),
+                    'buckets': dict(zip([str(bound) for bound in self.buckets] + ['+Inf'], cumulative))
+                }
+        return result
+
+    def to_json(self) -> str:
+        return json.dumps({'buckets': list(self.buckets), 'stages': self.snapshot()}, ensure_ascii=False, indent=2)
+
+    def to_prometheus(self) -> str:
+        """Prometheus 텍스트 노출 형식 (단계별 histogram + 오류 counter)"""
+        name = f"{PROFILE_METRIC_PREFIX}_stage_seconds"
+        lines = [f"# HELP {name} Latency of analysis/recommendation pipeline stages.",
+                 f"# TYPE {name} histogram"]
+        snapshot = self.snapshot()
+        for stage, stats in snapshot.items():
+            for bound, count in stats['buckets'].items():
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {count}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {stats["total_seconds"]:.9f}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {stats["count"]}')
+
+        errors = f"{PROFILE_METRIC_PREFIX}_stage_errors_total"
+        lines += [f"# HELP {errors} Pipeline stage calls that raised an exception.",
+                  f"# TYPE {errors} counter"]
+        for stage, stats in snapshot.items():
+            lines.append(f'{errors}{{stage="{stage}"}} {stats["errors"]}')
+        return '\n'.join(lines) + '\n'
+
+    def dump(self, path: str, fmt: Optional[str] = None):
+        """통계를 파일로 저장 (형식을 생략하면 .prom/.txt는 Prometheus, 그 외는 JSON)"""
+        if fmt is None:
+            fmt = 'prometheus' if os.path.splitext(path)[1].lower() in ('.prom', '.txt') else 'json'
+        content = self.to_prometheus() if fmt == 'prometheus' else self.to_json()
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+
+# 계측 대상 (소유 객체, 속성 이름, 단계 이름): 분석은 analyze.*, 추천은 recommend.*
+PROFILE_STAGES = [
+    (AdvancedSentimentAnalyzer, 'load_sentiment_dict', 'lexicon.load'),
+    (AdvancedSentimentAnalyzer, 'analyze_text', 'analyze.total'),
+    (AdvancedSentimentAnalyzer, 'extract_words', 'analyze.tokenize'),
+    (AdvancedSentimentAnalyzer, 'match_lexicon', 'analyze.lexicon'),
+    (KeywordClassifier, 'classify', 'analyze.classify'),
+    (AdvancedSentimentAnalyzer, 'extract_keywords', 'analyze.keywords'),
+    (AdvancedSentimentAnalyzer, 'analyze_language_pattern', 'analyze.language_pattern'),
+    (AdPreferenceGUI, 'compute_recommendations', 'recommend.total'),
+    (CatalogTfidfIndex, '_load', 'recommend.index_load'),
+    (CatalogTfidfIndex, '_build', 'recommend.fit'),
+    (CatalogTfidfIndex, 'transform', 'recommend.transform'),
+    (sys.modules[__name__], 'cosine_scores', 'recommend.similarity'),
+    (sys.modules[__name__], 'select_top_k', 'recommend.sort'),
+]
+
+# `--profile`만 주었을 때 단계별 통계를 저장할 파일 (스크립트 폴더)
+PROFILE_DEFAULT_OUTPUT = "pipeline_profile.json"
+
+
+def profile_output_path(argv: List[str]) -> Optional[str]:
+    """`--profile` 또는 `--profile=FILE` 인자에서 통계 파일 경로 (없으면 None)"""
+    for arg in argv:
+        if arg == '--profile':
+            return os.path.join(os.path.dirname(os.path.abspath(__file__)), PROFILE_DEFAULT_OUTPUT)
+        if arg.startswith('--profile='):
+            return arg.split('=', 1)[1]
+    return None
+
+
+# 창이 뜨기 전에 가져오면 안 되는 무거운 라이브러리
+HEAVY_MODULES = ('numpy', 'scipy', 'sklearn')
+
+# 새 인터프리터에서 main_gui를 가져오는 측정 스크립트
+STARTUP_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import main_gui
+elapsed = time.perf_counter() - start
+print(json.dumps({'import': elapsed, 'heavy': [name for name in main_gui.HEAVY_MODULES if name in sys.modules]}))
+"""
+
+
+def parse_import_times(report: str) -> List[Tuple[str, int, int, int]]:
+    """`-X importtime` 출력에서 (모듈, 중첩 깊이, 자체 시간 µs, 누적 시간 µs) 목록"""
+    rows = []
+    for line in report.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return rows
+
+
+def print_startup_report(top: int = 15) -> bool:
+    """새 프로세스로 main_gui import 시간을 재서 패키지별로 출력 (무거운 라이브러리를 가져오지 않았으면 True)"""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', STARTUP_PROBE], cwd=script_dir,
+                          capture_output=True, text=True, encoding='utf-8')
+    if proc.returncode != 0:
+        print(f"⚠️ 시작 시간 측정 실패:\n{proc.stderr[-2000:]}")
+        return False
+    timings = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    packages: Dict[str, List[int]] = {}
+    for name, _, self_us, _ in parse_import_times(proc.stderr):
+        totals = packages.setdefault(name.split('.')[0], [0, 0])
+        totals[0] += self_us
+        totals[1] += 1
+
+    print("📦 패키지별 import 시간")
+    for package, (self_us, modules) in sorted(packages.items(), key=lambda x: x[1][0], reverse=True)[:top]:
+        print(f"  {package:<24} {self_us / 1000:8.1f}ms  ({modules}개 모듈)")
+    print(f"main_gui import: {timings['import'] * 1000:.1f}ms (감성사전은 창을 구성하는 동안 백그라운드에서 로드)")
+    if timings['heavy']:
+        print(f"⚠️ 창이 뜨기 전에 무거운 라이브러리를 가져왔습니다: {', '.join(timings['heavy'])}")
+        return False
+    return True
 
 
 def main():
+    # `python main_gui.py --startup-report`: 창을 띄우지 않고 import 시간만 진단
+    if '--startup-report' in sys.argv[1:]:
+        sys.exit(0 if print_startup_report() else 1)
+
+    # `python main_gui.py --profile[=FILE]`: 분석·추천 단계별 처리 시간을 재서 창을 닫을 때 저장
+    profile_output = profile_output_path(sys.argv[1:])
+    profiler = None
+    if profile_output:
+        profiler = PipelineProfiler()
+        profiler.install()
+
     root = tk.Tk()
-    app = AdPreferenceGUI(root)
-    root.mainloop()
+    # `python main_gui.py --migrate-sqlite`: 평가 기록을 SQLite 저장소로 옮긴 뒤 실행
+    app = AdPreferenceGUI(root, migrate_sqlite='--migrate-sqlite' in sys.argv[1:])
+    try:
+        root.mainloop()
+    finally:
+        if profiler is not None:
+            profiler.uninstall()
+            profiler.dump(profile_output)
+            print(f"✅ 단계별 통계를 {profile_output}에 저장했습니다.")
 
 
 if __name__ == "__main__":
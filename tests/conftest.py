@@ -0,0 +1,30 @@
+"""테스트 공통 설정: cli-version/main2.py를 가져오고 감성 분석기를 한 번만 로드"""
+import os
+import shutil
+import sys
+
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+CLI_DIR = os.path.join(os.path.dirname(TESTS_DIR), "cli-version")
+sys.path.insert(0, CLI_DIR)
+
+import main2  # noqa: E402
+
+main2.console.quiet = True
+
+
+@pytest.fixture(scope="session")
+def analyzer(tmp_path_factory):
+    """감성 분석기 (감성사전 캐시 파일이 저장소에 생기지 않도록 임시 디렉토리의 사본 사용)"""
+    workdir = tmp_path_factory.mktemp("lexicon")
+    senti_path = workdir / "SentiWord_info.json"
+    shutil.copy(os.path.join(CLI_DIR, "SentiWord_info.json"), senti_path)
+    return main2.AdvancedSentimentAnalyzer(str(senti_path), quiet=True)
+
+
+@pytest.fixture(scope="session")
+def catalog_texts():
+    """광고 카피 DB 문구 (고정 말뭉치)"""
+    with open(os.path.join(CLI_DIR, "ad_copy_database.json"), 'r', encoding='utf-8') as f:
+        return [copy['text'] for copy in main2.json.load(f)]
@@ -0,0 +1,82 @@
+"""분석 결과 캐시: SQLite 파일에서 다시 불러오고, 감성사전 버전이 바뀌면 예전 결과를 쓰지 않는지"""
+import unicodedata
+
+import pytest
+
+import main2
+
+TEXTS = ["행복한 하루, 최고의 맛!", "별로인 서비스와 느린 배송", "신선한 커피로 시작하는 아침"]
+
+
+@pytest.fixture
+def use_cache(analyzer, monkeypatch):
+    """세션 분석기에 캐시를 잠시 붙임 (테스트가 끝나면 원래대로)"""
+    def attach(maxsize, path=None):
+        cache = main2.AnalysisCache(maxsize, path)
+        monkeypatch.setattr(analyzer, 'cache', cache)
+        return cache
+    return attach
+
+
+def uncached(analyzer, text):
+    return analyzer._analyze_uncached(unicodedata.normalize('NFC', text))
+
+
+def test_disk_tier_survives_new_cache(analyzer, use_cache, tmp_path):
+    path = str(tmp_path / "analysis_cache.sqlite3")
+    first = use_cache(16, path)
+    for text in TEXTS:
+        analyzer.analyze_text(text)
+    assert first.stats()['misses'] == len(TEXTS)
+    first.close()
+
+    # 새 실행(새 캐시)에서는 메모리가 비어 있으므로 디스크에서 찾음
+    second = use_cache(16, path)
+    for text in TEXTS:
+        assert analyzer.analyze_text(text) == uncached(analyzer, text)
+    assert (second.disk_hits, second.misses) == (len(TEXTS), 0)
+
+    # 디스크에서 찾은 결과는 메모리에도 올라감
+    analyzer.analyze_text(TEXTS[0])
+    assert second.hits == 1
+    second.close()
+
+
+def test_zero_maxsize_keeps_nothing_in_memory(analyzer, use_cache, tmp_path):
+    cache = use_cache(0, str(tmp_path / "analysis_cache.sqlite3"))
+    analyzer.analyze_text(TEXTS[0])
+    analyzer.analyze_text(TEXTS[0])
+    assert len(cache.entries) == 0
+    assert (cache.hits, cache.disk_hits, cache.misses) == (0, 1, 1)
+    cache.close()
+
+
+def test_nfd_text_shares_nfc_entry(analyzer, use_cache):
+    cache = use_cache(16)
+    expected = analyzer.analyze_text(TEXTS[0])
+    assert analyzer.analyze_text(unicodedata.normalize('NFD', TEXTS[0])) == expected
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_lexicon_version_change_misses(analyzer, use_cache, tmp_path, monkeypatch):
+    path = str(tmp_path / "analysis_cache.sqlite3")
+    cache = use_cache(16, path)
+    analyzer.analyze_text(TEXTS[0])
+    old_version = analyzer.lexicon_version
+
+    # 분석 규칙 버전이 오르면 버전 해시가 바뀌어 메모리·디스크 캐시 모두 쓰지 않음
+    monkeypatch.setattr(main2, 'ANALYSIS_VERSION', main2.ANALYSIS_VERSION + 1)
+    monkeypatch.setattr(analyzer, '_lexicon_version', None)
+    assert analyzer.lexicon_version != old_version
+    analyzer.analyze_text(TEXTS[0])
+    assert (cache.hits, cache.disk_hits, cache.misses) == (0, 0, 2)
+
+    # 키워드 표가 바뀌어도 마찬가지
+    monkeypatch.setattr(analyzer, 'style_keywords', {**analyzer.style_keywords, "테스트": ["커피"]})
+    monkeypatch.setattr(analyzer, '_lexicon_version', None)
+    analyzer.analyze_text(TEXTS[0])
+    assert cache.misses == 3
+
+    # 같은 버전의 결과는 다른 버전 결과와 섞이지 않고 그대로 남아 있음
+    assert cache.get(old_version, TEXTS[0]) is not None
+    cache.close()
@@ -0,0 +1,33 @@
+"""analyze_batch가 analyze_text와 필드 단위로 같은 결과를 내는지"""
+import main2
+
+# 사전 표제어, 어근 활용형, 구 표현, 혼합 감성, 감성어가 없는 문구, 빈 문구
+EXTRA_TEXTS = [
+    "행복한 하루, 최고의 맛!",
+    "행복으로 가득한 사랑스러운 선물",
+    "놀라운 바르는 지지않아 이기지말자",
+    "가격은 비싸지만 품질은 최고입니다",
+    "별로인 서비스와 느린 배송",
+    "Fresh coffee every morning",
+    "123 456",
+    "",
+]
+
+
+def test_analyze_batch_matches_analyze_text(analyzer, catalog_texts):
+    texts = catalog_texts + EXTRA_TEXTS
+    expected = [analyzer.analyze_text(text) for text in texts]
+    assert analyzer.analyze_batch(texts) == expected
+
+
+def test_analyze_batch_with_cache_matches_uncached(analyzer, catalog_texts):
+    cached = main2.AdvancedSentimentAnalyzer(analyzer.senti_dict_file, quiet=True, cache_size=64)
+    texts = catalog_texts[:40] + catalog_texts[:10] + EXTRA_TEXTS
+    # 절반은 미리 캐시에 넣어 캐시 적중과 새 분석이 섞이게 함
+    for text in texts[::2]:
+        cached.analyze_text(text)
+    assert cached.analyze_batch(texts) == [analyzer.analyze_text(text) for text in texts]
+
+
+def test_analyze_batch_empty(analyzer):
+    assert analyzer.analyze_batch([]) == []
@@ -0,0 +1,64 @@
+"""MinHash LSH 서명 파일(.lsh.bin)을 다시 불러와도 같은 후보를 내고, 기록이 바뀌면 새로 만드는지"""
+import os
+
+import main2
+
+
+def make_index(path, texts, **kwargs):
+    index = main2.MinHashLSHIndex(path, **kwargs)
+    index.sync(texts)
+    return index
+
+
+def test_reload_gives_same_candidates(tmp_path, catalog_texts):
+    path = str(tmp_path / "ad_data.lsh.bin")
+    texts = catalog_texts[:80]
+    built = make_index(path, texts)
+    size = os.path.getsize(path)
+
+    reloaded = make_index(path, texts)
+    assert os.path.getsize(path) == size
+    for text in texts[:20]:
+        assert reloaded.candidates(text) == built.candidates(text)
+        # 같은 문구는 서명이 같으므로 항상 자기 자신이 후보
+        assert texts.index(text) in reloaded.candidates(text)
+
+
+def test_add_then_reload(tmp_path, catalog_texts):
+    path = str(tmp_path / "ad_data.lsh.bin")
+    index = make_index(path, catalog_texts[:30])
+    index.add(catalog_texts[30])
+    assert 30 in index.candidates(catalog_texts[30])
+
+    # 추가 기록된 레코드까지 불러오므로 빠진 문서가 없음
+    size = os.path.getsize(path)
+    reloaded = make_index(path, catalog_texts[:31])
+    assert os.path.getsize(path) == size
+    assert reloaded.candidates(catalog_texts[30]) == index.candidates(catalog_texts[30])
+
+
+def test_changed_history_invalidates_file(tmp_path, catalog_texts):
+    path = str(tmp_path / "ad_data.lsh.bin")
+    texts = catalog_texts[:20]
+    make_index(path, texts)
+
+    # 중간 문서가 바뀌면 해시가 어긋나므로 저장된 서명을 버리고 새 기록으로 다시 만듦
+    edited = texts[:10] + ["완전히 새로운 커피 광고 문구"] + texts[11:]
+    index = make_index(path, edited)
+    assert 10 not in index.candidates(texts[10])
+    assert 10 in index.candidates(edited[10])
+    assert index.num_docs == len(edited)
+
+
+def test_changed_settings_rebuild_file(tmp_path, catalog_texts):
+    path = str(tmp_path / "ad_data.lsh.bin")
+    texts = catalog_texts[:20]
+    make_index(path, texts)
+
+    # 밴드 수가 다르면 머리글이 맞지 않으므로 새 설정으로 다시 만듦
+    index = make_index(path, texts, bands=16, rows=4)
+    with open(path, 'rb') as f:
+        header = main2.LSH_HEADER.unpack(f.read(main2.LSH_HEADER.size))
+    assert header[1:3] == (16, 4)
+    assert os.path.getsize(path) == main2.LSH_HEADER.size + len(texts) * index._record.itemsize
+    assert 5 in index.candidates(texts[5])
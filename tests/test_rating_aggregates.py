@@ -0,0 +1,90 @@
+"""평가 집계 파일(.aggregates.json): 기록과 맞으면 그대로 쓰고, 어긋나면 전체 기록으로 다시 계산하는지"""
+import json
+
+import pytest
+
+import main2
+
+TEXTS = [
+    ("행복한 하루, 최고의 맛!", 9),
+    ("별로인 서비스와 느린 배송", 2),
+    ("신선한 커피로 시작하는 아침", 8),
+    ("가격은 비싸지만 품질은 최고입니다", 6),
+    ("사랑스러운 선물로 전하는 마음", 9),
+]
+
+
+@pytest.fixture
+def journal(tmp_path, analyzer):
+    store = main2.RatingJournal(str(tmp_path / "ad_data.json"))
+    store.load()
+    for i, (text, rating) in enumerate(TEXTS):
+        store.append({'ad_text': text, 'overall_rating': rating, 'sentiment_analysis': analyzer.analyze_text(text),
+                      'timestamp': f"2024-01-01T00:00:{i:02d}"})
+    return store
+
+
+def summary(store):
+    best, worst = store.best_and_worst()
+    return (store.count(), store.average_rating(), store.group_stats('sentiment_label'),
+            store.group_stats('main_style'), best['ad_text'], worst['ad_text'])
+
+
+def reload(journal, monkeypatch):
+    """다시 불러온 저장소와 집계 파일을 다시 썼는지 여부"""
+    saved = []
+    original_save = main2.RatingAggregates.save
+    with monkeypatch.context() as m:
+        m.setattr(main2.RatingAggregates, 'save', lambda self: saved.append(True) or original_save(self))
+        store = main2.RatingJournal(journal.snapshot_path)
+        store.load()
+    return store, bool(saved)
+
+
+def edit_sidecar(journal, **changes):
+    with open(journal.aggregates.path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    data.update(changes)
+    with open(journal.aggregates.path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+
+
+def test_matching_sidecar_is_reused(journal, monkeypatch):
+    store, rebuilt = reload(journal, monkeypatch)
+    assert not rebuilt
+    assert summary(store) == summary(journal)
+
+
+@pytest.mark.parametrize("changes", [
+    {'last_fingerprint': "0" * 16, 'total': 0},
+    {'count': len(TEXTS) - 1, 'total': 0},
+    {'version': main2.AGGREGATES_VERSION + 1},
+])
+def test_mismatched_sidecar_is_rebuilt(journal, monkeypatch, changes):
+    expected = summary(journal)
+    edit_sidecar(journal, **changes)
+
+    store, rebuilt = reload(journal, monkeypatch)
+    assert rebuilt
+    assert summary(store) == expected
+
+    # 다시 계산한 집계가 저장되었으므로 다음에는 그대로 씀
+    store, rebuilt = reload(journal, monkeypatch)
+    assert not rebuilt
+    assert summary(store) == expected
+
+
+def test_ratings_added_elsewhere_trigger_rebuild(journal, analyzer, monkeypatch):
+    # 집계 파일을 고치지 않는 다른 저장소(예: 집계 파일을 지운 채 추가)가 기록을 바꾼 경우
+    with open(journal.aggregates.path, 'rb') as f:
+        stale = f.read()
+    journal.append({'ad_text': "놀라운 할인 혜택", 'overall_rating': 1,
+                    'sentiment_analysis': analyzer.analyze_text("놀라운 할인 혜택"), 'timestamp': "2024-01-02"})
+    expected = summary(journal)
+    with open(journal.aggregates.path, 'wb') as f:
+        f.write(stale)
+
+    store, rebuilt = reload(journal, monkeypatch)
+    assert rebuilt
+    assert summary(store) == expected
+    assert store.count() == len(TEXTS) + 1
@@ -0,0 +1,69 @@
+"""평가 저널 재생과 압축: 기록 도중이나 압축 도중 중단된 뒤에도 평가가 빠지거나 두 번 들어가지 않는지"""
+import os
+
+import pytest
+
+import main2
+
+
+def make_ad(i):
+    return {'ad_text': f"광고 문구 {i}", 'overall_rating': i % 10 + 1, 'sentiment_analysis': None,
+            'timestamp': f"2024-01-01T00:00:{i:02d}"}
+
+
+@pytest.fixture
+def journal(tmp_path):
+    store = main2.RatingJournal(str(tmp_path / "ad_data.json"))
+    store.load()
+    return store
+
+
+def test_appended_ratings_are_replayed(journal):
+    for i in range(5):
+        journal.append(make_ad(i))
+    assert main2.RatingJournal(journal.snapshot_path).load() == [make_ad(i) for i in range(5)]
+
+
+def test_truncated_last_line_is_dropped(journal):
+    for i in range(3):
+        journal.append(make_ad(i))
+    # 마지막 줄을 쓰는 도중 중단된 것처럼 반쪽 줄을 남김
+    with open(journal.journal_path, 'ab') as f:
+        f.write('{"index": 3, "ad": {"ad_text": "광고'.encode('utf-8'))
+
+    reloaded = main2.RatingJournal(journal.snapshot_path)
+    assert reloaded.load() == [make_ad(i) for i in range(3)]
+
+    # 끊긴 줄은 잘려 나가므로 다음 평가가 그 뒤에 이어 붙지 않음
+    reloaded.append(make_ad(3))
+    assert main2.RatingJournal(journal.snapshot_path).load() == [make_ad(i) for i in range(4)]
+
+
+def test_compaction_interrupted_before_journal_removal(journal, monkeypatch):
+    for i in range(4):
+        journal.append(make_ad(i))
+
+    # 스냅샷은 교체했지만 저널을 지우기 전에 중단된 경우
+    monkeypatch.setattr(main2.os, 'remove', lambda path: None)
+    journal.compact()
+    monkeypatch.undo()
+    assert os.path.exists(journal.journal_path)
+
+    reloaded = main2.RatingJournal(journal.snapshot_path)
+    assert reloaded.load() == [make_ad(i) for i in range(4)]
+
+    # 남은 저널 항목은 index로 걸러지고, 새 평가만 추가됨
+    reloaded.append(make_ad(4))
+    assert main2.RatingJournal(journal.snapshot_path).load() == [make_ad(i) for i in range(5)]
+
+
+def test_compaction_empties_journal(journal):
+    for i in range(3):
+        journal.append(make_ad(i))
+    journal.compact()
+    assert not os.path.exists(journal.journal_path)
+
+    reloaded = main2.RatingJournal(journal.snapshot_path)
+    assert reloaded.load() == [make_ad(i) for i in range(3)]
+    assert reloaded.count() == 3
+    assert reloaded.count(min_rating=2) == 2
@@ -0,0 +1,36 @@
+"""SentimentResult 슬롯 객체와 예전 dict 형식 사이의 변환"""
+import json
+
+import main2
+
+TEXT = "행복한 하루! 최고의 맛, 하지만 느린 배송?"
+
+
+def test_dict_round_trip(analyzer):
+    result = analyzer.analyze_text(TEXT)
+    restored = main2.SentimentResult.from_dict(json.loads(json.dumps(result.to_dict(), ensure_ascii=False)))
+    assert restored == result
+    assert restored.to_dict() == result.to_dict()
+
+
+def test_legacy_record_recomputes_pattern_and_words_from_text(analyzer):
+    result = analyzer.analyze_text(TEXT)
+    legacy = result.to_dict()
+    del legacy['language_pattern']
+    del legacy['words']
+
+    ad = main2.compact_rating({'ad_text': TEXT, 'overall_rating': 8, 'sentiment_analysis': legacy})
+    restored = ad['sentiment_analysis']
+    assert isinstance(restored, main2.SentimentResult)
+    assert restored.language_pattern == main2.text_language_pattern(TEXT)
+    assert restored.words == result.words
+    assert restored == result
+
+
+def test_overrides_skip_values_recomputable_from_text(analyzer):
+    result = analyzer.analyze_text(TEXT)
+    assert result.overrides(TEXT) == (None, None)
+    # 다른 문구로 저장하면 원래 문구의 단어 목록과 언어 패턴을 그대로 남김
+    words, pattern = result.overrides("다른 문구")
+    assert words == result.words
+    assert pattern == result.language_pattern
@@ -0,0 +1,73 @@
+"""로컬 HTTP 분석 서비스: 포트 0으로 띄워 SQLite 평가 저장소로 /analyze·/similar·/recommend 요청"""
+import asyncio
+import json
+
+import pytest
+
+import main2
+
+
+@pytest.fixture
+def rated(catalog_texts):
+    """(광고 문구, 평점): 광고 카피 DB 문구 셋은 높게, 하나는 낮게"""
+    return [(catalog_texts[0], 9), (catalog_texts[1], 8), (catalog_texts[2], 7), ("별로인 서비스와 느린 배송", 2)]
+
+
+@pytest.fixture
+def sqlite_data_file(tmp_path, monkeypatch, analyzer, rated):
+    """평가 4개를 SQLite 저장소로 옮긴 ad_data.json 경로 (AdPreferenceAnalyzer가 이 경로를 쓰도록 함)"""
+    data_file = str(tmp_path / "ad_data.json")
+    journal = main2.RatingJournal(data_file)
+    journal.load()
+    for text, rating in rated:
+        journal.append({'ad_text': text, 'overall_rating': rating,
+                        'sentiment_analysis': analyzer.analyze_text(text), 'timestamp': "2024-01-01T00:00:00"})
+    assert main2.migrate_to_sqlite(data_file) == len(rated)
+    monkeypatch.setattr(main2, 'default_data_file', lambda: data_file)
+    return data_file
+
+
+async def request(port, method, path, payload=None):
+    """HTTP 요청 하나 보내고 (상태 코드, 응답 JSON)"""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    body = json.dumps(payload or {}).encode('utf-8')
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode('latin-1') + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b'\r\n\r\n')
+    return int(head.split(b' ')[1]), json.loads(body)
+
+
+def test_service_with_sqlite_store(sqlite_data_file, analyzer, rated):
+    async def scenario():
+        service = main2.AnalysisService(main2.AdPreferenceAnalyzer)
+        await service.start()
+        server = await asyncio.start_server(service.handle_connection, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            assert isinstance(service.app.store, main2.SQLiteRatingStore)
+
+            status, body = await request(port, 'POST', '/analyze', {'text': rated[0][0]})
+            assert status == 200
+            assert main2.SentimentResult.from_dict(body['result']) == analyzer.analyze_text(rated[0][0])
+
+            status, body = await request(port, 'POST', '/similar', {'text': rated[1][0], 'top_n': 2})
+            assert status == 200
+            assert 1 <= len(body['similar_ads']) <= 2
+            assert body['similar_ads'][0]['ad']['ad_text'] == rated[1][0]
+
+            status, body = await request(port, 'POST', '/recommend', {'top_n': 3})
+            assert status == 200
+            assert 1 <= len(body['recommendations']) <= 3
+
+            status, body = await request(port, 'GET', '/stats')
+            assert status == 200
+            assert body['endpoints']['/similar']['errors'] == 0
+        finally:
+            server.close()
+            await server.wait_closed()
+            await service.close()
+
+    asyncio.run(scenario())
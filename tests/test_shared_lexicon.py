@@ -0,0 +1,44 @@
+"""공유 감성사전(.lexmap)의 배치 매칭이 match_lexicon과 같은 감성 표현을 찾고 같은 분석 결과를 내는지"""
+import pytest
+
+import main2
+
+# 여러 단어 구, 사전에 없는 활용형, 영어·기호만 있는 문구, 빈 문구
+EDGE_TEXTS = [
+    "가격이 싸다 그래서 행복했던 순간",
+    "가난하고 어렵다 하지만 가슴이 뭉클하다",
+    "Fresh coffee every morning",
+    "!!! ??? ...",
+    "",
+    "최고 최고 최고 최고의 맛",
+]
+
+
+@pytest.fixture(scope="module")
+def shared(analyzer):
+    lexicon = main2.SharedLexicon.open(analyzer.publish_shared_lexicon(), analyzer.senti_dict_file)
+    assert lexicon is not None
+    yield lexicon
+    lexicon.close()
+
+
+def test_encode_batch_matches_match_lexicon(analyzer, shared, catalog_texts):
+    texts = catalog_texts + EDGE_TEXTS
+    word_lists = [analyzer.extract_words(text) for text in texts]
+    token_ids = main2.SharedTokenIds(shared)
+
+    id_lists = shared.encode_batch(word_lists, token_ids)
+    assert len(id_lists) == len(texts) and any(id_lists)
+    for words, ids in zip(word_lists, id_lists):
+        expected = [pair for _, _, pair in analyzer.match_lexicon(words)]
+        assert [token_ids.pair(term_id) for term_id in ids] == expected
+
+
+def test_shared_analyzer_matches_analyze_text(analyzer, shared, catalog_texts):
+    texts = catalog_texts + EDGE_TEXTS
+    shared_analyzer = main2.AdvancedSentimentAnalyzer(analyzer.senti_dict_file, quiet=True, shared_lexicon=shared)
+    assert not shared_analyzer.sentiment_dict
+
+    expected = [analyzer.analyze_text(text) for text in texts]
+    assert shared_analyzer.analyze_batch(texts) == expected
+    assert [shared_analyzer.analyze_text(text) for text in EDGE_TEXTS] == expected[-len(EDGE_TEXTS):]
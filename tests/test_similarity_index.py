@@ -0,0 +1,69 @@
+"""누적 유사도 색인이 (기록 + 질의)로 다시 학습한 TfidfVectorizer와 같은 코사인 점수를 내는지"""
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+
+import main2
+
+# 카탈로그 단어를 섞은 문구와 카탈로그에 없는 단어가 섞인 문구
+QUERIES = ["소중한 일상에 스며드는 행복", "달리는 이유는 달라도 좋은 생각", "일상을 지켜주는 커피 한 잔"]
+
+
+def refit_scores(texts, query):
+    """질의마다 기록 + 질의로 TfidfVectorizer를 새로 학습한 코사인 유사도"""
+    matrix = TfidfVectorizer().fit_transform(texts + [query])
+    return cosine_similarity(matrix[-1], matrix[:-1])[0]
+
+
+def assert_matches_refit(index, texts, query):
+    expected = refit_scores(texts, query)
+    results = index.query(query, top_n=len(texts), threshold=0.0)
+    assert results
+    assert {doc_id for doc_id, _ in results} == {i for i, score in enumerate(expected) if score > 0}
+    for doc_id, score in results:
+        assert score == pytest.approx(expected[doc_id])
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_scores_match_refit_vectorizer(tmp_path, catalog_texts, query):
+    texts = catalog_texts[:60]
+    index = main2.SimilarityIndex(str(tmp_path / "ad_data.simindex.jsonl"))
+    index.sync(texts)
+    assert_matches_refit(index, texts, query)
+
+    # 근사 색인이 고른 후보만 다시 계산해도 같은 점수
+    candidates = [doc_id for doc_id, _ in index.query(query, top_n=len(texts), threshold=0.0)]
+    assert index.query(query, top_n=5, threshold=0.0, candidates=candidates) == \
+        index.query(query, top_n=5, threshold=0.0)
+
+
+def test_reload_and_add_match_refit(tmp_path, catalog_texts):
+    path = str(tmp_path / "ad_data.simindex.jsonl")
+    texts = catalog_texts[:40]
+    main2.SimilarityIndex(path).sync(texts)
+
+    # 파일에서 불러온 색인에 문서를 추가해도 다시 학습한 결과와 같음
+    reloaded = main2.SimilarityIndex(path)
+    reloaded.sync(texts)
+    reloaded.add(catalog_texts[40])
+    texts = catalog_texts[:41]
+    for query in QUERIES:
+        assert_matches_refit(reloaded, texts, query)
+
+    with open(path, 'r', encoding='utf-8') as f:
+        assert sum(1 for _ in f) == len(texts)
+
+
+def test_changed_history_rebuilds_index(tmp_path, catalog_texts):
+    path = str(tmp_path / "ad_data.simindex.jsonl")
+    texts = catalog_texts[:20]
+    main2.SimilarityIndex(path).sync(texts)
+
+    # 중간 문서가 바뀌면 저장된 단어 빈도를 버리고 새 기록으로 다시 만듦
+    edited = texts[:10] + ["완전히 새로운 커피 광고 문구"] + texts[11:]
+    index = main2.SimilarityIndex(path)
+    index.sync(edited)
+    for query in QUERIES:
+        assert_matches_refit(index, edited, query)
+    with open(path, 'r', encoding='utf-8') as f:
+        assert sum(1 for _ in f) == len(edited)
@@ -0,0 +1,69 @@
+"""평가 기록 스냅샷 v1(JSON 배열) → v2 변환과 v2 인코더/디코더"""
+import io
+import json
+
+import pytest
+
+import main2
+
+TEXTS = [
+    "행복한 하루, 최고의 맛!",
+    "가격은 비싸지만 품질은 최고입니다",
+    "별로인 서비스와 느린 배송",
+    "Fresh coffee every morning",
+]
+
+
+@pytest.fixture
+def ads(analyzer):
+    records = [
+        {'ad_text': text, 'overall_rating': rating, 'sentiment_analysis': analyzer.analyze_text(text),
+         'timestamp': f"2024-01-0{rating}T12:00:00"}
+        for rating, text in enumerate(TEXTS, 1)
+    ]
+    # 분석 결과가 없는 평가와 추가 필드가 있는 평가도 그대로 보존해야 함
+    records.append({'ad_text': "분석 없음", 'overall_rating': 5, 'sentiment_analysis': None, 'timestamp': "t"})
+    records.append({'ad_text': "추가 필드", 'overall_rating': 6, 'sentiment_analysis': None, 'timestamp': "t",
+                    'source': "import"})
+    return records
+
+
+def test_codec_round_trip(ads):
+    f = io.StringIO()
+    main2.RatingSnapshotCodec.write(f, ads)
+    f.seek(0)
+    assert list(main2.RatingSnapshotCodec.read(f)) == ads
+
+
+def test_v1_snapshot_migrates_to_v2(tmp_path, ads):
+    path = tmp_path / "ad_data.json"
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(ads, f, ensure_ascii=False, indent=2, default=main2.json_default)
+
+    original = path.read_bytes()
+    assert main2.RatingJournal(str(path)).load() == ads
+
+    # 원본 v1 파일은 .v1.bak으로 남음
+    assert (tmp_path / ("ad_data.json" + main2.SNAPSHOT_V1_BACKUP_SUFFIX)).read_bytes() == original
+
+    # 파일은 v2로 바뀌고, 다시 읽어도 같은 기록
+    with open(path, 'r', encoding='utf-8') as f:
+        assert json.loads(f.readline()) == {'format': main2.SNAPSHOT_FORMAT, 'version': main2.SNAPSHOT_VERSION}
+        f.seek(0)
+        assert list(main2.RatingSnapshotCodec.read(f)) == ads
+    assert main2.RatingJournal(str(path)).load() == ads
+
+
+@pytest.mark.parametrize("content", ["", "  \n\t"])
+def test_blank_snapshot_is_empty_history(tmp_path, content):
+    path = tmp_path / "ad_data.json"
+    path.write_text(content, encoding='utf-8')
+    assert main2.RatingJournal(str(path)).load() == []
+    # 손상 파일로 옮기지 않음
+    assert not any('corrupt' in p.name for p in tmp_path.iterdir())
+
+
+def test_unsupported_version_is_rejected():
+    f = io.StringIO(json.dumps({'format': main2.SNAPSHOT_FORMAT, 'version': main2.SNAPSHOT_VERSION + 1}) + "\n")
+    with pytest.raises(ValueError):
+        list(main2.RatingSnapshotCodec.read(f))
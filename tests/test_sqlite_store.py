@@ -0,0 +1,103 @@
+"""SQLite 평가 저장소: JSON 스냅샷 + 저널 저장소와 같은 기록·집계를 내는지"""
+import pytest
+
+import main2
+
+TEXTS = [
+    ("행복한 하루, 최고의 맛!", 9),
+    ("가격은 비싸지만 품질은 최고입니다", 6),
+    ("별로인 서비스와 느린 배송", 2),
+    ("신선한 커피로 시작하는 아침", 9),
+    ("Fresh coffee every morning", 5),
+    ("놀라운 할인 혜택, 지금 바로", 2),
+    ("사랑스러운 선물로 전하는 마음", 8),
+]
+
+
+def make_ads(analyzer, texts):
+    return [{'ad_text': text, 'overall_rating': rating, 'sentiment_analysis': analyzer.analyze_text(text),
+             'timestamp': f"2024-01-01T00:00:{i:02d}"} for i, (text, rating) in enumerate(texts)]
+
+
+@pytest.fixture
+def stores(tmp_path, analyzer):
+    """같은 기록을 담은 (JSON 저장소, SQLite 저장소)"""
+    data_file = str(tmp_path / "ad_data.json")
+    journal = main2.RatingJournal(data_file)
+    journal.load()
+    for ad in make_ads(analyzer, TEXTS):
+        journal.append(ad)
+
+    assert main2.migrate_to_sqlite(data_file) == len(TEXTS)
+    sqlite_store = main2.open_rating_store(data_file)
+    assert isinstance(sqlite_store, main2.SQLiteRatingStore)
+    yield journal, sqlite_store
+    sqlite_store.conn.close()
+
+
+def assert_same_store(journal, sqlite_store):
+    assert sqlite_store.ads == journal.ads
+    assert sqlite_store.count() == journal.count()
+    for min_rating in (None, 1, 5, 9, 10):
+        assert sqlite_store.count(min_rating) == journal.count(min_rating)
+        assert sqlite_store.texts(min_rating) == journal.texts(min_rating)
+    assert sqlite_store.average_rating() == pytest.approx(journal.average_rating())
+    for field in ('sentiment_label', 'main_style'):
+        assert sqlite_store.group_stats(field) == journal.group_stats(field)
+    assert sqlite_store.best_and_worst() == journal.best_and_worst()
+
+
+def test_migrated_store_matches_json_store(stores):
+    journal, sqlite_store = stores
+    assert_same_store(journal, sqlite_store)
+    # 동점이면 최고 평점은 먼저, 최저 평점은 나중에 평가한 광고
+    best, worst = sqlite_store.best_and_worst()
+    assert best['ad_text'] == TEXTS[0][0]
+    assert worst['ad_text'] == TEXTS[5][0]
+
+
+def test_history_pages_match_json_store(stores):
+    journal, sqlite_store = stores
+    for filters in ({}, {'min_rating': 6}, {'sentiment_label': '매우 긍정'}):
+        assert sqlite_store.count_matching(**filters) == journal.count_matching(**filters)
+        for sort, descending in (('index', False), ('index', True), ('rating', True), ('rating', False)):
+            for offset in (0, 3):
+                assert (sqlite_store.history_rows(offset, 3, sort=sort, descending=descending, **filters)
+                        == journal.history_rows(offset, 3, sort=sort, descending=descending, **filters))
+
+
+def test_appends_after_migration_and_reopen(stores, analyzer):
+    journal, sqlite_store = stores
+    for ad in make_ads(analyzer, [("최고의 선택, 최고의 맛", 10), ("느린 배송", 1)]):
+        journal.append(dict(ad))
+        sqlite_store.append(dict(ad))
+    assert_same_store(journal, sqlite_store)
+
+    reopened = main2.SQLiteRatingStore(sqlite_store.db_path)
+    try:
+        assert_same_store(journal, reopened)
+    finally:
+        reopened.conn.close()
+
+
+def test_migrate_refuses_existing_database(stores):
+    journal, _ = stores
+    with pytest.raises(FileExistsError):
+        main2.migrate_to_sqlite(journal.snapshot_path)
+
+
+def test_read_rating_history_from_sqlite(stores):
+    journal, sqlite_store = stores
+    sqlite_store.append({'ad_text': "SQLite에만 있는 평가", 'overall_rating': 7, 'sentiment_analysis': None,
+                         'timestamp': "t"})
+    # JSON 파일 경로를 주어도 옆의 .sqlite3 파일을 읽음
+    assert main2.read_rating_history(journal.snapshot_path) == \
+        [(text, rating) for text, rating in TEXTS] + [("SQLite에만 있는 평가", 7)]
+
+
+@pytest.mark.parametrize("content", ['{\n  "positive": ["좋은"]\n}', '{"format": "other"}\n', "not json\n"])
+def test_read_rating_history_rejects_other_files(tmp_path, content):
+    path = tmp_path / "ad_keywords.json"
+    path.write_text(content, encoding='utf-8')
+    with pytest.raises(ValueError, match="평가 기록 파일이 아닙니다"):
+        main2.read_rating_history(str(path))
@@ -0,0 +1,45 @@
+"""희소 코사인 상위 k개가 밀집 행렬로 계산한 코사인 순위와 같은지"""
+import numpy as np
+import pytest
+from sklearn.metrics.pairwise import cosine_similarity
+
+import main2
+
+
+@pytest.fixture(scope="module")
+def catalog_index(tmp_path_factory, catalog_texts):
+    db_path = tmp_path_factory.mktemp("catalog") / "ad_copy_database.json"
+    return main2.CatalogTfidfIndex(str(db_path), catalog_texts)
+
+
+@pytest.mark.parametrize("top_n,threshold", [(1, 0.0), (5, 0.1), (10, 0.05), (500, 0.0)])
+def test_sparse_top_k_matches_dense_ranking(catalog_index, catalog_texts, top_n, threshold):
+    # 카탈로그 문구 묶음 몇 개와 카탈로그에 없는 문구를 프로필로 사용
+    groups = [catalog_texts[i:i + 3] for i in range(0, 30, 3)] + [["오늘 하루도 행복한 커피 한 잔"], ["zzz"]]
+    profiles = catalog_index.profiles(groups)
+    dense = cosine_similarity(profiles.toarray(), catalog_index.matrix.toarray())
+
+    results = catalog_index.top_k(profiles, top_n, threshold)
+    assert len(results) == len(groups)
+    for row, (indices, scores) in enumerate(results):
+        # 기준: 밀집 점수를 전부 정렬한 상위 top_n개 (점수가 0인 항목은 희소 행렬에 없으므로 제외)
+        candidates = dense[row][(dense[row] >= threshold) & (dense[row] > 0)]
+        expected = np.sort(candidates)[::-1][:top_n]
+
+        assert len(indices) == len(expected)
+        assert len(set(indices.tolist())) == len(indices)
+        np.testing.assert_allclose(scores, expected)
+        # 고른 행의 실제 코사인 유사도가 순위별 기준 점수와 같음 (동점끼리는 순서가 달라도 됨)
+        np.testing.assert_allclose(dense[row][indices], expected)
+
+
+def test_ties_are_broken_by_row_number():
+    scores = main2.sparse.csr_matrix(np.array([[0.5, 0.9, 0.5, 0.5, 0.0]]))
+    (indices, values), = main2.select_top_k(scores, 3, threshold=0.1)
+    assert indices.tolist() == [1, 0, 2]
+    assert values.tolist() == [0.9, 0.5, 0.5]
+
+
+def test_single_profile_matches_batch_profiles(catalog_index, catalog_texts):
+    texts = catalog_texts[:4]
+    np.testing.assert_allclose(catalog_index.profile(texts).toarray(), catalog_index.profiles([texts]).toarray())